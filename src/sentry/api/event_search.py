@@ -1,3 +1,4 @@
+import functools
 import re
 from collections import namedtuple
 from dataclasses import asdict, dataclass, field
@@ -1134,14 +1135,35 @@ default_config = SearchConfig(
 )
 
 
+# Number of parse trees kept by `parse_query_tree`.
+PARSE_TREE_CACHE_SIZE = 1000
+
+
+@functools.lru_cache(maxsize=PARSE_TREE_CACHE_SIZE)
+def parse_query_tree(query: str) -> Node:
+    """
+    Parse a query with the search grammar. Dashboards and alert subscriptions
+    send the same queries over and over again, so trees are kept in a LRU.
+
+    Only the tree is cached, and not the filters built out of it, since
+    visiting a tree depends on the config, params and builder, and relative
+    dates are resolved against the current time.
+    """
+    return event_search_grammar.parse(query)
+
+
 def parse_search_query(
     query, config=None, params=None, builder=None, config_overrides=None
 ) -> Sequence[SearchFilter]:
     if config is None:
         config = default_config
 
+    if not query or query == " " * len(query):
+        # Empty queries don't have any filters, regardless of the config
+        return []
+
     try:
-        tree = event_search_grammar.parse(query)
+        tree = parse_query_tree(query)
     except IncompleteParseError as e:
         idx = e.column()
         prefix = query[max(0, idx - 5) : idx]
@@ -1,13 +1,16 @@
 import logging
 import pickle
 import threading
+from collections import defaultdict
 from datetime import date, datetime
 from time import time
 
+import msgpack
 from django.db import models
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 
+from sentry import options
 from sentry.buffer.base import Buffer
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
@@ -26,6 +29,11 @@ logger = logging.getLogger(__name__)
 # load everywhere
 _last_validation_log = None
 
+# Values written with the msgpack codec are prefixed with this marker, which
+# can't be the start of either a JSON or a pickle payload. See
+# `RedisBuffer._encode_values`.
+MSGPACK_PREFIX = b"\x00mp"
+
 
 def _validate_json_roundtrip(value, model):
     global _last_validation_log
@@ -145,6 +153,9 @@ class RedisBuffer(Buffer):
         elif isinstance(value, date):
             type_ = "d"
             value = value.strftime("%s.%f")
+        elif isinstance(value, bool):
+            # A subclass of int, which would be loaded back as a plain int.
+            raise TypeError(type(value))
         elif isinstance(value, int):
             type_ = "i"
         elif isinstance(value, float):
@@ -176,6 +187,42 @@ class RedisBuffer(Buffer):
         else:
             raise TypeError(f"invalid type: {type_}")
 
+    @classmethod
+    def _encode_values(cls, values):
+        try:
+            return MSGPACK_PREFIX + msgpack.packb(cls._dump_values(values))
+        except TypeError:
+            # Values outside of the schema of `_dump_value` (e.g. the `data`
+            # dict of Group) are still pickled, which every reader understands.
+            metrics.incr("buffer.msgpack-encoding.fallback", skip_internal=True)
+            return pickle.dumps(values)
+
+    @classmethod
+    def _encode_value(cls, value):
+        try:
+            return MSGPACK_PREFIX + msgpack.packb(cls._dump_value(value))
+        except TypeError:
+            metrics.incr("buffer.msgpack-encoding.fallback", skip_internal=True)
+            return pickle.dumps(value)
+
+    @classmethod
+    def _decode_values(cls, payload):
+        if payload.startswith(MSGPACK_PREFIX):
+            return cls._load_values(msgpack.unpackb(payload[len(MSGPACK_PREFIX) :]))
+        elif payload.startswith(b"{"):
+            return cls._load_values(json.loads(payload.decode("utf-8")))
+        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+        return pickle.loads(payload)
+
+    @classmethod
+    def _decode_value(cls, payload):
+        if payload.startswith(MSGPACK_PREFIX):
+            return cls._load_value(msgpack.unpackb(payload[len(MSGPACK_PREFIX) :]))
+        elif payload.startswith(b"["):
+            return cls._load_value(json.loads(payload.decode("utf-8")))
+        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+        return pickle.loads(payload)
+
     def get(self, model, columns, filters):
         """
         Fetches buffered values for a model/filter. Passed columns must be integer columns.
@@ -211,13 +258,19 @@ class RedisBuffer(Buffer):
         # keys (one per Redis partition)
         conn = self.cluster.get_local_client_for_key(key)
 
+        # Every reader understands the msgpack encoding, the option only exists
+        # to allow a gradual rollout of the writers.
+        use_msgpack = options.get("buffer.redis.msgpack-encoding")
+
         pipe = conn.pipeline()
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        _validate_json_roundtrip(filters, model)
-        pipe.hsetnx(key, "f", pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        if use_msgpack:
+            pipe.hsetnx(key, "f", self._encode_values(filters))
+        else:
+            # TODO(dcramer): once this goes live in production, we can kill the pickle path
+            # (this is to ensure a zero downtime deploy where we can transition event processing)
+            _validate_json_roundtrip(filters, model)
+            pipe.hsetnx(key, "f", pickle.dumps(filters))
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
 
@@ -225,12 +278,13 @@ class RedisBuffer(Buffer):
             # Group tries to serialize 'score', so we'd need some kind of processing
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
-            _validate_json_roundtrip(extra, model)
+            if not use_msgpack:
+                _validate_json_roundtrip(extra, model)
             for column, value in extra.items():
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
+                if use_msgpack:
+                    pipe.hset(key, "e+" + column, self._encode_value(value))
+                else:
+                    pipe.hset(key, "e+" + column, pickle.dumps(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
@@ -293,10 +347,9 @@ class RedisBuffer(Buffer):
         assert not (key is not None and batch_keys is not None)
 
         if key is not None:
-            batch_keys = [key]
-
-        for key in batch_keys:
             self._process_single_incr(key)
+        else:
+            self._process_batch(batch_keys)
 
     def _process(self, model, columns, filters, extra=None, signal_only=None):
         return super().process(model, columns, filters, extra, signal_only)
@@ -321,42 +374,93 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
+            self._process_values(key, values)
+        finally:
+            client.delete(lock_key)
+
+    def _process_values(self, key, values):
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))
+        filters = self._decode_values(values.pop("f"))
 
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
-                return
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                extra_values[k[2:]] = self._decode_value(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))
+        self._process(model, incr_values, filters, extra_values, signal_only)
 
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+    def _process_batch(self, keys):
+        """
+        Process many keys at once.
+
+        Unlike `_process_single_incr`, which needs a lock and a pipeline round
+        trip per key, this acquires the locks of all keys in one mapped call,
+        and drains their values with a single transactional pipeline per
+        Redis host. The values are then applied to the database one key at a
+        time, so a failure only affects that key.
+        """
+        with self.cluster.map() as conn:
+            lock_results = {
+                key: conn.set(self._make_lock_key(key), "1", nx=True, ex=10) for key in keys
+            }
+
+        locked_keys = []
+        for key, result in lock_results.items():
+            if result.value:
+                locked_keys.append(key)
             else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._process(model, incr_values, filters, extra_values, signal_only)
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        if not locked_keys:
+            return
+
+        try:
+            router = self.cluster.get_router()
+            keys_by_host = defaultdict(list)
+            for key in locked_keys:
+                keys_by_host[router.get_host_for_key(key)].append(key)
+
+            values_by_key = {}
+            for host_id, host_keys in keys_by_host.items():
+                # The pipeline is transactional, so no increment can slip in
+                # between reading the values of a key and deleting it.
+                pipe = self.cluster.get_local_client(host_id).pipeline()
+                for key in host_keys:
+                    pipe.hgetall(key)
+                for key in host_keys:
+                    pipe.zrem(self._make_pending_key_from_key(key), key)
+                pipe.delete(*host_keys)
+                results = pipe.execute()
+                values_by_key.update(zip(host_keys, results[: len(host_keys)]))
+
+            metrics.timing("buffer.process-batch.size", len(locked_keys))
+
+            for key in locked_keys:
+                try:
+                    self._process_values(key, values_by_key[key])
+                except Exception:
+                    self.logger.exception("buffer.process-batch.failed", extra={"redis_key": key})
         finally:
-            client.delete(lock_key)
+            with self.cluster.map() as conn:
+                for key in locked_keys:
+                    conn.delete(self._make_lock_key(key))
@@ -117,8 +117,10 @@ SENTRY_DISALLOWED_IPS = ()
 # search domains.
 SENTRY_ENSURE_FQDN = False
 
+SENTRY_DELETIONS_REDIS_CLUSTER = "default"
 SENTRY_DYNAMIC_SAMPLING_RULES_REDIS_CLUSTER = "default"
 SENTRY_INCIDENT_RULES_REDIS_CLUSTER = "default"
+SENTRY_MONITORS_REDIS_CLUSTER = "default"
 SENTRY_RATE_LIMIT_REDIS_CLUSTER = "default"
 SENTRY_RULE_TASK_REDIS_CLUSTER = "default"
 SENTRY_TRANSACTION_NAMES_REDIS_CLUSTER = "default"
@@ -1929,10 +1931,27 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Identical queries running at the same time in a process are only sent to
+# Snuba once, the other threads wait for the result.
+SENTRY_SNUBA_COALESCE_QUERIES = True
+# Maximum size in bytes of the in-process cache of Snuba results, shared by
+# all threads of a process (0 = disabled). Only results of the referrers in
+# the `snuba.local-cache.referrer-ttls` option are cached.
+SENTRY_SNUBA_LOCAL_CACHE_SIZE = 0
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS: dict[str, Any] = {}
+# Maximum size in bytes of the in-process cache of nodestore blobs, shared by
+# all threads of a process. Writes only invalidate the cache of the writing
+# process, so keep the TTL (in seconds) short. Disabled when set to 0.
+SENTRY_NODESTORE_LOCAL_CACHE_SIZE = 0
+SENTRY_NODESTORE_LOCAL_CACHE_TTL = 30
+# Directory of zstd dictionaries used to compress nodestore blobs, see
+# `sentry.nodestore.compression`. Disabled when not set. Dictionaries must be
+# kept around for as long as blobs compressed with them may be read.
+SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR: str | None = None
+SENTRY_NODESTORE_ZSTD_LEVEL = 3
 
 # Tag storage backend
 SENTRY_TAGSTORE = os.environ.get("SENTRY_TAGSTORE", "sentry.tagstore.snuba.SnubaTagStorage")
@@ -1979,6 +1998,12 @@ SENTRY_METRICS_DISALLOW_BAD_TAGS = IS_DEV
 SENTRY_METRICS_INDEXER = "sentry.sentry_metrics.indexer.postgres.postgres_v2.PostgresIndexer"
 SENTRY_METRICS_INDEXER_OPTIONS: dict[str, Any] = {}
 SENTRY_METRICS_INDEXER_CACHE_TTL = 3600 * 2
+# Number of strings of each use case to keep in the in-process cache in front
+# of the indexer cache, `0` disables it. Sizes can be overridden per use case,
+# e.g. {"transactions": 100000}.
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE = 0
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_USE_CASE_SIZES: dict[str, int] = {}
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_TTL = 600
 SENTRY_METRICS_INDEXER_TRANSACTIONS_SAMPLE_RATE = 0.1
 
 SENTRY_METRICS_INDEXER_SPANNER_OPTIONS: dict[str, Any] = {}
@@ -1996,8 +2021,15 @@ SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 0.01
 
 # Cardinality limits during metric bucket ingestion.
 # Which cluster to use. Example: {"cluster": "default"}
-SENTRY_METRICS_INDEXER_CARDINALITY_LIMITER_OPTIONS: dict[str, Any] = {}
-SENTRY_METRICS_INDEXER_CARDINALITY_LIMITER_OPTIONS_PERFORMANCE: dict[str, Any] = {}
+# `admitted_hashes_cache_size` is the number of timeseries hashes admitted by
+# a consumer process that it remembers, to skip Redis when they are seen again
+# within the same granule. 0 disables the cache.
+SENTRY_METRICS_INDEXER_CARDINALITY_LIMITER_OPTIONS: dict[str, Any] = {
+    "admitted_hashes_cache_size": 100000
+}
+SENTRY_METRICS_INDEXER_CARDINALITY_LIMITER_OPTIONS_PERFORMANCE: dict[str, Any] = {
+    "admitted_hashes_cache_size": 100000
+}
 SENTRY_METRICS_INDEXER_ENABLE_SLICED_PRODUCER = False
 
 # Release Health
@@ -2053,6 +2085,13 @@ SENTRY_SOURCE_FETCH_SOCKET_TIMEOUT = 2
 # Maximum content length for source files before we abort fetching
 SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 
+# Maximum size in bytes of the in-process cache of parsed sourcemaps and
+# artifact bundles used by JavaScript processing, shared by all events
+# processed by a process. Sourcemaps found by URL may be re-uploaded or change
+# on the web, so keep the TTL (in seconds) short. Disabled when set to 0.
+SENTRY_SOURCEMAP_LOCAL_CACHE_SIZE = 0
+SENTRY_SOURCEMAP_LOCAL_CACHE_TTL = 300
+
 # Maximum content length for cache value.  Currently used only to avoid
 # pointless compression of sourcemaps and other release files because we
 # silently fail to cache the compressed result anyway.  Defaults to None which
@@ -3200,6 +3239,15 @@ SENTRY_SYNTHETIC_MONITORING_PROJECT_ID = None
 SENTRY_SIMILARITY_INDEX_REDIS_CLUSTER = "default"
 # Similarity-v2: uses grouping components for diffing (None = fallback to setting for v1)
 SENTRY_SIMILARITY2_INDEX_REDIS_CLUSTER = None
+# Number of features whose MinHash column hashes are kept in memory, per index
+# (0 = disabled). Stack frames repeat across the events of an issue, so this
+# saves most of the hashing done when building signatures.
+SENTRY_SIMILARITY_SIGNATURE_CACHE_SIZE = 10000
+
+# Number of grouping results kept in memory by `save_event`, per process
+# (0 = disabled). The key covers every input of grouping, including the
+# project's grouping config, so entries never need to be invalidated.
+SENTRY_GROUPING_RESULT_CACHE_SIZE = 10000
 
 # The grouping strategy to use for driving similarity-v2. You can add multiple
 # strategies here to index them all. This is useful for transitioning a
@@ -85,6 +85,21 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-monitors": {
         "topic": settings.KAFKA_INGEST_MONITORS,
         "strategy_factory": "sentry.monitors.consumers.monitor_consumer.StoreMonitorCheckInStrategyFactory",
+        "click_options": [
+            click.Option(
+                ["--max-batch-size"],
+                default=None,
+                type=int,
+                help="Process check-ins in batches of up to this many messages.",
+            ),
+            click.Option(
+                ["--max-batch-time-ms", "max_batch_time"],
+                default=1000,
+                callback=convert_max_batch_time,
+                type=int,
+                help="Maximum time (in milliseconds) to wait before processing a batch.",
+            ),
+        ],
     },
     "billing-metrics-consumer": {
         "topic": settings.KAFKA_SNUBA_GENERIC_METRICS,
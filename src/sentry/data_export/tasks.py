@@ -258,7 +258,8 @@ def process_issues_by_tag(processor, limit, offset):
 
 @handle_snuba_errors(logger)
 def process_discover(processor, limit, offset):
-    raw_data_unicode = processor.data_fn(limit=limit, offset=offset)["data"]
+    # Rows are decoded one at a time, so only the processed rows are held in memory
+    raw_data_unicode = list(processor.data_fn(limit=limit, offset=offset))
     return processor.handle_fields(raw_data_unicode)
 
 
@@ -1,8 +1,15 @@
 import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-from sentry import eventstore, eventstream, models, nodestore
+from django.conf import settings
+from django.db import connections
+
+from sentry import eventstore, eventstream, models, nodestore, options
 from sentry.eventstore.models import Event
+from sentry.utils import json, redis
+from sentry.utils.hashlib import md5_text
 
 from ..base import BaseDeletionTask, BaseRelation, ModelDeletionTask, ModelRelation
 
@@ -40,75 +47,250 @@ _GROUP_RELATED_MODELS = DIRECT_GROUP_RELATED_MODELS + (
 )
 
 
-class EventDataDeletionTask(BaseDeletionTask):
+def _get_redis_client():
+    return redis.redis_clusters.get(settings.SENTRY_DELETIONS_REDIS_CLUSTER)
+
+
+class EventDataPartition:
     """
-    Deletes nodestore data, EventAttachment and UserReports for group
+    A time window of the events of the deleted groups, which is paged through
+    newest event first. `start` (inclusive) and `end` (exclusive) are ISO
+    timestamps, or `None` for an open end. `cursor` is the timestamp and id of
+    the last event deleted.
     """
 
-    # Number of events fetched from eventstore per chunk() call.
-    DEFAULT_CHUNK_SIZE = 10000
+    def __init__(self, start=None, end=None, cursor=None, done=False):
+        self.start = start
+        self.end = end
+        self.cursor = cursor
+        self.done = done
 
-    def __init__(self, manager, groups, **kwargs):
-        self.groups = groups
-        self.last_event = None
-        super().__init__(manager, **kwargs)
+    def __repr__(self):
+        return "<EventDataPartition: start={} end={} cursor={} done={}>".format(
+            self.start, self.end, self.cursor, self.done
+        )
 
-    def chunk(self):
+    def get_conditions(self):
         conditions = []
-        if self.last_event is not None:
+        if self.start is not None:
+            conditions.append(["timestamp", ">=", self.start])
+        if self.end is not None:
+            conditions.append(["timestamp", "<", self.end])
+        if self.cursor is not None:
+            timestamp, event_id = self.cursor
             conditions.extend(
                 [
-                    ["timestamp", "<=", self.last_event.timestamp],
+                    ["timestamp", "<=", timestamp],
                     [
-                        ["timestamp", "<", self.last_event.timestamp],
-                        ["event_id", "<", self.last_event.event_id],
+                        ["timestamp", "<", timestamp],
+                        ["event_id", "<", event_id],
                     ],
                 ]
             )
+        return conditions
+
+    def to_dict(self):
+        return {"start": self.start, "end": self.end, "cursor": self.cursor, "done": self.done}
+
+    @classmethod
+    def from_dict(cls, data):
+        cursor = data["cursor"]
+        return cls(
+            start=data["start"],
+            end=data["end"],
+            cursor=tuple(cursor) if cursor is not None else None,
+            done=data["done"],
+        )
+
+
+def get_event_data_partitions(groups, count):
+    """
+    Split the time range the events of `groups` were seen in into `count`
+    windows of equal length. The first and last windows are left open, as
+    events aren't guaranteed to fall within the first and last seen dates of
+    their groups.
+    """
+    if count <= 1 or not groups:
+        return [EventDataPartition()]
+
+    start = min(group.first_seen for group in groups).replace(microsecond=0)
+    end = max(group.last_seen for group in groups)
+    step = (end - start) / count
+    if step < timedelta(seconds=1):
+        return [EventDataPartition()]
+
+    boundaries = [(start + step * i).replace(microsecond=0).isoformat() for i in range(1, count)]
+    return [
+        EventDataPartition(start=window_start, end=window_end)
+        for window_start, window_end in zip([None] + boundaries, boundaries + [None])
+    ]
+
+
+def delete_nodes(node_ids):
+    """Delete nodes in batches of the size the nodestore backend handles best."""
+    batch_size = nodestore.backend.delete_batch_size or len(node_ids)
+    for i in range(0, len(node_ids), batch_size):
+        nodestore.delete_multi(node_ids[i : i + batch_size])
+
+
+class EventDataDeletionTask(BaseDeletionTask):
+    """
+    Deletes nodestore data, EventAttachment and UserReports for group
+
+    The events are split into time windows (`deletions.group.event-data-partitions`)
+    which are paged through independently, by up to
+    `deletions.group.event-data-concurrency` threads at once. When enabled, the
+    position within every window is checkpointed to Redis after every chunk,
+    so that a retried deletion with the same transaction id resumes where the
+    previous attempt stopped instead of paging through all events again.
+    """
+
+    # Number of events fetched from eventstore per chunk() call and partition.
+    DEFAULT_CHUNK_SIZE = 10000
 
+    # How long the progress of a deletion is kept for retries.
+    CHECKPOINT_TTL = 60 * 60 * 24
+
+    def __init__(self, manager, groups, **kwargs):
+        self.groups = groups
+        self.partitions = None
+        super().__init__(manager, **kwargs)
+
+    def chunk(self):
         group_ids = []
         project_groups = defaultdict(list)
         for group in self.groups:
             project_groups[group.project_id].append(group.id)
             group_ids.append(group.id)
         project_ids = list(project_groups.keys())
+        tenant_ids = (
+            {"organization_id": self.groups[0].project.organization_id} if self.groups else None
+        )
+
+        if self.partitions is None:
+            self.partitions = self.load_checkpoint() or get_event_data_partitions(
+                self.groups, options.get("deletions.group.event-data-partitions")
+            )
+
+        pending = [partition for partition in self.partitions if not partition.done]
+
+        def delete_partition_chunk(partition):
+            self.delete_partition_chunk(partition, project_ids, group_ids, tenant_ids)
+
+        def delete_partition_chunk_in_thread(partition):
+            try:
+                delete_partition_chunk(partition)
+            finally:
+                # Worker threads get database connections of their own.
+                connections.close_all()
+
+        concurrency = min(options.get("deletions.group.event-data-concurrency"), len(pending))
+        try:
+            if concurrency <= 1:
+                for partition in pending:
+                    delete_partition_chunk(partition)
+            else:
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(delete_partition_chunk_in_thread, pending))
+        finally:
+            # Keep the progress of all partitions, even if one of them failed.
+            self.save_checkpoint()
+
+        if not all(partition.done for partition in self.partitions):
+            return True
+
+        # Remove all group events now that their node data has been removed.
+        for project_id, project_group_ids in project_groups.items():
+            eventstream_state = eventstream.backend.start_delete_groups(
+                project_id, project_group_ids
+            )
+            eventstream.backend.end_delete_groups(eventstream_state)
+        self.delete_checkpoint()
+        return False
 
+    def delete_partition_chunk(self, partition, project_ids, group_ids, tenant_ids):
         events = eventstore.backend.get_unfetched_events(
             filter=eventstore.Filter(
-                conditions=conditions, project_ids=project_ids, group_ids=group_ids
+                conditions=partition.get_conditions(), project_ids=project_ids, group_ids=group_ids
             ),
             limit=self.DEFAULT_CHUNK_SIZE,
             referrer="deletions.group",
             orderby=["-timestamp", "-event_id"],
-            tenant_ids={"organization_id": self.groups[0].project.organization_id}
-            if self.groups
-            else None,
+            tenant_ids=tenant_ids,
+        )
+
+        if events:
+            # Remove from nodestore
+            delete_nodes(
+                [Event.generate_node_id(event.project_id, event.event_id) for event in events]
+            )
+
+            # Remove EventAttachment and UserReport *again* as those may not have a
+            # group ID, therefore there may be dangling ones after "regular" model
+            # deletion.
+            event_ids = [event.event_id for event in events]
+            models.EventAttachment.objects.filter(
+                event_id__in=event_ids, project_id__in=project_ids
+            ).delete()
+            models.UserReport.objects.filter(
+                event_id__in=event_ids, project_id__in=project_ids
+            ).delete()
+
+            partition.cursor = (events[-1].timestamp, events[-1].event_id)
+
+        # A partial page is the last one of the partition.
+        if len(events) < self.DEFAULT_CHUNK_SIZE:
+            partition.done = True
+
+    def get_checkpoint_key(self):
+        if not self.transaction_id or not options.get("deletions.group.event-data-checkpoints"):
+            return None
+        group_ids = sorted(group.id for group in self.groups)
+        return "deletions:event-data:{}:{}".format(
+            self.transaction_id, md5_text(",".join(map(str, group_ids))).hexdigest()
         )
-        if not events:
-            # Remove all group events now that their node data has been removed.
-            for project_id, group_ids in project_groups.items():
-                eventstream_state = eventstream.backend.start_delete_groups(project_id, group_ids)
-                eventstream.backend.end_delete_groups(eventstream_state)
-            return False
-
-        self.last_event = events[-1]
-
-        # Remove from nodestore
-        node_ids = [Event.generate_node_id(event.project_id, event.event_id) for event in events]
-        nodestore.delete_multi(node_ids)
-
-        # Remove EventAttachment and UserReport *again* as those may not have a
-        # group ID, therefore there may be dangling ones after "regular" model
-        # deletion.
-        event_ids = [event.event_id for event in events]
-        models.EventAttachment.objects.filter(
-            event_id__in=event_ids, project_id__in=project_ids
-        ).delete()
-        models.UserReport.objects.filter(
-            event_id__in=event_ids, project_id__in=project_ids
-        ).delete()
-
-        return True
+
+    def load_checkpoint(self):
+        key = self.get_checkpoint_key()
+        if key is None:
+            return None
+        try:
+            value = _get_redis_client().get(key)
+        except Exception:
+            self.logger.exception(
+                "event_data.checkpoint.load_failed", extra={"transaction_id": self.transaction_id}
+            )
+            return None
+        if value is None:
+            return None
+        return [EventDataPartition.from_dict(data) for data in json.loads(value)]
+
+    def save_checkpoint(self):
+        key = self.get_checkpoint_key()
+        if key is None or self.partitions is None:
+            return
+        try:
+            _get_redis_client().set(
+                key,
+                json.dumps([partition.to_dict() for partition in self.partitions]),
+                ex=self.CHECKPOINT_TTL,
+            )
+        except Exception:
+            self.logger.exception(
+                "event_data.checkpoint.save_failed", extra={"transaction_id": self.transaction_id}
+            )
+
+    def delete_checkpoint(self):
+        key = self.get_checkpoint_key()
+        if key is None:
+            return
+        try:
+            _get_redis_client().delete(key)
+        except Exception:
+            self.logger.exception(
+                "event_data.checkpoint.delete_failed",
+                extra={"transaction_id": self.transaction_id},
+            )
 
 
 class GroupDeletionTask(ModelDeletionTask):
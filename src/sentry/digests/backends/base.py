@@ -1,7 +1,8 @@
 import logging
-from typing import TYPE_CHECKING, Any, Iterable, Mapping, Optional
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Mapping, Optional, Sequence
 
 from sentry.utils.imports import import_string
+from sentry.utils.locking import UnableToAcquireLock
 from sentry.utils.services import Service
 
 if TYPE_CHECKING:
@@ -58,7 +59,16 @@ class Backend(Service):
     be transitioned to "waiting" instead.)
     """
 
-    __all__ = ("add", "delete", "digest", "enabled", "maintenance", "schedule", "validate")
+    __all__ = (
+        "add",
+        "delete",
+        "digest",
+        "digest_many",
+        "enabled",
+        "maintenance",
+        "schedule",
+        "validate",
+    )
 
     def __init__(self, **options: Any) -> None:
         # The ``minimum_delay`` option defines the default minimum amount of
@@ -168,6 +178,43 @@ class Backend(Service):
         """
         raise NotImplementedError
 
+    def digest_many(
+        self,
+        keys: Sequence[str],
+        build: Callable[[str, List["Record"]], Any],
+        minimum_delays: Optional[Mapping[str, int]] = None,
+        concurrency: int = 1,
+    ) -> Mapping[str, Any]:
+        """
+        Extract and process records from many timelines at once.
+
+        This is the batched equivalent of ``digest``: ``build`` is called with
+        the key and records of every timeline that is ready to be digested
+        (up to ``concurrency`` calls at a time), and the digests of timelines
+        for which ``build`` succeeded are closed, as if the ``digest`` context
+        manager exited successfully. ``minimum_delays`` optionally maps keys
+        to the minimum delay of their timeline.
+
+        Timelines that are not in the ready state, or are being digested
+        elsewhere, are skipped. The return value maps the keys of the
+        timelines that were digested to their ``build`` result, so that any
+        irrevocable action can be performed after the digests were closed.
+
+        Backends may override this to process timelines more efficiently
+        than one by one.
+        """
+        results = {}
+        for key in keys:
+            minimum_delay = minimum_delays.get(key) if minimum_delays else None
+            try:
+                with self.digest(key, minimum_delay=minimum_delay) as records:
+                    results[key] = build(key, records)
+            except (InvalidState, UnableToAcquireLock) as error:
+                logger.info(f"Skipped digest delivery: {error}", exc_info=True)
+            except Exception:
+                logger.exception("Failed to build digest", extra={"key": key})
+        return results
+
     def schedule(
         self, deadline: float, timestamp: Optional[float] = None
     ) -> Optional[Iterable["ScheduleEntry"]]:
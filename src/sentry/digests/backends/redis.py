@@ -1,23 +1,40 @@
 import logging
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
-from typing import Any, Iterable, Optional, Tuple
+from typing import Any, Callable, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
+from django.db import connections
+from pkg_resources import resource_string
 from rb.clients import LocalClient
 from redis.exceptions import ResponseError
 
 from sentry.digests import Record, ScheduleEntry
 from sentry.digests.backends.base import Backend, InvalidState
+from sentry.utils import metrics
+from sentry.utils.iterators import chunked
 from sentry.utils.locking.backends.redis import RedisLockBackend
 from sentry.utils.locking.lock import Lock
 from sentry.utils.locking.manager import LockManager
-from sentry.utils.redis import check_cluster_versions, get_cluster_from_options, load_script
+from sentry.utils.redis import (
+    SentryScript,
+    check_cluster_versions,
+    get_cluster_from_options,
+    load_script,
+)
 from sentry.utils.versioning import Version
 
 logger = logging.getLogger("sentry.digests")
 
 script = load_script("digests/digests.lua")
 
+# The same script, for use with ``cluster.execute_commands``.
+DigestScript = SentryScript(None, resource_string("sentry", "scripts/digests/digests.lua"))
+
+# Duration (in seconds) of the timeline lock taken while a digest is open.
+TIMELINE_LOCK_DURATION = 30
+
 
 class RedisBackend(Backend):
     """
@@ -93,6 +110,10 @@ class RedisBackend(Backend):
     def _get_connection(self, key: str) -> LocalClient:
         return self.cluster.get_local_client_for_key(f"{self.namespace}:t:{key}")
 
+    def _get_timeline_host(self, key: str) -> int:
+        host: int = self.cluster.get_router().get_host_for_key(f"{self.namespace}:t:{key}")
+        return host
+
     def _get_timeline_lock(self, key: str, duration: int) -> Lock:
         lock_key = f"{self.namespace}:t:{key}"
         return self.locks.get(
@@ -156,15 +177,23 @@ class RedisBackend(Backend):
         if timestamp is None:
             timestamp = time.time()
 
-        for host in self.cluster.hosts:
-            try:
-                for key, timestamp in self.__schedule_partition(host, deadline, timestamp):
-                    yield ScheduleEntry(key.decode("utf-8"), float(timestamp))
-            except Exception as error:
-                logger.error(
-                    f"Failed to perform scheduling for partition {host} due to error: {error}",
-                    exc_info=True,
-                )
+        # Partitions are independent of each other, so they are scheduled
+        # concurrently rather than one after the other.
+        with ThreadPoolExecutor(max_workers=len(self.cluster.hosts)) as executor:
+            futures = {
+                executor.submit(self.__schedule_partition, host, deadline, timestamp): host
+                for host in self.cluster.hosts
+            }
+            for future in as_completed(futures):
+                host = futures[future]
+                try:
+                    for key, timestamp in future.result():
+                        yield ScheduleEntry(key.decode("utf-8"), float(timestamp))
+                except Exception as error:
+                    logger.error(
+                        f"Failed to perform scheduling for partition {host} due to error: {error}",
+                        exc_info=True,
+                    )
 
     def __maintenance_partition(self, host: int, deadline: float, timestamp: float) -> Any:
         return script(
@@ -177,14 +206,20 @@ class RedisBackend(Backend):
         if timestamp is None:
             timestamp = time.time()
 
-        for host in self.cluster.hosts:
-            try:
-                self.__maintenance_partition(host, deadline, timestamp)
-            except Exception as error:
-                logger.error(
-                    f"Failed to perform maintenance on digest partition {host} due to error: {error}",
-                    exc_info=True,
-                )
+        with ThreadPoolExecutor(max_workers=len(self.cluster.hosts)) as executor:
+            futures = {
+                executor.submit(self.__maintenance_partition, host, deadline, timestamp): host
+                for host in self.cluster.hosts
+            }
+            for future in as_completed(futures):
+                host = futures[future]
+                try:
+                    future.result()
+                except Exception as error:
+                    logger.error(
+                        f"Failed to perform maintenance on digest partition {host} due to error: {error}",
+                        exc_info=True,
+                    )
 
     @contextmanager
     def digest(
@@ -197,7 +232,7 @@ class RedisBackend(Backend):
             timestamp = time.time()
 
         connection = self._get_connection(key)
-        with self._get_timeline_lock(key, duration=30).acquire():
+        with self._get_timeline_lock(key, duration=TIMELINE_LOCK_DURATION).acquire():
             try:
                 response = script(
                     connection,
@@ -217,29 +252,8 @@ class RedisBackend(Backend):
                 else:
                     raise
 
-            records = [
-                Record(
-                    key.decode(),
-                    self.codec.decode(value) if value is not None else None,
-                    float(timestamp),
-                )
-                for key, value, timestamp in response
-            ]
-
-            # If the record value is `None`, this means the record data was
-            # missing (it was presumably evicted by Redis) so we don't need to
-            # return it here.
-            filtered_records = [record for record in records if record.value is not None]
-            if len(records) != len(filtered_records):
-                logger.warning(
-                    "Filtered out missing records when fetching digest",
-                    extra={
-                        "key": key,
-                        "record_count": len(records),
-                        "filtered_record_count": len(filtered_records),
-                    },
-                )
-            yield filtered_records
+            records = self._decode_records(response)
+            yield self._filter_missing_records(key, records)
 
             script(
                 connection,
@@ -248,10 +262,211 @@ class RedisBackend(Backend):
                 + [record.key for record in records],
             )
 
+    def _decode_records(
+        self, response: Sequence[Tuple[bytes, Optional[bytes], bytes]]
+    ) -> List[Record]:
+        return [
+            Record(
+                key.decode(),
+                self.codec.decode(value) if value is not None else None,
+                float(timestamp),
+            )
+            for key, value, timestamp in response
+        ]
+
+    def _filter_missing_records(self, key: str, records: List[Record]) -> List[Record]:
+        # If the record value is `None`, this means the record data was
+        # missing (it was presumably evicted by Redis) so we don't need to
+        # return it here.
+        filtered_records = [record for record in records if record.value is not None]
+        if len(records) != len(filtered_records):
+            logger.warning(
+                "Filtered out missing records when fetching digest",
+                extra={
+                    "key": key,
+                    "record_count": len(records),
+                    "filtered_record_count": len(filtered_records),
+                },
+            )
+        return filtered_records
+
+    def _build_digests(
+        self,
+        build: Callable[[str, List[Record]], Any],
+        digests: Mapping[str, List[Record]],
+        concurrency: int,
+    ) -> Mapping[str, Any]:
+        results: MutableMapping[str, Any] = {}
+
+        def build_digest(key: str) -> None:
+            try:
+                results[key] = build(key, self._filter_missing_records(key, digests[key]))
+            except Exception:
+                # Like an exception raised within ``digest``, this leaves the
+                # timeline untouched for a later attempt.
+                logger.exception("Failed to build digest", extra={"key": key})
+
+        if concurrency <= 1:
+            for key in digests:
+                build_digest(key)
+            return results
+
+        def build_digest_in_thread(key: str) -> None:
+            try:
+                build_digest(key)
+            finally:
+                # Worker threads get database connections of their own.
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(build_digest_in_thread, digests))
+        return results
+
+    def digest_many(
+        self,
+        keys: Sequence[str],
+        build: Callable[[str, List[Record]], Any],
+        minimum_delays: Optional[Mapping[str, int]] = None,
+        concurrency: int = 1,
+        timestamp: Optional[float] = None,
+    ) -> Mapping[str, Any]:
+        if timestamp is None:
+            timestamp = time.time()
+
+        if minimum_delays is None:
+            minimum_delays = {}
+
+        # Timelines are digested in batches of one digest per thread, so that
+        # the locks taken for a batch only need to be held for as long as a
+        # single digest, like with ``digest``.
+        results: MutableMapping[str, Any] = {}
+        for batch_keys in chunked(keys, max(concurrency, 1)):
+            results.update(
+                self._digest_batch(batch_keys, build, minimum_delays, concurrency, timestamp)
+            )
+
+        metrics.incr("digests.batch.delivered", len(results))
+        return results
+
+    def _digest_batch(
+        self,
+        keys: Sequence[str],
+        build: Callable[[str, List[Record]], Any],
+        minimum_delays: Mapping[str, Optional[int]],
+        concurrency: int,
+        timestamp: float,
+    ) -> Mapping[str, Any]:
+        keys_by_host: MutableMapping[int, List[str]] = defaultdict(list)
+        for key in keys:
+            keys_by_host[self._get_timeline_host(key)].append(key)
+
+        lock_arguments = [
+            self.locks.backend.prefix,
+            self.locks.backend.uuid,
+            TIMELINE_LOCK_DURATION,
+        ]
+
+        # Open the digests of all timelines with a single script call per
+        # host, which also takes the timeline locks. Any key of the host's
+        # timelines routes the call to that host.
+        commands = {
+            f"{self.namespace}:t:{host_keys[0]}": [
+                (
+                    DigestScript,
+                    ["-"],
+                    [
+                        "DIGEST_OPEN_MANY",
+                        self.namespace,
+                        self.ttl,
+                        timestamp,
+                        self.capacity if self.capacity else -1,
+                        *lock_arguments,
+                        *host_keys,
+                    ],
+                )
+            ]
+            for host_keys in keys_by_host.values()
+        }
+
+        opened: MutableMapping[str, List[Record]] = {}
+        with metrics.timer("digests.batch.open"):
+            for responses in self.cluster.execute_commands(commands).values():
+                for key, state, response in responses[0].value:
+                    key = key.decode()
+                    state = state.decode()
+                    if state != "ready":
+                        logger.info("Skipped digest delivery", extra={"key": key, "state": state})
+                        metrics.incr("digests.batch.skipped", tags={"reason": state})
+                        continue
+                    opened[key] = self._decode_records(response)
+
+        with metrics.timer("digests.batch.build"):
+            results = self._build_digests(build, opened, concurrency)
+
+        # Close the digests that were built successfully, again with a single
+        # script call per host, releasing their locks.
+        with metrics.timer("digests.batch.close"):
+            for host_keys in keys_by_host.values():
+                built_keys = [key for key in host_keys if key in results]
+                if not built_keys:
+                    continue
+
+                digest_arguments: List[Any] = []
+                for key in built_keys:
+                    records = opened[key]
+                    minimum_delay = minimum_delays.get(key)
+                    if minimum_delay is None:
+                        minimum_delay = self.minimum_delay
+                    digest_arguments.extend(
+                        [key, minimum_delay, len(records)] + [record.key for record in records]
+                    )
+
+                command = (
+                    DigestScript,
+                    ["-"],
+                    [
+                        "DIGEST_CLOSE_MANY",
+                        self.namespace,
+                        self.ttl,
+                        timestamp,
+                        *lock_arguments,
+                        *digest_arguments,
+                    ],
+                )
+                try:
+                    responses = self.cluster.execute_commands(
+                        {f"{self.namespace}:t:{host_keys[0]}": [command]}
+                    )
+                except Exception:
+                    # Whether the digests were closed is unknown, they are
+                    # assumed not to be, like when closing a single digest
+                    # fails.
+                    logger.exception("Failed to close digests", extra={"keys": built_keys})
+                    failed_keys = built_keys
+                else:
+                    # The script returns the digests it closed, one digest
+                    # failing to close doesn't keep the others from closing.
+                    closed_keys = {
+                        key.decode() for response in responses.values() for key in response[0].value
+                    }
+                    failed_keys = [key for key in built_keys if key not in closed_keys]
+                    if failed_keys:
+                        logger.error("Failed to close digests", extra={"keys": failed_keys})
+
+                if failed_keys:
+                    metrics.incr("digests.batch.close_failed", len(failed_keys))
+                    for key in failed_keys:
+                        del results[key]
+
+        for key in opened.keys() - results.keys():
+            self._get_timeline_lock(key, duration=TIMELINE_LOCK_DURATION).release()
+
+        return results
+
     def delete(self, key: str, timestamp: Optional[float] = None) -> None:
         if timestamp is None:
             timestamp = time.time()
 
         connection = self._get_connection(key)
-        with self._get_timeline_lock(key, duration=30).acquire():
+        with self._get_timeline_lock(key, duration=TIMELINE_LOCK_DURATION).acquire():
             script(connection, [key], ["DELETE", self.namespace, self.ttl, timestamp, key])
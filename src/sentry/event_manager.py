@@ -77,6 +77,7 @@ from sentry.grouping.api import (
     load_grouping_config,
 )
 from sentry.grouping.result import CalculatedHashes
+from sentry.grouping.result_cache import get_grouping_result_cache
 from sentry.ingest.inbound_filters import FilterStatKeys
 from sentry.issues.grouptype import GroupCategory
 from sentry.issues.issue_occurrence import IssueOccurrence
@@ -2231,7 +2232,11 @@ def _calculate_event_grouping(
         # event.  If that config has since been deleted (because it was an
         # experimental grouping config) we fall back to the default.
         try:
-            hashes = event.get_hashes(grouping_config)
+            result_cache = get_grouping_result_cache()
+            if result_cache is not None:
+                hashes = result_cache.get_hashes(event, grouping_config, metric_tags)
+            else:
+                hashes = event.get_hashes(grouping_config)
         except GroupingConfigNotFound:
             event.data["grouping_config"] = get_grouping_config_dict_for_project(project)
             hashes = event.get_hashes()
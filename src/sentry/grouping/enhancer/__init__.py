@@ -2,15 +2,18 @@ from __future__ import annotations
 
 import base64
 import os
+import threading
 import zlib
 
 import msgpack
 import sentry_sdk
+from cachetools import LRUCache
 from parsimonious.exceptions import ParseError
 from parsimonious.grammar import Grammar, NodeVisitor
 
 from sentry import projectoptions
 from sentry.grouping.component import GroupingComponent
+from sentry.utils import metrics
 from sentry.utils.strings import unescape_string
 
 from .actions import Action, FlagAction, VarAction
@@ -19,6 +22,7 @@ from .matchers import (
     CalleeMatch,
     CallerMatch,
     ExceptionFieldMatch,
+    FamilyMatch,
     FrameMatch,
     Match,
     create_match_frame,
@@ -73,6 +77,13 @@ _        = space*
 VERSIONS = [1, 2]
 LATEST_VERSION = VERSIONS[-1]
 
+# Maximum number of loaded enhancements kept around, keyed by their
+# serialized form (i.e. per grouping config and project enhancements)
+LOADED_ENHANCEMENTS_CACHE_SIZE = 1000
+
+_loaded_enhancements: LRUCache = LRUCache(maxsize=LOADED_ENHANCEMENTS_CACHE_SIZE)
+_loaded_enhancements_lock = threading.Lock()
+
 
 class StacktraceState:
     def __init__(self):
@@ -124,6 +135,24 @@ class Enhancements:
             if updater_rule := rule._as_updater_rule():
                 self._updater_rules.append(updater_rule)
 
+        # Rules applicable to stacktraces containing a given set of frame
+        # families, keyed by `(rules, families)`. See `_get_rules_for_frames`.
+        self._rules_by_families = {}
+
+    def _get_rules_for_frames(self, rules_attr, match_frames):
+        """Returns the rules of ``rules_attr`` that can match at least one of
+        the given frames, skipping rules restricted to other families (e.g.
+        native rules for a JavaScript stacktrace).
+        """
+        families = frozenset(frame["family"] for frame in match_frames)
+        key = (rules_attr, families)
+        rules = self._rules_by_families.get(key)
+        if rules is None:
+            rules = self._rules_by_families[key] = [
+                rule for rule in getattr(self, rules_attr) if rule._may_match_families(families)
+            ]
+        return rules
+
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
@@ -137,7 +166,7 @@ class Enhancements:
             op="stacktrace_processing",
             description="apply_rules_to_frames",
         ):
-            for rule in self._modifier_rules:
+            for rule in self._get_rules_for_frames("_modifier_rules", match_frames):
                 for idx, action in rule.get_matching_frame_actions(
                     match_frames, platform, exception_data, cache
                 ):
@@ -151,7 +180,7 @@ class Enhancements:
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
+        for rule in self._get_rules_for_frames("_updater_rules", match_frames):
 
             for idx, action in rule.get_matching_frame_actions(
                 match_frames, platform, exception_data, cache
@@ -261,8 +290,29 @@ class Enhancements:
 
     @classmethod
     def loads(cls, data):
+        """Loads enhancements from their serialized form.
+
+        Every event carries the serialized enhancements of its grouping
+        config, so loaded enhancements are cached and shared. They must not
+        be modified.
+        """
         if isinstance(data, str):
             data = data.encode("ascii", "ignore")
+
+        with _loaded_enhancements_lock:
+            rv = _loaded_enhancements.get(data)
+        if rv is not None:
+            metrics.incr("grouping.enhancer.loads.cache", tags={"result": "hit"}, sample_rate=0.1)
+            return rv
+
+        metrics.incr("grouping.enhancer.loads.cache", tags={"result": "miss"}, sample_rate=0.1)
+        rv = cls._loads(data)
+        with _loaded_enhancements_lock:
+            _loaded_enhancements[data] = rv
+        return rv
+
+    @classmethod
+    def _loads(cls, data):
         padded = data + b"=" * (4 - (len(data) % 4))
         try:
             return cls._from_config_structure(
@@ -297,6 +347,15 @@ class Rule:
             else:
                 self._other_matchers.append(matcher)
 
+        # The frame families this rule is restricted to, if any
+        self._families = None
+        for matcher in self._other_matchers:
+            if isinstance(matcher, FamilyMatch) and matcher.families is not None:
+                if self._families is None:
+                    self._families = matcher.families
+                else:
+                    self._families &= matcher.families
+
         self.actions = actions
         self._is_updater = any(action.is_updater for action in actions)
         self._is_modifier = any(action.is_modifier for action in actions)
@@ -308,6 +367,11 @@ class Rule:
             rv = f"{rv} {action}"
         return rv
 
+    def _may_match_families(self, families):
+        if not self.matchers:
+            return False
+        return self._families is None or not self._families.isdisjoint(families)
+
     def _as_modifier_rule(self) -> Rule | None:
         actions = [action for action in self.actions if action.is_modifier]
         if actions:
@@ -1,4 +1,7 @@
-from typing import Optional
+import threading
+from typing import Any, Optional
+
+from cachetools import LRUCache
 
 from sentry.grouping.utils import get_rule_bool
 from sentry.stacktraces.functions import get_function_name_for_frame
@@ -51,6 +54,41 @@ MATCHERS = {
 }
 
 
+# Maximum number of frame matcher results shared across events
+FRAME_MATCH_CACHE_SIZE = 50000
+
+
+class FrameMatchCache:
+    """
+    A bounded, thread safe cache of frame matcher results, shared by all
+    events processed in this process.
+
+    The same frames show up in event after event, and with the base
+    enhancement configs every frame is matched against hundreds of glob
+    patterns. Results only depend on the pattern and the frame value, so
+    they are kept around across events rather than per stacktrace.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+frame_match_cache = FrameMatchCache(FRAME_MATCH_CACHE_SIZE)
+
+
 def _get_function_name(frame_data: dict, platform: Optional[str]):
 
     function_name = get_function_name_for_frame(frame_data, platform)
@@ -207,7 +245,7 @@ class PathLikeMatch(FrameMatch):
         if value is None:
             return False
 
-        return cached(cache, path_like_match, self._encoded_pattern, value)
+        return cached(frame_match_cache, path_like_match, self._encoded_pattern, value)
 
 
 class PackageMatch(PathLikeMatch):
@@ -225,6 +263,13 @@ class FamilyMatch(FrameMatch):
         super().__init__(*args, **kwargs)
         self._flags = set(self._encoded_pattern.split(b","))
 
+    @property
+    def families(self):
+        """The families of frames this matcher can match, `None` for all."""
+        if self.negated or b"all" in self._flags:
+            return None
+        return frozenset(self._flags)
+
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
         if b"all" in self._flags:
             return True
@@ -250,7 +295,7 @@ class FrameFieldMatch(FrameMatch):
         if field == self._encoded_pattern:
             return True
 
-        return cached(cache, glob_match, field, self._encoded_pattern)
+        return cached(frame_match_cache, glob_match, field, self._encoded_pattern)
 
 
 class FunctionMatch(FrameFieldMatch):
@@ -0,0 +1,248 @@
+"""
+In-process cache of grouping results.
+
+Most events of a noisy issue have the exact same stack trace, yet the grouping
+components of every event are built from scratch. The hashes of an event only
+depend on the grouping config, the fingerprint and a handful of interfaces, so
+they are cached under a hash of exactly those inputs, taken after stacktrace
+normalization and server side fingerprinting ran.
+
+Every input of grouping is part of the key, including the enhancements of the
+grouping config (which carry the project's stack trace rules), so a change to
+the grouping settings of a project never serves a stale result: it simply
+results in new keys. Frame attributes which grouping never looks at (local
+variables and surrounding source lines) are left out of the key, as they
+differ between otherwise identical events.
+
+A fraction of cache hits (`store.grouping-result-cache-verify-sample-rate`)
+is recalculated and compared to the cached result.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Mapping, Optional
+
+from cachetools import LRUCache
+from django.conf import settings
+
+from sentry import options
+from sentry.grouping.result import CalculatedHashes
+from sentry.grouping.utils import resolve_fingerprint_values
+from sentry.utils import metrics
+from sentry.utils.hashlib import hash_values
+
+if TYPE_CHECKING:
+    from sentry.eventstore.models import BaseEvent
+
+logger = logging.getLogger(__name__)
+
+# Bump when grouping starts looking at other parts of the event.
+CACHE_VERSION = 1
+
+# Interfaces grouping strategies are run on.
+GROUPING_INTERFACES = (
+    "exception",
+    "threads",
+    "stacktrace",
+    "logentry",
+    "template",
+    "csp",
+    "hpkp",
+    "expectct",
+    "expectstaple",
+)
+
+# Frame attributes which never influence grouping.
+_IGNORED_FRAME_KEYS = frozenset(["vars", "pre_context", "post_context"])
+
+_cache: Optional[GroupingResultCache] = None
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CachedGroupingResult:
+    hashes: CalculatedHashes
+    # Written into the event data by the exception grouping strategy.
+    main_exception_id: Optional[int]
+
+
+def _strip_stacktrace(stacktrace: Any) -> Any:
+    if not isinstance(stacktrace, dict) or not isinstance(stacktrace.get("frames"), list):
+        return stacktrace
+    rv = dict(stacktrace)
+    rv["frames"] = [
+        {k: v for k, v in frame.items() if k not in _IGNORED_FRAME_KEYS}
+        if isinstance(frame, dict)
+        else frame
+        for frame in stacktrace["frames"]
+    ]
+    return rv
+
+
+def _strip_values(container: Any) -> Any:
+    """Strip the stack traces of exceptions or threads."""
+    if not isinstance(container, dict) or not isinstance(container.get("values"), list):
+        return container
+    rv = dict(container)
+    rv["values"] = []
+    for value in container["values"]:
+        if isinstance(value, dict):
+            value = dict(value)
+            # Grouping only ever looks at the symbolicated stack trace.
+            value.pop("raw_stacktrace", None)
+            if "stacktrace" in value:
+                value["stacktrace"] = _strip_stacktrace(value["stacktrace"])
+        rv["values"].append(value)
+    return rv
+
+
+def get_grouping_cache_key(
+    event_data: Mapping[str, Any], grouping_config: Mapping[str, Any]
+) -> Optional[str]:
+    """
+    Return the cache key of the grouping result of an event, or `None` if the
+    result of the event can't be cached.
+    """
+    fingerprint = event_data.get("fingerprint") or ["{{ default }}"]
+    interfaces = {}
+    for name in GROUPING_INTERFACES:
+        value = event_data.get(name)
+        if value is None:
+            continue
+        if name in ("exception", "threads"):
+            value = _strip_values(value)
+        elif name == "stacktrace":
+            value = _strip_stacktrace(value)
+        interfaces[name] = value
+
+    try:
+        return hash_values(
+            [
+                dict(grouping_config),
+                event_data.get("platform"),
+                event_data.get("checksum"),
+                # Fingerprint variables can refer to anything, e.g. tags.
+                resolve_fingerprint_values(list(fingerprint), event_data),
+                event_data.get("_fingerprint_info"),
+                interfaces,
+            ],
+            seed=f"grouping-result:{CACHE_VERSION}",
+        )
+    except TypeError:
+        # Values which can't be hashed, e.g. floats in frame data
+        return None
+
+
+def _same_hashes(a: CalculatedHashes, b: CalculatedHashes) -> bool:
+    return (
+        list(a.hashes) == list(b.hashes)
+        and list(a.hierarchical_hashes) == list(b.hierarchical_hashes)
+        and list(a.tree_labels) == list(b.tree_labels)
+    )
+
+
+class GroupingResultCache:
+    """
+    A bounded LRU of grouping results, shared by all threads of a process.
+
+    Results are copied in and out of the cache, as callers write the hashes
+    and tree labels into event payloads which may be modified afterwards.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._results: LRUCache[str, CachedGroupingResult] = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: str) -> Optional[CachedGroupingResult]:
+        with self._lock:
+            result = self._results.get(key)
+        return deepcopy(result) if result is not None else None
+
+    def set(self, key: str, result: CachedGroupingResult) -> None:
+        result = deepcopy(result)
+        with self._lock:
+            self._results[key] = result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    def get_hashes(
+        self, event: BaseEvent, grouping_config: Mapping[str, Any], metric_tags: Mapping[str, str]
+    ) -> CalculatedHashes:
+        """
+        Return the hashes of `event` with the given config, like
+        `event.get_hashes(grouping_config)` does.
+        """
+        key = get_grouping_cache_key(event.data, grouping_config)
+        if key is None:
+            cached, result = None, "skip"
+        else:
+            cached = self.get(key)
+            result = "hit" if cached is not None else "miss"
+        metrics.incr(
+            "grouping.result_cache.get", tags={**metric_tags, "result": result}, sample_rate=0.1
+        )
+
+        if cached is not None:
+            if random.random() >= options.get("store.grouping-result-cache-verify-sample-rate"):
+                if cached.main_exception_id is not None:
+                    event.data["main_exception_id"] = cached.main_exception_id
+                return cached.hashes
+
+        main_exception_id = event.data.get("main_exception_id")
+        hashes = event.get_hashes(grouping_config)
+        if key is None:
+            return hashes
+
+        if cached is not None:
+            matches = _same_hashes(cached.hashes, hashes)
+            metrics.incr(
+                "grouping.result_cache.verify",
+                tags={**metric_tags, "result": "match" if matches else "mismatch"},
+            )
+            if not matches:
+                logger.error(
+                    "grouping.result_cache.mismatch",
+                    extra={
+                        "event_id": event.event_id,
+                        "project_id": event.project_id,
+                        "cache_key": key,
+                    },
+                )
+
+        # An id left over from an earlier grouping run can't be told apart
+        # from one written now, so those results are not cached.
+        if main_exception_id is None:
+            self.set(
+                key,
+                CachedGroupingResult(
+                    hashes=hashes, main_exception_id=event.data.get("main_exception_id")
+                ),
+            )
+        return hashes
+
+
+def get_grouping_result_cache() -> Optional[GroupingResultCache]:
+    """
+    Return the grouping result cache of this process, or `None` when disabled
+    through `SENTRY_GROUPING_RESULT_CACHE_SIZE`.
+    """
+    global _cache
+
+    maxsize = settings.SENTRY_GROUPING_RESULT_CACHE_SIZE
+    if not maxsize:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = GroupingResultCache(maxsize)
+    return _cache
@@ -13,10 +13,12 @@ from arroyo.processing.strategies import (
     ProcessingStrategyFactory,
     RunTask,
 )
+from arroyo.processing.strategies.batching import BatchStep
 from arroyo.types import Commit, Partition
 from django.conf import settings
 
-from sentry.ingest.consumer_v2.ingest import process_ingest_message
+from sentry import options
+from sentry.ingest.consumer_v2.ingest import process_ingest_batch, process_ingest_message
 from sentry.ingest.types import ConsumerType
 from sentry.processing.backpressure.arroyo import HealthChecker, create_backpressure_step
 from sentry.utils import kafka_config
@@ -47,26 +49,43 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         partitions: Mapping[Partition, int],
     ) -> ProcessingStrategy[KafkaPayload]:
 
+        # Events and transactions can optionally be processed a Kafka batch at
+        # a time, see `process_ingest_batch`.
+        batched = self.consumer_type != ConsumerType.Attachments and options.get(
+            "store.ingest-consumer-batch-events"
+        )
+        function = process_ingest_batch if batched else process_ingest_message
+
+        next_step: ProcessingStrategy[Any]
         # The attachments consumer that is used for multiple message types needs
         # ordering guarantees: Attachments have to be written before the event using
         # them is being processed. We will use a simple serial `RunTask` for those
         # for now.
         if self.num_processes > 1 and self.consumer_type != ConsumerType.Attachments:
             next_step = RunTaskWithMultiprocessing(
-                function=process_ingest_message,
+                function=function,
                 next_step=CommitOffsets(commit),
                 num_processes=self.num_processes,
-                max_batch_size=self.max_batch_size,
+                # Batches are already made up of many messages, so they are
+                # handed to the processes one by one.
+                max_batch_size=1 if batched else self.max_batch_size,
                 max_batch_time=self.max_batch_time,
                 input_block_size=self.input_block_size,
                 output_block_size=self.output_block_size,
             )
         else:
             next_step = RunTask(
-                function=process_ingest_message,
+                function=function,
                 next_step=CommitOffsets(commit),
             )
 
+        if batched:
+            next_step = BatchStep(
+                max_batch_size=self.max_batch_size,
+                max_batch_time=self.max_batch_time,
+                next_step=next_step,
+            )
+
         return create_backpressure_step(health_checker=self.health_checker, next_step=next_step)
 
 
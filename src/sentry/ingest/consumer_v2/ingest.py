@@ -1,13 +1,16 @@
 import logging
+from typing import List, MutableMapping, Optional, Tuple
 
 import msgpack
 from arroyo.backends.kafka.consumer import KafkaPayload
+from arroyo.processing.strategies.batching import ValuesBatch
 from arroyo.types import Message
 
 from sentry.ingest.ingest_consumer import (
     IngestMessage,
     process_attachment_chunk,
     process_event,
+    process_event_batch,
     process_individual_attachment,
     process_userreport,
 )
@@ -60,3 +63,37 @@ def process_ingest_message(raw_message: Message[KafkaPayload]) -> None:
         process_userreport(message, project)
     else:
         raise ValueError(f"Unknown message type: {message_type}")
+
+
+def process_ingest_batch(raw_message: Message[ValuesBatch[KafkaPayload]]) -> None:
+    """
+    Processes a batch of Kafka Messages.
+
+    Events are handed to `process_event_batch` together, all other message
+    types are processed one by one like in `process_ingest_message`. Projects
+    are only fetched once per batch.
+    """
+    projects: MutableMapping[int, Optional[Project]] = {}
+    events: List[Tuple[IngestMessage, Project]] = []
+
+    for value in raw_message.payload:
+        message: IngestMessage = msgpack.unpackb(value.payload.value, use_list=False)
+        if message["type"] != "event":
+            process_ingest_message(Message(value))
+            continue
+
+        project_id = message["project_id"]
+        if project_id not in projects:
+            try:
+                with metrics.timer("ingest_consumer.fetch_project"):
+                    projects[project_id] = Project.objects.get_from_cache(id=project_id)
+            except Project.DoesNotExist:
+                logger.error("Project for ingested event does not exist: %s", project_id)
+                projects[project_id] = None
+
+        project = projects[project_id]
+        if project is not None:
+            events.append((message, project))
+
+    if events:
+        process_event_batch(events)
@@ -1,7 +1,7 @@
 import functools
 import logging
 import random
-from typing import Any, Mapping
+from typing import Any, Mapping, Optional, Sequence, Tuple
 
 import sentry_sdk
 from django.conf import settings
@@ -44,25 +44,24 @@ def trace_func(**span_kwargs):
     return wrapper
 
 
+def _get_deduplication_key(message: IngestMessage) -> str:
+    return f"ev:{int(message['project_id'])}:{message['event_id']}"
+
+
+def _log_duplicate_event(message: IngestMessage) -> None:
+    logger.warning(
+        "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
+        message["event_id"],
+        int(message["project_id"]),
+    )
+
+
 @trace_func(name="ingest_consumer.process_event")
 @metrics.wraps("ingest_consumer.process_event")
 def process_event(message: IngestMessage, project: Project) -> None:
     """
     Perform some initial filtering and deserialize the message payload.
     """
-    payload = message["payload"]
-    start_time = float(message["start_time"])
-    event_id = message["event_id"]
-    project_id = int(message["project_id"])
-    remote_addr = message.get("remote_addr")
-    attachments = message.get("attachments") or ()
-
-    sentry_sdk.set_extra("event_id", event_id)
-    sentry_sdk.set_extra("len_attachments", len(attachments))
-
-    if project_id == settings.SENTRY_PROJECT:
-        metrics.incr("internal.captured.ingest_consumer.unparsed")
-
     # check that we haven't already processed this event (a previous instance of the forwarder
     # died before it could commit the event queue offset)
     #
@@ -77,15 +76,82 @@ def process_event(message: IngestMessage, project: Project) -> None:
     # This code has been ripped from the old python store endpoint. We're
     # keeping it around because it does provide some protection against
     # reprocessing good events if a single consumer is in a restart loop.
-    deduplication_key = f"ev:{project_id}:{event_id}"
+    deduplication_key = _get_deduplication_key(message)
     if cache.get(deduplication_key) is not None:
-        logger.warning(
-            "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
-            event_id,
-            project_id,
-        )
+        _log_duplicate_event(message)
         return  # message already processed do not reprocess
 
+    if _process_event(message, project):
+        # remember for an 1 hour that we saved this event (deduplication protection)
+        cache.set(deduplication_key, "", CACHE_TIMEOUT)
+
+
+@trace_func(name="ingest_consumer.process_event_batch")
+@metrics.wraps("ingest_consumer.process_event_batch")
+def process_event_batch(messages: Sequence[Tuple[IngestMessage, Project]]) -> None:
+    """
+    Process the events of a Kafka batch.
+
+    This behaves like calling `process_event` for every message, but checks
+    and marks events as processed for the whole batch in one cache roundtrip
+    each. An event which fails to process does not prevent the others from
+    being processed: the first error is raised once the whole batch is done,
+    so that the batch is retried, and the events which did make it through
+    are skipped by deduplication on retry.
+    """
+    deduplication_keys = [_get_deduplication_key(message) for message, _ in messages]
+    seen = set(cache.get_many(deduplication_keys))
+    processed = set()
+    duplicates = 0
+    error: Optional[Exception] = None
+
+    for (message, project), deduplication_key in zip(messages, deduplication_keys):
+        if deduplication_key in seen or deduplication_key in processed:
+            _log_duplicate_event(message)
+            duplicates += 1
+            continue
+
+        try:
+            if _process_event(message, project):
+                processed.add(deduplication_key)
+        except Exception as e:
+            metrics.incr("ingest_consumer.process_event_batch.error")
+            logger.exception(
+                "ingest_consumer.process_event_batch.error",
+                extra={"event_id": message["event_id"], "project_id": project.id},
+            )
+            if error is None:
+                error = e
+
+    if processed:
+        # remember for an 1 hour that we saved these events (deduplication protection)
+        cache.set_many(dict.fromkeys(processed, ""), CACHE_TIMEOUT)
+
+    metrics.timing("ingest_consumer.process_event_batch.size", len(messages))
+    metrics.incr("ingest_consumer.process_event_batch.duplicate", duplicates)
+
+    if error is not None:
+        raise error
+
+
+def _process_event(message: IngestMessage, project: Project) -> bool:
+    """
+    Parse an event which has not been processed yet and pass it on to
+    processing. Returns `False` if the event was dropped by load shedding.
+    """
+    payload = message["payload"]
+    start_time = float(message["start_time"])
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
+    remote_addr = message.get("remote_addr")
+    attachments = message.get("attachments") or ()
+
+    sentry_sdk.set_extra("event_id", event_id)
+    sentry_sdk.set_extra("len_attachments", len(attachments))
+
+    if project_id == settings.SENTRY_PROJECT:
+        metrics.incr("internal.captured.ingest_consumer.unparsed")
+
     if killswitch_matches_context(
         "store.load-shed-pipeline-projects",
         {
@@ -96,7 +162,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
     ):
         # This killswitch is for the worst of scenarios and should probably not
         # cause additional load on our logging infrastructure
-        return
+        return False
 
     # Parse the JSON payload. This is required to compute the cache key and
     # call process_event. The payload will be put into Kafka raw, to avoid
@@ -121,7 +187,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
             "event_id": event_id,
         },
     ):
-        return
+        return False
 
     with metrics.timer("ingest_consumer._store_event"):
         cache_key = event_processing_store.store(data)
@@ -159,11 +225,9 @@ def process_event(message: IngestMessage, project: Project) -> None:
                 has_attachments=bool(attachments),
             )
 
-    # remember for an 1 hour that we saved this event (deduplication protection)
-    cache.set(deduplication_key, "", CACHE_TIMEOUT)
-
     # emit event_accepted once everything is done
     event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
+    return True
 
 
 @trace_func(name="ingest_consumer.process_attachment_chunk")
@@ -1,8 +1,18 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from django.conf import settings
 from symbolic import SourceView
 
+from sentry.utils import metrics
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "LocalProcessingCache", "get_local_processing_cache"]
+
+_local_processing_cache: Optional["LocalProcessingCache"] = None
+_local_processing_cache_lock = threading.Lock()
 
 
 def is_utf8(codec):
@@ -90,3 +100,93 @@ class SourceMapCache:
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class LocalProcessingCache:
+    """
+    A bounded, in-process LRU cache of parsed sourcemaps and artifact bundles.
+
+    Unlike the caches above which live for a single event, this one is shared
+    by all events processed by a process, so that the same (large) sourcemaps
+    are not fetched and parsed again for every event of a release.
+
+    Values are opaque, their size in bytes has to be given when they are added
+    and the cache is bounded by the total size of its values. Entries expire
+    after `ttl` seconds.
+    """
+
+    def __init__(
+        self, max_bytes: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        assert max_bytes > 0
+        assert ttl > 0
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self.clock():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        metrics.incr(
+            "sourcemaps.local_cache.get",
+            tags={"result": "hit" if entry is not None else "miss"},
+            sample_rate=0.1,
+        )
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+
+        evicted = 0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, self.clock() + self.ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+
+        if evicted:
+            metrics.incr("sourcemaps.local_cache.evicted", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+def get_local_processing_cache() -> Optional[LocalProcessingCache]:
+    """
+    Return the cache shared by all events processed by this process, or `None`
+    when disabled through `SENTRY_SOURCEMAP_LOCAL_CACHE_SIZE`.
+    """
+    global _local_processing_cache
+
+    max_bytes = settings.SENTRY_SOURCEMAP_LOCAL_CACHE_SIZE
+    if not max_bytes:
+        return None
+
+    with _local_processing_cache_lock:
+        if _local_processing_cache is None:
+            _local_processing_cache = LocalProcessingCache(
+                max_bytes=max_bytes, ttl=settings.SENTRY_SOURCEMAP_LOCAL_CACHE_TTL
+            )
+    return _local_processing_cache
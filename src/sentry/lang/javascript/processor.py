@@ -24,6 +24,7 @@ from symbolic import SourceView
 
 from sentry import features, http, options
 from sentry.event_manager import set_tag
+from sentry.lang.javascript.cache import get_local_processing_cache
 from sentry.models import (
     NULL_STRING,
     ArtifactBundle,
@@ -779,9 +780,21 @@ class Fetcher:
         #
         # We want to index the cache by the id of the ArtifactBundle in the db which is different from the bundle_id
         # UUID field.
+        #
+        # The contents of an ArtifactBundle never change, so they are also kept in the process-wide cache, which
+        # saves transferring the entire bundle from memcached for every event.
+        local_cache = get_local_processing_cache()
+        local_cache_key = ("artifact_bundle", artifact_bundle.id)
+        if local_cache is not None:
+            result = local_cache.get(local_cache_key)
+            if result is not None:
+                return BytesIO(result)
+
         cache_key = get_artifact_bundle_cache_key(artifact_bundle.id)
         result = cache.get(cache_key)
         if result:
+            if local_cache is not None:
+                local_cache.set(local_cache_key, result, len(result))
             return BytesIO(result)
 
         # We didn't find the bundle in the cache, thus we want to fetch it.
@@ -798,6 +811,8 @@ class Fetcher:
         with sentry_sdk.start_span(op="_fetch_artifact_bundle_file.write_to_cache") as span:
             span.set_data("file_size", len(contents))
             cache.set(cache_key, contents, 3600)
+        if local_cache is not None:
+            local_cache.set(local_cache_key, contents, len(contents))
 
         artifact_bundle_file.seek(0)
         return artifact_bundle_file
@@ -1980,7 +1995,20 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             self.debug_id_sourcemap_cache[debug_id] = sourcemap_cache
             return sourcemap_cache
 
+    def _get_local_sourcemap_cache_key(self, *parts):
+        return ("sourcemap", self.organization.id, self.project.id, *parts)
+
     def _fetch_sourcemap_cache_by_debug_id(self, debug_id, minified_sourceview):
+        # Debug ids identify the contents of the sourcemap, so we can reuse the one parsed for a previous event.
+        local_cache = get_local_processing_cache()
+        local_cache_key = self._get_local_sourcemap_cache_key("debug_id", debug_id)
+        if local_cache is not None:
+            cached = local_cache.get(local_cache_key)
+            if cached is not None:
+                sourcemap_url, sourcemap_cache = cached
+                self.sourcemap_debug_id_to_sourcemap_url[debug_id] = sourcemap_url
+                return sourcemap_cache
+
         result = self.fetcher.fetch_by_debug_id(debug_id, SourceFileType.SOURCE_MAP)
         if result is not None:
             try:
@@ -1989,15 +2017,22 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 ):
                     # We want to keep track of the sourcemap url of the sourcemap resolved with this specific debug id.
                     self.sourcemap_debug_id_to_sourcemap_url[debug_id] = result.url
+                    source = minified_sourceview.get_source().encode("utf-8")
                     # This is an expensive operation that should be executed as few times as possible.
-                    return SmCache.from_bytes(
-                        minified_sourceview.get_source().encode("utf-8"), result.body
-                    )
+                    sourcemap_cache = SmCache.from_bytes(source, result.body)
             except Exception as exc:
                 # This is in debug because the product shows an error already.
                 logger.debug(str(exc), exc_info=True)
                 raise UnparseableSourcemap({"debug_id": result.url})
 
+            if local_cache is not None:
+                local_cache.set(
+                    local_cache_key,
+                    (result.url, sourcemap_cache),
+                    len(source) + len(result.body),
+                )
+            return sourcemap_cache
+
         return None
 
     def _handle_url_sourcemap_lookup(self, url, use_url_new=False):
@@ -2052,6 +2087,20 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             return sourcemap_cache
 
     def _fetch_sourcemap_cache_by_url(self, url, source=b"", use_url_new=False):
+        # Sourcemaps found by url are reused for the same url and minified source within the same release and dist.
+        local_cache = get_local_processing_cache()
+        if local_cache is not None:
+            local_cache_key = self._get_local_sourcemap_cache_key(
+                self.fetcher.release.id if self.fetcher.release else None,
+                self.fetcher.dist.id if self.fetcher.dist else None,
+                use_url_new,
+                md5_text(url).hexdigest(),
+                md5_text(source).hexdigest(),
+            )
+            sourcemap_cache = local_cache.get(local_cache_key)
+            if sourcemap_cache is not None:
+                return sourcemap_cache
+
         if is_data_uri(url):
             try:
                 body = base64.b64decode(
@@ -2093,12 +2142,16 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.fetch_sourcemap_view_by_url.SmCache.from_bytes"
             ):
                 # This is an expensive operation that should be executed as few times as possible.
-                return SmCache.from_bytes(source, body)
+                sourcemap_cache = SmCache.from_bytes(source, body)
         except Exception as exc:
             # This is in debug because the product shows an error already.
             logger.debug(str(exc), exc_info=True)
             raise UnparseableSourcemap({"url": http.expose_url(url)})
 
+        if local_cache is not None:
+            local_cache.set(local_cache_key, sourcemap_cache, len(source) + len(body))
+        return sourcemap_cache
+
     def populate_source_cache(self, frames):
         """
         Fetch all sources that we know are required (being referenced directly
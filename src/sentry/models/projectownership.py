@@ -11,7 +11,7 @@ from sentry.db.models.fields import FlexibleForeignKey, JSONField
 from sentry.models import Activity, ActorTuple
 from sentry.models.groupowner import OwnerRuleType
 from sentry.models.project import Project
-from sentry.ownership.grammar import Rule, load_schema, resolve_actors
+from sentry.ownership.grammar import Rule, compile_schema, resolve_actors
 from sentry.types.activity import ActivityType
 from sentry.utils import metrics
 from sentry.utils.cache import cache
@@ -337,14 +337,10 @@ class ProjectOwnership(Model):
         ownership: Union["ProjectOwnership", "ProjectCodeOwners"],
         data: Mapping[str, Any],
     ) -> Sequence["Rule"]:
-        rules = []
+        if ownership.schema is None:
+            return []
 
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
-
-        return rules
+        return compile_schema(ownership.schema).test(data)
 
 
 def process_resource_change(instance, change, **kwargs):
@@ -1,11 +1,12 @@
 import datetime
 import logging
 import uuid
-from typing import Dict, Mapping, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 import msgpack
 from arroyo.backends.kafka.consumer import KafkaPayload
 from arroyo.processing.strategies.abstract import ProcessingStrategy, ProcessingStrategyFactory
+from arroyo.processing.strategies.batching import BatchStep, ValuesBatch
 from arroyo.processing.strategies.commit import CommitOffsets
 from arroyo.processing.strategies.run_task import RunTask
 from arroyo.types import Commit, Message, Partition
@@ -43,20 +44,107 @@ CHECKIN_QUOTA_LIMIT = 5
 CHECKIN_QUOTA_WINDOW = 60
 
 
-def _ensure_monitor_with_config(
-    project: Project,
-    monitor_slug: str,
-    monitor_slug_from_param: str,
-    config: Optional[Dict],
-):
+class MonitorLookup:
+    """
+    Monitors and monitor environments of a batch of check-ins, resolved with a
+    couple of queries for the whole batch.
+
+    Monitors are looked up by slug: a slug which was part of the batch query
+    but has no monitor does not have one. Monitors and environments created
+    while processing the batch are added to the lookup.
+    """
+
+    def __init__(self, projects: Sequence[Project], keys: Iterable[Tuple[int, str, str]]) -> None:
+        """`keys` are the project id, monitor slug and environment name of each check-in."""
+        keys = set(keys)
+        organization_ids = {project.id: project.organization_id for project in projects}
+        self.slugs = {
+            (project_id, slug) for project_id, slug, _ in keys if project_id in organization_ids
+        }
+        self.monitors: Dict[Tuple[int, str], Monitor] = {}
+        self.monitor_environments: Dict[Tuple[int, str], MonitorEnvironment] = {}
+        if not self.slugs:
+            return
+
+        for monitor in Monitor.objects.filter(
+            project_id__in={project_id for project_id, _ in self.slugs},
+            slug__in={slug for _, slug in self.slugs},
+        ):
+            key = (monitor.project_id, monitor.slug)
+            if key in self.slugs and monitor.organization_id == organization_ids[key[0]]:
+                self.monitors[key] = monitor
+
+        if not self.monitors:
+            return
+
+        monitors_by_id = {monitor.id: monitor for monitor in self.monitors.values()}
+        for monitor_environment in MonitorEnvironment.objects.filter(
+            monitor_id__in=monitors_by_id,
+            environment__name__in={environment for _, _, environment in keys},
+        ).select_related("environment"):
+            # Share the monitor, so that config updates are seen by its environments.
+            monitor_environment.monitor = monitors_by_id[monitor_environment.monitor_id]
+            self.monitor_environments[
+                (monitor_environment.monitor_id, monitor_environment.environment.name)
+            ] = monitor_environment
+
+    def forget(self, project_id: int, monitor_slug: str) -> None:
+        """
+        Look a monitor and its environments up in the database again, e.g.
+        after a transaction which may have created or updated them failed.
+        """
+        self.slugs.discard((project_id, monitor_slug))
+        monitor = self.monitors.pop((project_id, monitor_slug), None)
+        if monitor is not None:
+            for key in [key for key in self.monitor_environments if key[0] == monitor.id]:
+                del self.monitor_environments[key]
+
+    def get_monitor(self, project: Project, monitor_slug: str) -> Optional[Monitor]:
+        key = (project.id, monitor_slug)
+        if key in self.slugs:
+            return self.monitors.get(key)
+        return _get_monitor(project, monitor_slug)
+
+    def ensure_environment(
+        self, project: Project, monitor: Monitor, environment_name: str
+    ) -> MonitorEnvironment:
+        key = (monitor.id, environment_name)
+        monitor_environment = self.monitor_environments.get(key)
+        if monitor_environment is None:
+            monitor_environment = MonitorEnvironment.objects.ensure_environment(
+                project, monitor, environment_name
+            )
+            monitor_environment.monitor = monitor
+            self.monitor_environments[key] = monitor_environment
+        return monitor_environment
+
+
+def _get_monitor_slug(params: Mapping[str, Any]) -> str:
+    # Ensure the monitor_slug is slugified, since we are not running this
+    # through the MonitorValidator we must do this here.
+    return slugify(params["monitor_slug"])[:MAX_SLUG_LENGTH].strip("-")
+
+
+def _get_monitor(project: Project, monitor_slug: str) -> Optional[Monitor]:
     try:
-        monitor = Monitor.objects.get(
+        return Monitor.objects.get(
             slug=monitor_slug,
             project_id=project.id,
             organization_id=project.organization_id,
         )
     except Monitor.DoesNotExist:
-        monitor = None
+        return None
+
+
+def _ensure_monitor_with_config(
+    project: Project,
+    monitor_slug: str,
+    monitor_slug_from_param: str,
+    config: Optional[Dict],
+    lookup: Optional[MonitorLookup] = None,
+):
+    get_monitor = lookup.get_monitor if lookup is not None else _get_monitor
+    monitor = get_monitor(project, monitor_slug)
 
     # XXX(epurkhiser): Temporary dual-read logic to handle some monitors
     # that were created before we correctly slugified slugs on upsert in
@@ -64,14 +152,7 @@ def _ensure_monitor_with_config(
     #
     # Once all slugs are correctly slugified we can remove this.
     if not monitor:
-        try:
-            monitor = Monitor.objects.get(
-                slug=monitor_slug_from_param,
-                project_id=project.id,
-                organization_id=project.organization_id,
-            )
-        except Monitor.DoesNotExist:
-            pass
+        monitor = get_monitor(project, monitor_slug_from_param)
 
     if not config:
         return monitor
@@ -99,6 +180,8 @@ def _ensure_monitor_with_config(
             },
         )
         signal_first_monitor_created(project, None, True)
+        if lookup is not None:
+            lookup.monitors[(project.id, monitor_slug)] = monitor
 
     # Update existing monitor
     if monitor and not created and monitor.config != validated_config:
@@ -107,18 +190,19 @@ def _ensure_monitor_with_config(
     return monitor
 
 
-def _process_message(wrapper: Dict) -> None:
+def _process_message(
+    wrapper: Dict, project: Optional[Project] = None, lookup: Optional[MonitorLookup] = None
+) -> None:
     params = json.loads(wrapper["payload"])
     start_time = to_datetime(float(wrapper["start_time"]))
     project_id = int(wrapper["project_id"])
     source_sdk = wrapper["sdk"]
 
-    # Ensure the monitor_slug is slugified, since we are not running this
-    # through the MonitorValidator we must do this here.
-    monitor_slug = slugify(params["monitor_slug"])[:MAX_SLUG_LENGTH].strip("-")
+    monitor_slug = _get_monitor_slug(params)
 
     environment = params.get("environment")
-    project = Project.objects.get_from_cache(id=project_id)
+    if project is None:
+        project = Project.objects.get_from_cache(id=project_id)
 
     ratelimit_key = f"{project.organization_id}:{monitor_slug}:{environment}"
 
@@ -224,6 +308,7 @@ def _process_message(wrapper: Dict) -> None:
                     monitor_slug,
                     params["monitor_slug"],
                     monitor_config,
+                    lookup,
                 )
 
                 if not monitor:
@@ -242,9 +327,14 @@ def _process_message(wrapper: Dict) -> None:
                 return
 
             try:
-                monitor_environment = MonitorEnvironment.objects.ensure_environment(
-                    project, monitor, environment
-                )
+                if lookup is not None:
+                    monitor_environment = lookup.ensure_environment(
+                        project, monitor, environment or "production"
+                    )
+                else:
+                    monitor_environment = MonitorEnvironment.objects.ensure_environment(
+                        project, monitor, environment
+                    )
             except MonitorEnvironmentLimitsExceeded:
                 metrics.incr(
                     "monitors.checkin.result",
@@ -339,9 +429,16 @@ def _process_message(wrapper: Dict) -> None:
                     return
 
             if check_in.status == CheckInStatus.ERROR:
-                monitor_environment.mark_failed(start_time)
+                updated = monitor_environment.mark_failed(start_time)
             else:
-                monitor_environment.mark_ok(check_in, start_time)
+                updated = monitor_environment.mark_ok(check_in, start_time)
+
+            if lookup is not None and not updated:
+                # The update was skipped for a newer check-in written
+                # elsewhere, which the next check-in of the batch has to see.
+                monitor_environment.refresh_from_db(
+                    fields=["status", "last_checkin", "next_checkin"]
+                )
 
             metrics.incr(
                 "monitors.checkin.result",
@@ -354,9 +451,66 @@ def _process_message(wrapper: Dict) -> None:
             tags={**metric_kwargs, "status": "error"},
         )
         logger.exception("Failed to process check-in", exc_info=True)
+        if lookup is not None:
+            # Changes made to the monitor by this check-in were rolled back.
+            lookup.forget(project_id, monitor_slug)
+            lookup.forget(project_id, params["monitor_slug"])
+
+
+def _process_batch(wrappers: Sequence[Dict]) -> None:
+    """
+    Process the check-ins of a batch of messages.
+
+    Projects, monitors and monitor environments are resolved for the whole
+    batch at once. Check-ins are processed grouped by monitor and environment,
+    in the order they were sent.
+    """
+    groups: Dict[Tuple[int, str, str], List[Dict]] = {}
+    # Legacy slugs which were not slugified are looked up as well, see
+    # `_ensure_monitor_with_config`.
+    legacy_keys = []
+    for wrapper in wrappers:
+        try:
+            params = json.loads(wrapper["payload"])
+            project_id = int(wrapper["project_id"])
+            monitor_slug = _get_monitor_slug(params)
+            environment = params.get("environment") or "production"
+        except Exception:
+            logger.exception("Failed to process message payload")
+            continue
+        groups.setdefault((project_id, monitor_slug, environment), []).append(wrapper)
+        if params["monitor_slug"] != monitor_slug:
+            legacy_keys.append((project_id, params["monitor_slug"], environment))
+
+    metrics.timing("monitors.checkin.batch_size", len(wrappers))
+    metrics.timing("monitors.checkin.batch_groups", len(groups))
+
+    projects = {
+        project.id: project
+        for project in Project.objects.get_many_from_cache({key[0] for key in groups})
+    }
+    lookup_keys = [*groups, *legacy_keys]
+    lookup = MonitorLookup(list(projects.values()), lookup_keys)
+
+    for (project_id, _, _), group in groups.items():
+        project = projects.get(project_id)
+        if project is None:
+            logger.info("monitor_checkin.project_missing", extra={"project_id": project_id})
+            continue
+        for wrapper in group:
+            try:
+                _process_message(wrapper, project=project, lookup=lookup)
+            except Exception:
+                logger.exception("Failed to process message payload")
 
 
 class StoreMonitorCheckInStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
+    def __init__(self, max_batch_size: Optional[int] = None, max_batch_time: int = 1) -> None:
+        # When a batch size is given, check-ins are processed a batch of
+        # messages at a time, see `_process_batch`.
+        self.max_batch_size = max_batch_size
+        self.max_batch_time = max_batch_time
+
     def create_with_partitions(
         self,
         commit: Commit,
@@ -369,7 +523,26 @@ class StoreMonitorCheckInStrategyFactory(ProcessingStrategyFactory[KafkaPayload]
             except Exception:
                 logger.exception("Failed to process message payload")
 
-        return RunTask(
-            function=process_message,
-            next_step=CommitOffsets(commit),
+        def process_batch(message: Message[ValuesBatch[KafkaPayload]]) -> None:
+            wrappers = []
+            for item in message.payload:
+                try:
+                    wrappers.append(msgpack.unpackb(item.payload.value))
+                except Exception:
+                    logger.exception("Failed to process message payload")
+            _process_batch(wrappers)
+
+        if not self.max_batch_size:
+            return RunTask(
+                function=process_message,
+                next_step=CommitOffsets(commit),
+            )
+
+        return BatchStep(
+            max_batch_size=self.max_batch_size,
+            max_batch_time=self.max_batch_time,
+            next_step=RunTask(
+                function=process_batch,
+                next_step=CommitOffsets(commit),
+            ),
         )
@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 import uuid
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
 
 import jsonschema
 import pytz
@@ -37,6 +37,7 @@ from sentry.issues.grouptype import (
 )
 from sentry.locks import locks
 from sentry.models import Environment, Organization, Rule, RuleSource, RuleStatus
+from sentry.monitors.schedule import schedule_on_commit
 from sentry.utils.retries import TimedRetryPolicy
 
 logger = logging.getLogger(__name__)
@@ -493,22 +494,27 @@ class MonitorEnvironment(Model):
         elif reason == MonitorFailure.DURATION:
             new_status = MonitorStatus.TIMEOUT
 
+        next_checkin = self.monitor.get_next_scheduled_checkin(next_checkin_base)
+        params = {
+            "next_checkin": next_checkin,
+            "status": new_status,
+            "last_checkin": last_checkin,
+        }
         affected = (
             type(self)
             .objects.filter(
                 Q(last_checkin__lte=last_checkin) | Q(last_checkin__isnull=True), id=self.id
             )
-            .update(
-                next_checkin=self.monitor.get_next_scheduled_checkin(next_checkin_base),
-                status=new_status,
-                last_checkin=last_checkin,
-            )
+            .update(**params)
         )
         if not affected:
             return False
 
+        schedule_on_commit(self.id, next_checkin)
+
         # Do not create event if monitor is disabled
         if self.monitor.status == ObjectStatus.DISABLED:
+            self._set_fields(params)
             return True
 
         current_timestamp = datetime.utcnow().replace(tzinfo=timezone.utc)
@@ -598,9 +604,12 @@ class MonitorEnvironment(Model):
             insert_data_to_database_legacy(data)
 
         monitor_environment_failed.send(monitor_environment=self, sender=type(self))
+        # The event is created with the state of the monitor environment from
+        # before the failure.
+        self._set_fields(params)
         return True
 
-    def mark_ok(self, checkin: MonitorCheckIn, ts: datetime):
+    def mark_ok(self, checkin: MonitorCheckIn, ts: datetime) -> bool:
         params = {
             "last_checkin": ts,
             "next_checkin": self.monitor.get_next_scheduled_checkin(ts),
@@ -608,7 +617,24 @@ class MonitorEnvironment(Model):
         if checkin.status == CheckInStatus.OK and self.monitor.status != ObjectStatus.DISABLED:
             params["status"] = MonitorStatus.OK
 
-        MonitorEnvironment.objects.filter(id=self.id).exclude(last_checkin__gt=ts).update(**params)
+        affected = (
+            MonitorEnvironment.objects.filter(id=self.id)
+            .exclude(last_checkin__gt=ts)
+            .update(**params)
+        )
+        if not affected:
+            return False
+
+        schedule_on_commit(self.id, params["next_checkin"])
+        self._set_fields(params)
+        return True
+
+    def _set_fields(self, params: Mapping[str, Any]) -> None:
+        """
+        Keep the instance in sync with the values just written by an update.
+        """
+        for field, value in params.items():
+            setattr(self, field, value)
 
 
 def get_occurrence_data(reason: str):
@@ -0,0 +1,137 @@
+"""
+Index of monitor environments by their next expected check-in.
+
+Finding the monitor environments which missed a check-in by querying
+`next_checkin` scans a large part of the `MonitorEnvironment` table every
+minute. Instead, monitor environments are kept in Redis sorted sets scored by
+their `next_checkin`, which is written whenever a check-in (or a missed
+check-in) moves it, so that finding the due ones is a cheap range query.
+
+The database stays the source of truth: entries of the index are only hints
+about when to look at a monitor environment. An entry which turns out not to
+be due (e.g. because of a concurrent check-in) is corrected with the value of
+the database when it is looked at.
+
+Monitor environments are spread over `SCHEDULE_SHARDS` sorted sets, so that the
+index isn't a single hot key of the cluster.
+
+Due entries are claimed by pushing them back by `CLAIM_LEASE`, so that they
+aren't handed out again by every tick while they wait to be marked as missed.
+Marking them reschedules them for real, and an entry whose lease runs out
+without that happening is handed out again.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Mapping
+
+from django.conf import settings
+from django.db import router, transaction
+
+from sentry import options
+from sentry.utils import redis
+from sentry.utils.dates import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_SHARDS = 16
+
+CLAIM_LEASE = timedelta(minutes=5)
+
+claim_due_script = redis.load_script("monitors/claim_due.lua")
+
+
+def _get_client():
+    return redis.redis_clusters.get(settings.SENTRY_MONITORS_REDIS_CLUSTER)
+
+
+def _get_key(shard: int) -> str:
+    return f"monitors:schedule:{shard}"
+
+
+def is_enabled() -> bool:
+    """Whether the check-in path keeps the index up to date."""
+    return options.get("monitors.schedule-index.write")
+
+
+def schedule(next_checkins: Mapping[int, datetime]) -> None:
+    """Set the next expected check-in of monitor environments, by id."""
+    if not next_checkins:
+        return
+    with _get_client().pipeline(transaction=False) as pipeline:
+        for monitor_environment_id, next_checkin in next_checkins.items():
+            pipeline.zadd(
+                _get_key(monitor_environment_id % SCHEDULE_SHARDS),
+                {str(monitor_environment_id): to_timestamp(next_checkin)},
+            )
+        pipeline.execute()
+
+
+def schedule_on_commit(monitor_environment_id: int, next_checkin: datetime) -> None:
+    """
+    Schedule a monitor environment once the current transaction commits, if
+    the index is enabled. Failing to write to the index doesn't fail the
+    caller, the entry is corrected the next time it comes up.
+    """
+    from sentry.monitors.models import MonitorEnvironment
+
+    if not is_enabled():
+        return
+
+    def write() -> None:
+        try:
+            schedule({monitor_environment_id: next_checkin})
+        except Exception:
+            logger.exception(
+                "monitors.schedule.write-failed",
+                extra={"monitor_environment_id": monitor_environment_id},
+            )
+
+    transaction.on_commit(write, using=router.db_for_write(MonitorEnvironment))
+
+
+def unschedule(monitor_environment_ids: Iterable[int]) -> None:
+    """Remove monitor environments from the index."""
+    with _get_client().pipeline(transaction=False) as pipeline:
+        for monitor_environment_id in monitor_environment_ids:
+            pipeline.zrem(
+                _get_key(monitor_environment_id % SCHEDULE_SHARDS), str(monitor_environment_id)
+            )
+        pipeline.execute()
+
+
+def get_due(until: datetime) -> List[int]:
+    """
+    Return the ids of the monitor environments expecting a check-in before
+    `until`, earliest first.
+    """
+    with _get_client().pipeline(transaction=False) as pipeline:
+        for shard in range(SCHEDULE_SHARDS):
+            pipeline.zrangebyscore(
+                _get_key(shard), "-inf", f"({to_timestamp(until)}", withscores=True
+            )
+        results = pipeline.execute()
+
+    due = [(score, int(member)) for result in results for member, score in result]
+    due.sort()
+    return [monitor_environment_id for _, monitor_environment_id in due]
+
+
+def claim_due(until: datetime) -> List[int]:
+    """
+    Return the ids of the monitor environments expecting a check-in before
+    `until`, earliest first, and push their entries back by `CLAIM_LEASE`.
+    """
+    client = _get_client()
+    lease_until = to_timestamp(until + CLAIM_LEASE)
+    due = []
+    for shard in range(SCHEDULE_SHARDS):
+        result = claim_due_script(
+            client, [_get_key(shard)], [f"({to_timestamp(until)}", lease_until]
+        )
+        due.extend((float(score), int(member)) for member, score in zip(result[::2], result[1::2]))
+
+    due.sort()
+    return [monitor_environment_id for _, monitor_environment_id in due]
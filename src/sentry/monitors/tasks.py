@@ -3,10 +3,15 @@ from datetime import timedelta
 
 from django.utils import timezone
 
+from sentry import options
 from sentry.constants import ObjectStatus
+from sentry.locks import locks
 from sentry.tasks.base import instrumented_task
 from sentry.utils import metrics
+from sentry.utils.dates import to_datetime, to_timestamp
+from sentry.utils.locking import UnableToAcquireLock
 
+from . import schedule
 from .models import (
     CheckInStatus,
     MonitorCheckIn,
@@ -33,22 +38,17 @@ MONITOR_LIMIT = 10_000
 # monitors the larger the number of checkins to check will exist.
 CHECKINS_LIMIT = 10_000
 
+# Number of due monitor environments of the schedule index each
+# `mark_missed_checkins` task handles.
+MISSED_BATCH_SIZE = 500
 
-@instrumented_task(name="sentry.monitors.tasks.check_monitors", time_limit=15, soft_time_limit=10)
-def check_monitors(current_datetime=None):
-    if current_datetime is None:
-        current_datetime = timezone.now()
+# How often monitor environments which are due but disabled are looked at
+# again when using the schedule index.
+DISABLED_RECHECK_INTERVAL = timedelta(hours=1)
 
-    # [!!]: We want our reference time to be clamped to the very start of the
-    # minute, otherwise we may mark checkins as missed if they didn't happen
-    # immediately before this task was run (usually a few seconds into the minute)
-    #
-    # Because we query `next_checkin__lt=current_datetime` clamping to the
-    # minute will ignore monitors that haven't had their checkin yet within
-    # this minute.
-    current_datetime = current_datetime.replace(second=0, microsecond=0)
 
-    qs = (
+def _get_missed_monitor_environments(current_datetime):
+    return (
         MonitorEnvironment.objects.filter(
             monitor__type__in=[MonitorType.CRON_JOB], next_checkin__lt=current_datetime
         )
@@ -65,34 +65,66 @@ def check_monitors(current_datetime=None):
                 ObjectStatus.PENDING_DELETION,
                 ObjectStatus.DELETION_IN_PROGRESS,
             ]
-        )[:MONITOR_LIMIT]
+        )
     )
-    metrics.gauge("sentry.monitors.tasks.check_monitors.missing_count", qs.count())
-    for monitor_environment in qs:
-        try:
-            logger.info(
-                "monitor.missed-checkin", extra={"monitor_environment_id": monitor_environment.id}
+
+
+def _mark_missed(monitor_environment):
+    try:
+        logger.info(
+            "monitor.missed-checkin", extra={"monitor_environment_id": monitor_environment.id}
+        )
+
+        monitor = monitor_environment.monitor
+        expected_time = None
+        if monitor_environment.last_checkin:
+            expected_time = monitor.get_next_scheduled_checkin_without_margin(
+                monitor_environment.last_checkin
             )
 
-            monitor = monitor_environment.monitor
-            expected_time = None
-            if monitor_environment.last_checkin:
-                expected_time = monitor.get_next_scheduled_checkin_without_margin(
-                    monitor_environment.last_checkin
-                )
+        # add missed checkin
+        MonitorCheckIn.objects.create(
+            project_id=monitor_environment.monitor.project_id,
+            monitor=monitor_environment.monitor,
+            monitor_environment=monitor_environment,
+            status=CheckInStatus.MISSED,
+            expected_time=expected_time,
+            monitor_config=monitor.get_validated_config(),
+        )
+        monitor_environment.mark_failed(reason=MonitorFailure.MISSED_CHECKIN)
+    except Exception:
+        logger.exception("Exception in check_monitors - mark missed")
 
-            # add missed checkin
-            checkin = MonitorCheckIn.objects.create(
-                project_id=monitor_environment.monitor.project_id,
-                monitor=monitor_environment.monitor,
-                monitor_environment=monitor_environment,
-                status=CheckInStatus.MISSED,
-                expected_time=expected_time,
-                monitor_config=monitor.get_validated_config(),
+
+@instrumented_task(name="sentry.monitors.tasks.check_monitors", time_limit=15, soft_time_limit=10)
+def check_monitors(current_datetime=None):
+    if current_datetime is None:
+        current_datetime = timezone.now()
+
+    # [!!]: We want our reference time to be clamped to the very start of the
+    # minute, otherwise we may mark checkins as missed if they didn't happen
+    # immediately before this task was run (usually a few seconds into the minute)
+    #
+    # Because we query `next_checkin__lt=current_datetime` clamping to the
+    # minute will ignore monitors that haven't had their checkin yet within
+    # this minute.
+    current_datetime = current_datetime.replace(second=0, microsecond=0)
+
+    if options.get("monitors.schedule-index.read"):
+        monitor_environment_ids = schedule.claim_due(current_datetime)
+        metrics.gauge(
+            "sentry.monitors.tasks.check_monitors.missing_count", len(monitor_environment_ids)
+        )
+        current_timestamp = to_timestamp(current_datetime)
+        for start in range(0, len(monitor_environment_ids), MISSED_BATCH_SIZE):
+            mark_missed_checkins.delay(
+                monitor_environment_ids[start : start + MISSED_BATCH_SIZE], current_timestamp
             )
-            monitor_environment.mark_failed(reason=MonitorFailure.MISSED_CHECKIN)
-        except Exception:
-            logger.exception("Exception in check_monitors - mark missed")
+    else:
+        qs = _get_missed_monitor_environments(current_datetime)[:MONITOR_LIMIT]
+        metrics.gauge("sentry.monitors.tasks.check_monitors.missing_count", qs.count())
+        for monitor_environment in qs:
+            _mark_missed(monitor_environment)
 
     qs = MonitorCheckIn.objects.filter(status=CheckInStatus.IN_PROGRESS).select_related(
         "monitor", "monitor_environment"
@@ -131,3 +163,59 @@ def check_monitors(current_datetime=None):
                 monitor_environment.mark_failed(reason=MonitorFailure.DURATION)
         except Exception:
             logger.exception("Exception in check_monitors - mark timeout")
+
+
+@instrumented_task(
+    name="sentry.monitors.tasks.mark_missed_checkins", time_limit=60, soft_time_limit=55
+)
+def mark_missed_checkins(monitor_environment_ids, current_timestamp):
+    """
+    Mark the monitor environments due according to the schedule index as
+    missed, and correct the index entries which turn out not to be due.
+    """
+    current_datetime = to_datetime(current_timestamp)
+
+    missed = list(
+        _get_missed_monitor_environments(current_datetime)
+        .filter(id__in=monitor_environment_ids)
+        .select_related("monitor")
+    )
+    for monitor_environment in missed:
+        # Entries are handed out again once their claim runs out, so another
+        # task may be looking at the same monitor environment.
+        lock = locks.get(
+            f"monitors:mark-missed:{monitor_environment.id}",
+            duration=10,
+            name="monitors_mark_missed",
+        )
+        try:
+            with lock.acquire():
+                # Not missed anymore if the other task marked it already
+                monitor_environment = (
+                    _get_missed_monitor_environments(current_datetime)
+                    .filter(id=monitor_environment.id)
+                    .select_related("monitor")
+                    .first()
+                )
+                if monitor_environment is not None:
+                    # Reschedules the monitor environment
+                    _mark_missed(monitor_environment)
+        except UnableToAcquireLock:
+            metrics.incr("sentry.monitors.tasks.mark_missed_checkins.locked")
+
+    # Monitor environments which checked in since they were scheduled, were
+    # disabled or deleted.
+    missed_ids = {monitor_environment.id for monitor_environment in missed}
+    remaining = set(monitor_environment_ids) - missed_ids
+    next_checkins = {}
+    for monitor_environment_id, next_checkin in MonitorEnvironment.objects.filter(
+        id__in=remaining, next_checkin__isnull=False
+    ).values_list("id", "next_checkin"):
+        if next_checkin < current_datetime:
+            # Due but disabled, looked at again from time to time in case it
+            # is enabled again.
+            next_checkin = current_datetime + DISABLED_RECHECK_INTERVAL
+        next_checkins[monitor_environment_id] = next_checkin
+
+    schedule.schedule(next_checkins)
+    schedule.unschedule(remaining - set(next_checkins))
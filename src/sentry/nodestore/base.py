@@ -1,8 +1,11 @@
 from threading import local
+from typing import Mapping, Optional
 
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry.nodestore.compression import ZstdDictionaryCodec, get_codec, is_compressed
+from sentry.nodestore.local_cache import get_local_cache
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -70,6 +73,10 @@ class NodeStorage(local, Service):
         "bootstrap",
     )
 
+    # Number of nodes a single ``delete_multi`` call of the backend handles
+    # best, or ``None`` if there is no such limit.
+    delete_batch_size: Optional[int] = None
+
     def delete(self, id):
         """
         >>> nodestore.delete('key1')
@@ -134,9 +141,15 @@ class NodeStorage(local, Service):
                     return item_from_cache
 
             span.set_tag("subkey", str(subkey))
-            bytes_data = self._get_bytes(id)
+            bytes_data = self._get_local_cache_bytes(id)
+            from_local_cache = bytes_data is not None
+            if from_local_cache:
+                span.set_tag("origin", "from_local_cache")
+            else:
+                bytes_data = self._decompress(self._get_bytes(id))
+                self._set_local_cache_bytes(id, bytes_data)
             rv = self._decode(bytes_data, subkey=subkey)
-            if subkey is None:
+            if subkey is None and not from_local_cache:
                 # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
 
@@ -179,10 +192,18 @@ class NodeStorage(local, Service):
             else:
                 uncached_ids = id_list
 
-            items = {
-                id: self._decode(value, subkey=subkey)
-                for id, value in self._get_bytes_multi(uncached_ids).items()
-            }
+            bytes_data = self._get_local_cache_bytes_multi(uncached_ids)
+            if len(bytes_data) < len(uncached_ids):
+                fetched = {
+                    id: self._decompress(value)
+                    for id, value in self._get_bytes_multi(
+                        [id for id in uncached_ids if id not in bytes_data]
+                    ).items()
+                }
+                self._set_local_cache_bytes_multi(fetched)
+                bytes_data.update(fetched)
+
+            items = {id: self._decode(value, subkey=subkey) for id, value in bytes_data.items()}
             if subkey is None:
                 self._set_cache_items(items)
                 items.update(cache_items)
@@ -208,6 +229,26 @@ class NodeStorage(local, Service):
 
         return b"\n".join(lines)
 
+    def _compress(self, data, platform=None):
+        """
+        Compress an encoded blob with the dictionary of its platform, when
+        dictionary compression is enabled.
+        """
+        if self.compression_codec is None:
+            return data
+        return self.compression_codec.compress(data, platform)
+
+    def _decompress(self, data):
+        """
+        Decompress a blob written by `_compress`. Blobs written without
+        compression are returned unchanged.
+        """
+        if not is_compressed(data):
+            return data
+        # Blobs compressed without a dictionary stay readable even if
+        # compression has since been disabled.
+        return (self.compression_codec or ZstdDictionaryCodec({})).decompress(data)
+
     def _set_bytes(self, id, data, ttl=None):
         """
         >>> nodestore.set('key1', b"{'foo': 'bar'}")
@@ -242,10 +283,12 @@ class NodeStorage(local, Service):
             span.set_tag("node_id", id)
             span.set_data("subkeys_count", len(data))
             cache_item = data.get(None)
+            platform = cache_item.get("platform") if isinstance(cache_item, Mapping) else None
             bytes_data = self._encode(data)
-            self._set_bytes(id, bytes_data, ttl=ttl)
+            self._set_bytes(id, self._compress(bytes_data, platform), ttl=ttl)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
+            self._set_local_cache_bytes(id, bytes_data)
 
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
@@ -271,13 +314,42 @@ class NodeStorage(local, Service):
             self.cache.set_many(items)
 
     def _delete_cache_item(self, id):
+        if self.local_cache is not None:
+            self.local_cache.delete(id)
         if self.cache:
             self.cache.delete(id)
 
     def _delete_cache_items(self, id_list):
+        if self.local_cache is not None:
+            self.local_cache.delete_many(id_list)
         if self.cache:
             self.cache.delete_many([id for id in id_list])
 
+    def _get_local_cache_bytes(self, id):
+        if self.local_cache is not None:
+            return self.local_cache.get(id)
+
+    def _get_local_cache_bytes_multi(self, id_list):
+        if self.local_cache is not None:
+            return self.local_cache.get_many(id_list)
+        return {}
+
+    def _set_local_cache_bytes(self, id, data):
+        if self.local_cache is not None:
+            self.local_cache.set(id, data)
+
+    def _set_local_cache_bytes_multi(self, items):
+        if self.local_cache is not None:
+            self.local_cache.set_many(items)
+
+    @memoize
+    def compression_codec(self):
+        return get_codec()
+
+    @memoize
+    def local_cache(self):
+        return get_local_cache()
+
     @memoize
     def cache(self):
         try:
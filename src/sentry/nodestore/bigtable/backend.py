@@ -30,6 +30,10 @@ class BigtableNodeStorage(NodeStorage):
 
     store_class = BigtableKVStorage
 
+    # Well below the 100,000 mutations Bigtable accepts in one MutateRows
+    # request, which also bounds the size of the request.
+    delete_batch_size = 10000
+
     def __init__(
         self,
         project=None,
@@ -0,0 +1,173 @@
+"""
+Dictionary compression of nodestore blobs.
+
+Event payloads share a huge amount of structure, in particular between events
+of the same platform, which per-blob compression can't take advantage of. Blobs
+are therefore compressed with zstd using dictionaries trained per platform (see
+`sentry nodestore train-dictionary`).
+
+Dictionaries are stored in `SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR`, one file per
+dictionary named `<platform>.<dict_id>.zdict`. The id of the dictionary a blob
+was compressed with is part of the zstd frame header, so blobs remain readable
+as long as the dictionary file is kept around, and new dictionaries (with a
+higher id) can be rolled out at any time.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Mapping, MutableMapping, Optional, Sequence
+
+import zstandard
+from django.conf import settings
+
+from sentry.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Every zstd frame starts with this magic number, which can't be the start of
+# a JSON (`{`) or pickle (`\x80`) payload.
+ZSTD_FRAME_MAGIC = b"\x28\xb5\x2f\xfd"
+
+DICTIONARY_SUFFIX = ".zdict"
+
+# Dictionary used for platforms without a dictionary of their own.
+DEFAULT_PLATFORM = "default"
+
+_codec: Optional[ZstdDictionaryCodec] = None
+_codec_lock = threading.Lock()
+
+
+class MissingDictionary(Exception):
+    pass
+
+
+class ZstdDictionaryCodec:
+    """
+    Compresses blobs with the most recent dictionary of their platform, and
+    decompresses blobs with whichever dictionary they were compressed with.
+    """
+
+    def __init__(
+        self, dictionaries: Mapping[str, Iterable[zstandard.ZstdCompressionDict]], level: int = 3
+    ) -> None:
+        self.level = level
+        self.dictionaries_by_id: MutableMapping[int, zstandard.ZstdCompressionDict] = {}
+        self.latest_by_platform: MutableMapping[str, zstandard.ZstdCompressionDict] = {}
+
+        for platform, platform_dictionaries in dictionaries.items():
+            for dictionary in platform_dictionaries:
+                self.dictionaries_by_id[dictionary.dict_id()] = dictionary
+                latest = self.latest_by_platform.get(platform)
+                if latest is None or dictionary.dict_id() > latest.dict_id():
+                    self.latest_by_platform[platform] = dictionary
+
+        self._local = threading.local()
+
+    @classmethod
+    def from_directory(cls, path: str, level: int = 3) -> ZstdDictionaryCodec:
+        dictionaries: MutableMapping[str, list[zstandard.ZstdCompressionDict]] = {}
+        for filename in sorted(os.listdir(path)):
+            if not filename.endswith(DICTIONARY_SUFFIX):
+                continue
+            platform = filename.split(".", 1)[0]
+            with open(os.path.join(path, filename), "rb") as f:
+                dictionaries.setdefault(platform, []).append(
+                    zstandard.ZstdCompressionDict(f.read())
+                )
+        return cls(dictionaries, level=level)
+
+    def _get_compressor(self, dictionary: Optional[zstandard.ZstdCompressionDict]):
+        # Compressors are not thread safe, but expensive enough to set up (the
+        # dictionary has to be digested) that we want to reuse them.
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        key = dictionary.dict_id() if dictionary is not None else 0
+        compressor = compressors.get(key)
+        if compressor is None:
+            compressor = compressors[key] = zstandard.ZstdCompressor(
+                level=self.level, dict_data=dictionary
+            )
+        return compressor
+
+    def _get_decompressor(self, dict_id: int):
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id == 0:
+                dictionary = None
+            else:
+                try:
+                    dictionary = self.dictionaries_by_id[dict_id]
+                except KeyError:
+                    raise MissingDictionary(f"Unknown zstd dictionary: {dict_id}")
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return decompressor
+
+    def compress(self, data: bytes, platform: Optional[str] = None) -> bytes:
+        dictionary = self.latest_by_platform.get(platform or DEFAULT_PLATFORM)
+        if dictionary is None:
+            dictionary = self.latest_by_platform.get(DEFAULT_PLATFORM)
+
+        rv: bytes = self._get_compressor(dictionary).compress(data)
+        metrics.timing(
+            "nodestore.compression.ratio",
+            len(data) / len(rv) if rv else 0,
+            tags={"dictionary": "yes" if dictionary is not None else "no"},
+            sample_rate=0.1,
+        )
+        return rv
+
+    def decompress(self, data: bytes) -> bytes:
+        if not is_compressed(data):
+            return data
+
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        rv: bytes = self._get_decompressor(dict_id).decompress(data)
+        return rv
+
+
+def is_compressed(data: Optional[bytes]) -> bool:
+    return data is not None and data.startswith(ZSTD_FRAME_MAGIC)
+
+
+def train_dictionary(
+    samples: Sequence[bytes], dict_size: int, dict_id: Optional[int] = None
+) -> zstandard.ZstdCompressionDict:
+    """
+    Train a dictionary from sample blobs. Dictionary ids default to the
+    current timestamp, so that the most recently trained dictionary of a
+    platform is the one used for new blobs.
+    """
+    if dict_id is None:
+        dict_id = int(time.time())
+    return zstandard.train_dictionary(dict_size, list(samples), dict_id=dict_id)
+
+
+def dictionary_filename(platform: str, dictionary: zstandard.ZstdCompressionDict) -> str:
+    return f"{platform}.{dictionary.dict_id()}{DICTIONARY_SUFFIX}"
+
+
+def get_codec() -> Optional[ZstdDictionaryCodec]:
+    """
+    Return the codec of this process, or `None` when dictionary compression
+    is not enabled through `SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR`.
+    """
+    global _codec
+
+    path = settings.SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR
+    if not path:
+        return None
+
+    with _codec_lock:
+        if _codec is None:
+            _codec = ZstdDictionaryCodec.from_directory(
+                path, level=settings.SENTRY_NODESTORE_ZSTD_LEVEL
+            )
+            logger.info(
+                "nodestore.compression.loaded",
+                extra={"dictionaries": sorted(_codec.dictionaries_by_id)},
+            )
+    return _codec
@@ -1,19 +1,41 @@
+import base64
 import logging
 import math
 import pickle
+import zlib
 
 from django.utils import timezone
 
 from sentry.db.models import create_or_update
 from sentry.nodestore.base import NodeStorage
-from sentry.utils.strings import compress, decompress
+from sentry.nodestore.compression import is_compressed
+from sentry.utils.strings import compress
 
 from .models import Node
 
 logger = logging.getLogger("sentry")
 
 
+def _dump_data(data):
+    # Blobs already compressed with zstd would not shrink any further with
+    # zlib, they are only base64 encoded to fit the text column.
+    if is_compressed(data):
+        return base64.b64encode(data).decode("utf-8")
+    return compress(data)
+
+
+def _load_data(value):
+    data = base64.b64decode(value)
+    if is_compressed(data):
+        return data
+    return zlib.decompress(data)
+
+
 class DjangoNodeStorage(NodeStorage):
+    # Keeps the ``IN`` lists of deletes (and the cache keys deleted along)
+    # reasonably small.
+    delete_batch_size = 1000
+
     def delete(self, id):
         Node.objects.filter(id=id).delete()
         self._delete_cache_item(id)
@@ -37,19 +59,21 @@ class DjangoNodeStorage(NodeStorage):
     def _get_bytes(self, id):
         try:
             data = Node.objects.get(id=id).data
-            return decompress(data)
+            return _load_data(data)
         except Node.DoesNotExist:
             return None
 
     def _get_bytes_multi(self, id_list):
-        return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
+        return {n.id: _load_data(n.data) for n in Node.objects.filter(id__in=id_list)}
 
     def delete_multi(self, id_list):
         Node.objects.filter(id__in=id_list).delete()
         self._delete_cache_items(id_list)
 
     def _set_bytes(self, id, data, ttl=None):
-        create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
+        create_or_update(
+            Node, id=id, values={"data": _dump_data(data), "timestamp": timezone.now()}
+        )
 
     def cleanup(self, cutoff_timestamp):
         from sentry.db.deletion import BulkDeleteQuery
@@ -60,6 +84,8 @@ class DjangoNodeStorage(NodeStorage):
         BulkDeleteQuery(model=Node, dtfield="timestamp", days=days).execute()
         if self.cache:
             self.cache.clear()
+        if self.local_cache is not None:
+            self.local_cache.clear()
 
     def bootstrap(self):
         # Nothing for Django backend to do during bootstrap
@@ -33,6 +33,7 @@ class FileSystemNodeStorage(NodeStorage):
 
     def delete(self, id):
         os.remove(self.node_path(id))
+        self._delete_cache_item(id)
 
     def cleanup(self, cutoff: datetime.datetime):
         for filename in os.listdir(self.path):
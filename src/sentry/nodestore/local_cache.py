@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+from sentry.utils import metrics
+
+_local_cache: Optional["LocalNodeCache"] = None
+_local_cache_lock = threading.Lock()
+
+
+class LocalNodeCache:
+    """
+    A bounded, in-process LRU cache of nodestore blobs.
+
+    The same event body is fetched repeatedly within seconds by `save_event`,
+    post processing and the event API. This cache sits in front of the backend
+    (`_get_bytes` and `_get_bytes_multi`) so those reads don't need a network
+    round-trip nor decompression.
+
+    Entries are the decompressed blobs, including all subkeys, so a cached
+    node serves every subkey lookup. Blobs are stored rather than decoded
+    payloads because callers are free to mutate the nodes they get back, and
+    copying a decoded payload is slower than decoding it again.
+
+    The cache is bounded by the total size of the stored blobs in bytes, and
+    entries expire after `ttl` seconds. Writes and deletes through nodestore
+    invalidate the cache of the current process only, which is why the TTL
+    should be kept short.
+    """
+
+    def __init__(
+        self, max_bytes: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        assert max_bytes > 0
+        assert ttl > 0
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, id: str, now: float) -> Optional[bytes]:
+        entry = self._entries.get(id)
+        if entry is None:
+            return None
+
+        data, expires_at = entry
+        if expires_at <= now:
+            self._remove(id)
+            metrics.incr("nodestore.local_cache.evicted", tags={"reason": "expired"})
+            return None
+
+        self._entries.move_to_end(id)
+        return data
+
+    def get(self, id: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._get(id, self.clock())
+
+        metrics.incr(
+            "nodestore.local_cache.get",
+            tags={"result": "hit" if data is not None else "miss"},
+            sample_rate=0.1,
+        )
+        return data
+
+    def get_many(self, id_list: Iterable[str]) -> Dict[str, bytes]:
+        rv = {}
+        requested = 0
+        with self._lock:
+            now = self.clock()
+            for id in id_list:
+                requested += 1
+                data = self._get(id, now)
+                if data is not None:
+                    rv[id] = data
+
+        metrics.incr("nodestore.local_cache.get", len(rv), tags={"result": "hit"}, sample_rate=0.1)
+        metrics.incr(
+            "nodestore.local_cache.get",
+            requested - len(rv),
+            tags={"result": "miss"},
+            sample_rate=0.1,
+        )
+        return rv
+
+    def set(self, id: str, data: Optional[bytes]) -> None:
+        if data is None:
+            return
+        if len(data) > self.max_bytes:
+            # Would evict everything else and still not fit
+            self.delete(id)
+            return
+
+        evicted = 0
+        with self._lock:
+            self._remove(id)
+            self._entries[id] = (data, self.clock() + self.ttl)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                evicted += 1
+
+        if evicted:
+            metrics.incr("nodestore.local_cache.evicted", evicted, tags={"reason": "size"})
+
+    def set_many(self, items: Dict[str, Optional[bytes]]) -> None:
+        for id, data in items.items():
+            self.set(id, data)
+
+    def delete(self, id: str) -> None:
+        with self._lock:
+            self._remove(id)
+
+    def delete_many(self, id_list: Iterable[str]) -> None:
+        with self._lock:
+            for id in id_list:
+                self._remove(id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, id: str) -> None:
+        entry = self._entries.pop(id, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+
+def get_local_cache() -> Optional[LocalNodeCache]:
+    """
+    Return the cache shared by all nodestore instances of this process, or
+    `None` when disabled through `SENTRY_NODESTORE_LOCAL_CACHE_SIZE`.
+    """
+    global _local_cache
+
+    max_bytes = settings.SENTRY_NODESTORE_LOCAL_CACHE_SIZE
+    if not max_bytes:
+        return None
+
+    with _local_cache_lock:
+        if _local_cache is None:
+            _local_cache = LocalNodeCache(
+                max_bytes=max_bytes, ttl=settings.SENTRY_NODESTORE_LOCAL_CACHE_TTL
+            )
+    return _local_cache
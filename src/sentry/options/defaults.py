@@ -368,6 +368,15 @@ register(
     default=0,
     flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
 )
+# Recording segments of at least this many compressed bytes are decompressed and decoded
+# incrementally by dom-click-search, which bounds their memory use at the cost of CPU. Smaller
+# segments are decoded whole, which is faster.
+register(
+    "replay.ingest.stream-min-size",
+    type=Int,
+    default=1024 * 1024,
+    flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
 
 # Analytics
 register("analytics.backend", default="noop", flags=FLAG_NOSTORE)
@@ -487,6 +496,9 @@ register("snuba.search.max-chunk-size", default=2000, flags=FLAG_AUTOMATOR_MODIF
 register("snuba.search.max-total-chunk-time-seconds", default=30.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.search.hits-sample-size", default=100, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.track-outcomes-sample-rate", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Seconds the results of a referrer are kept in the in-process cache of Snuba
+# results, by referrer. Referrers which aren't listed are not cached.
+register("snuba.local-cache.referrer-ttls", type=Dict, default={}, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
 register(
@@ -721,6 +733,8 @@ register(
 register(
     "post_process.get-autoassign-owners", type=Sequence, default=[], flags=FLAG_AUTOMATOR_MODIFIABLE
 )
+# Evaluate the alert rules of all groups of an event with a BatchRuleProcessor
+register("post_process.batch-rule-processor", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register(
     "api.organization.disable-last-deploys",
     type=Sequence,
@@ -742,6 +756,14 @@ register("store.background-grouping-sample-rate", default=0.0, flags=FLAG_AUTOMA
 # True if background grouping should run before secondary and primary grouping
 register("store.background-grouping-before", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
+# Fraction of grouping result cache hits which are recalculated and compared
+# to the cached result
+register(
+    "store.grouping-result-cache-verify-sample-rate",
+    default=0.0,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Store release files bundled as zip files
 register(
     "processing.save-release-archives", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE
@@ -786,6 +808,10 @@ register(
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
 
+# Process the messages of the events and transactions ingest consumers a Kafka
+# batch at a time. Read when partitions are assigned.
+register("store.ingest-consumer-batch-events", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
 # Sampling rate for controlled rollout of a change where ignest-consumer spawns
 # special save_event task for transactions avoiding the preprocess.
 register(
@@ -929,6 +955,13 @@ register(
     "sentry-metrics.indexer.cache-key-double-write", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE
 )
 
+# Fraction of ingest metrics messages that are validated against their schema
+# in the indexer. Messages that are not validated don't need to be decoded
+# fully, see IndexerBatch.
+register(
+    "sentry-metrics.indexer.input-validation-rate", default=1.0, flags=FLAG_AUTOMATOR_MODIFIABLE
+)
+
 # Global and per-organization limits on the writes to the string indexer's DB.
 #
 # Format is a list of dictionaries of format {
@@ -1009,6 +1042,16 @@ register(
     default=False,
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
+# Fraction of each writes limit leased by an indexer process at once, so that
+# requests can be checked without a round-trip to Redis until the lease is
+# used up. 0 disables leases. Read when the indexer starts.
+#
+# See sentry.ratelimits.sliding_windows.LeasedSlidingWindowRateLimiter.
+register(
+    "sentry-metrics.writes-limiter.lease-fraction",
+    default=0.0,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
 # per-organization limits on the number of timeseries that can be observed in
 # each window.
 #
@@ -1349,3 +1392,26 @@ register(
     default=False,
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
+
+# Write RedisBuffer filters and extra values with the compact msgpack encoding instead of pickle.
+# All readers understand both encodings.
+register("buffer.redis.msgpack-encoding", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Deliver digests in batches: timelines are opened and closed with a single Redis script call per
+# partition, and digests of a batch are built concurrently.
+register("digests.batch-delivery.enabled", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("digests.batch-delivery.batch-size", default=100, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("digests.batch-delivery.concurrency", default=4, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Keep monitor environments in a Redis index of their next expected check-in (write), and find
+# missed check-ins with it instead of querying MonitorEnvironment (read). Enable read only once
+# write has been on for longer than the longest monitor schedule.
+register("monitors.schedule-index.write", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("monitors.schedule-index.read", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Delete the event data of deleted groups in time windows (partitions) which are paged through
+# concurrently, and checkpoint the progress of every window to Redis so that retried deletions
+# resume where they stopped.
+register("deletions.group.event-data-partitions", default=1, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("deletions.group.event-data-concurrency", default=1, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("deletions.group.event-data-checkpoints", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
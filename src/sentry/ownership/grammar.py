@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+import threading
 from collections import namedtuple
 from typing import (
     Any,
@@ -16,6 +17,7 @@ from typing import (
     Union,
 )
 
+from cachetools import LRUCache
 from parsimonious.exceptions import ParseError
 from parsimonious.grammar import Grammar
 from parsimonious.nodes import Node, NodeVisitor
@@ -24,12 +26,14 @@ from rest_framework.serializers import ValidationError
 from sentry.eventstore.models import EventSubjectTemplateData
 from sentry.models import ActorTuple, OrganizationMember, RepositoryProjectPathConfig
 from sentry.services.hybrid_cloud.user.service import user_service
+from sentry.utils import json, metrics
 from sentry.utils.codeowners import codeowners_match
 from sentry.utils.event_frames import find_stack_frames, get_sdk_name, munged_filename_and_frames
 from sentry.utils.glob import glob_match
+from sentry.utils.hashlib import md5_text
 from sentry.utils.safe import PathSearchable, get_path
 
-__all__ = ("parse_rules", "dump_schema", "load_schema")
+__all__ = ("parse_rules", "dump_schema", "load_schema", "compile_schema")
 
 VERSION = 1
 
@@ -38,6 +42,9 @@ PATH = "path"
 MODULE = "module"
 CODEOWNERS = "codeowners"
 
+# Maximum number of compiled schemas kept per process, see `compile_schema`.
+COMPILED_SCHEMA_CACHE_SIZE = 1000
+
 # Grammar is defined in EBNF syntax.
 ownership_grammar = Grammar(
     rf"""
@@ -215,6 +222,112 @@ class Matcher(namedtuple("Matcher", "type pattern")):
         return False
 
 
+def _default_frame_match(value: str, pattern: str) -> bool:
+    return bool(glob_match(value, pattern, ignorecase=True, path_normalize=True))
+
+
+def _codeowners_frame_match(value: str, pattern: str) -> bool:
+    return bool(codeowners_match(value, pattern))
+
+
+def _frame_values(frames: Sequence[Mapping[str, Any]], keys: Sequence[str]) -> Sequence[str]:
+    """
+    Collect the unique, non-empty values for `keys` across all `frames`, in
+    the order `Matcher.test_frames` would visit them.
+    """
+    values: Dict[str, None] = {}
+    for frame in (f for f in frames if isinstance(f, Mapping)):
+        for key in keys:
+            value = frame.get(key)
+            if value:
+                values[value] = None
+    return list(values)
+
+
+class CompiledRules:
+    """
+    A list of Rules prepared for being tested against many events.
+
+    `Rule.test` extracts (and munges) the stack frames of the event once per
+    rule. With CODEOWNERS files of thousands of lines this dominates owner
+    evaluation, so instead the frame values are extracted once per event and
+    every distinct `type:pattern` matcher is only tested once, no matter how
+    many rules share it.
+
+    Matching semantics are identical to calling `Rule.test` on every rule.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = rules
+        # Unique matchers in the order they first appear, rules sharing a
+        # matcher share its result.
+        self.matchers: Sequence[Matcher] = list(dict.fromkeys(rule.matcher for rule in rules))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def test(self, data: PathSearchable) -> Sequence[Rule]:
+        """Return the rules matching `data`, in schema order."""
+        if not self.rules:
+            return []
+
+        results = self._test_matchers(data)
+        return [rule for rule in self.rules if results[rule.matcher]]
+
+    def _test_matchers(self, data: PathSearchable) -> Mapping[Matcher, bool]:
+        path_values: Optional[Sequence[str]] = None
+        module_values: Optional[Sequence[str]] = None
+
+        results = {}
+        for matcher in self.matchers:
+            if matcher.type in (PATH, CODEOWNERS):
+                if path_values is None:
+                    path_values = _frame_values(*Matcher.munge_if_needed(data))
+                match_func = (
+                    _codeowners_frame_match if matcher.type == CODEOWNERS else _default_frame_match
+                )
+                results[matcher] = any(match_func(v, matcher.pattern) for v in path_values)
+            elif matcher.type == MODULE:
+                if module_values is None:
+                    module_values = _frame_values(find_stack_frames(data), ["module"])
+                results[matcher] = any(
+                    _default_frame_match(v, matcher.pattern) for v in module_values
+                )
+            else:
+                results[matcher] = bool(matcher.test(data))
+        return results
+
+
+_compiled_schema_cache: LRUCache = LRUCache(maxsize=COMPILED_SCHEMA_CACHE_SIZE)
+_compiled_schema_lock = threading.Lock()
+
+
+def compile_schema(schema: Optional[Mapping[str, Any]]) -> CompiledRules:
+    """
+    Load and compile a JSON schema, reusing the compiled form from a previous
+    call with the same schema.
+
+    The cache is keyed by a digest of the schema contents, so updating the
+    ownership rules or CODEOWNERS of a project naturally invalidates the
+    compiled rules without any explicit signal handling.
+    """
+    if not schema:
+        return CompiledRules([])
+
+    key = md5_text(json.dumps(schema, sort_keys=True)).hexdigest()
+    with _compiled_schema_lock:
+        compiled = _compiled_schema_cache.get(key)
+    if compiled is not None:
+        metrics.incr("ownership.compiled_schema.cache", tags={"result": "hit"}, sample_rate=0.1)
+        return compiled
+
+    metrics.incr("ownership.compiled_schema.cache", tags={"result": "miss"}, sample_rate=0.1)
+    compiled = CompiledRules(load_schema(schema))
+    with _compiled_schema_lock:
+        _compiled_schema_cache[key] = compiled
+    return compiled
+
+
 class Owner(namedtuple("Owner", "type identifier")):
     """
     An Owner represents a User or Team who owns this Rule.
@@ -1,4 +1,6 @@
-from typing import Mapping, Optional, Sequence, Tuple
+import threading
+import time
+from typing import AbstractSet, Mapping, MutableMapping, Optional, Sequence, Set, Tuple
 
 from sentry_redis_tools.cardinality_limiter import CardinalityLimiter as CardinalityLimiterBase
 from sentry_redis_tools.cardinality_limiter import GrantedQuota, Quota
@@ -29,6 +31,7 @@ class RedisCardinalityLimiter(CardinalityLimiter):
         num_shards: int = 3,
         num_physical_shards: int = 3,
         metric_tags: Optional[Mapping[str, str]] = None,
+        admitted_hashes_cache_size: int = 0,
     ) -> None:
         """
         :param cluster: Name of the redis cluster to use, to be configured with
@@ -41,6 +44,11 @@ class RedisCardinalityLimiter(CardinalityLimiter):
             Redis. The ratio `cluster_num_physical_shards / cluster_num_shards`
             is a sampling rate, the lower it is, the less precise accounting
             will be.
+        :param admitted_hashes_cache_size: The maximum number of hashes
+            admitted by this process to remember. Hashes that were admitted in
+            the current granule of their quota are already accounted for, so
+            requests for them are granted without a round-trip to Redis. `0`
+            disables the cache.
         """
         is_redis_cluster, client, _ = redis.get_dynamic_cluster_from_options(
             "", {"cluster": cluster}
@@ -58,16 +66,125 @@ class RedisCardinalityLimiter(CardinalityLimiter):
             metrics_backend=RedisToolsMetricsBackend(metrics.backend, tags=metric_tags),
         )
 
+        self.admitted_hashes_cache_size = admitted_hashes_cache_size
+        self._admitted_hashes: MutableMapping[Tuple[str, Quota], Tuple[int, Set[Hash]]] = {}
+        self._admitted_hashes_count = 0
+        self._admitted_hashes_lock = threading.Lock()
+
         super().__init__()
 
+    def _get_admitted_hashes(
+        self, request: RequestedQuota, timestamp: Timestamp
+    ) -> AbstractSet[Hash]:
+        # Must be called with the lock held.
+        key = (request.prefix, request.quota)
+        entry = self._admitted_hashes.get(key)
+        if entry is None:
+            return frozenset()
+
+        granule, hashes = entry
+        if granule != timestamp // request.quota.granularity_seconds:
+            del self._admitted_hashes[key]
+            self._admitted_hashes_count -= len(hashes)
+            return frozenset()
+
+        return hashes
+
+    def _add_admitted_hashes(self, grants: Sequence[GrantedQuota], timestamp: Timestamp) -> None:
+        with self._admitted_hashes_lock:
+            for grant in grants:
+                if self._admitted_hashes_count >= self.admitted_hashes_cache_size:
+                    self._admitted_hashes.clear()
+                    self._admitted_hashes_count = 0
+
+                request = grant.request
+                admitted = self._get_admitted_hashes(request, timestamp)
+                if not admitted:
+                    admitted = set()
+                    self._admitted_hashes[(request.prefix, request.quota)] = (
+                        timestamp // request.quota.granularity_seconds,
+                        admitted,
+                    )
+
+                count = len(admitted)
+                admitted.update(grant.granted_unit_hashes)
+                self._admitted_hashes_count += len(admitted) - count
+
     def check_within_quotas(
         self, requests: Sequence[RequestedQuota], timestamp: Optional[Timestamp] = None
     ) -> Tuple[Timestamp, Sequence[GrantedQuota]]:
-        return self.impl.check_within_quotas(requests, timestamp)
+        if not self.admitted_hashes_cache_size:
+            return self.impl.check_within_quotas(requests, timestamp)
+
+        if timestamp is None:
+            timestamp = int(time.time())
+        else:
+            timestamp = int(timestamp)
+
+        # Only hashes that weren't admitted by this process in the current
+        # granule need to be checked in Redis.
+        admitted_hashes = []
+        unknown_requests = []
+        with self._admitted_hashes_lock:
+            for request in requests:
+                admitted = self._get_admitted_hashes(request, timestamp)
+                admitted_hashes.append([h for h in request.unit_hashes if h in admitted])
+                unknown = [h for h in request.unit_hashes if h not in admitted]
+                if unknown:
+                    unknown_requests.append(request._replace(unit_hashes=unknown))
+
+        metrics.incr(
+            "ratelimits.cardinality.admitted_hashes_cache",
+            sum(len(hashes) for hashes in admitted_hashes),
+            tags={"result": "hit"},
+        )
+
+        unknown_grants = iter(())
+        if unknown_requests:
+            _, grants = self.impl.check_within_quotas(unknown_requests, timestamp)
+            unknown_grants = iter(grants)
+
+        grants = []
+        for request, admitted in zip(requests, admitted_hashes):
+            if len(admitted) == len(request.unit_hashes):
+                grants.append(
+                    GrantedQuota(request=request, granted_unit_hashes=admitted, reached_quota=None)
+                )
+                continue
+
+            grant = next(unknown_grants)
+            grants.append(
+                GrantedQuota(
+                    request=request,
+                    granted_unit_hashes=admitted + list(grant.granted_unit_hashes),
+                    reached_quota=grant.reached_quota,
+                )
+            )
+
+        return timestamp, grants
 
     def use_quotas(
         self,
         grants: Sequence[GrantedQuota],
         timestamp: Timestamp,
     ) -> None:
-        return self.impl.use_quotas(grants, timestamp)
+        if not self.admitted_hashes_cache_size:
+            return self.impl.use_quotas(grants, timestamp)
+
+        unknown_grants = []
+        with self._admitted_hashes_lock:
+            for grant in grants:
+                admitted = self._get_admitted_hashes(grant.request, timestamp)
+                unknown = [h for h in grant.granted_unit_hashes if h not in admitted]
+                if unknown:
+                    unknown_grants.append(
+                        GrantedQuota(
+                            request=grant.request._replace(unit_hashes=unknown),
+                            granted_unit_hashes=unknown,
+                            reached_quota=grant.reached_quota,
+                        )
+                    )
+
+        if unknown_grants:
+            self.impl.use_quotas(unknown_grants, timestamp)
+            self._add_admitted_hashes(unknown_grants, timestamp)
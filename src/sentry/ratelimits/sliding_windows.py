@@ -1,4 +1,8 @@
-from typing import Any, Optional, Sequence, Tuple
+import dataclasses
+import math
+import threading
+import time
+from typing import Any, List, MutableMapping, Optional, Sequence, Tuple
 
 from sentry_redis_tools.clients import RedisCluster, StrictRedis
 from sentry_redis_tools.sliding_windows_rate_limiter import GrantedQuota, Quota
@@ -8,7 +12,7 @@ from sentry_redis_tools.sliding_windows_rate_limiter import (
 from sentry_redis_tools.sliding_windows_rate_limiter import RequestedQuota, Timestamp
 
 from sentry.exceptions import InvalidConfiguration
-from sentry.utils import redis
+from sentry.utils import metrics, redis
 from sentry.utils.services import Service
 
 __all__ = ["Quota", "GrantedQuota", "RequestedQuota", "Timestamp"]
@@ -144,3 +148,201 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
         timestamp: Timestamp,
     ) -> None:
         return self.impl.use_quotas(requests, grants, timestamp)
+
+
+LeaseKey = Tuple[str, Quota]
+
+
+@dataclasses.dataclass
+class _Lease:
+    granule: int
+    balance: int
+
+
+class LeasedSlidingWindowRateLimiter(SlidingWindowRateLimiter):
+    """
+    Serves requests from quota leased in bulk by this process, and only goes
+    to the wrapped rate limiter (i.e. Redis) to refill leases or when close to
+    the limit.
+
+    For every quota (and prefix) in use, a lease of ``lease_fraction`` of the
+    quota's limit is taken (checked and used) from the wrapped rate limiter at
+    once. Requests are then checked against and deducted from the lease
+    without any round-trip. When the remaining quota is smaller than a lease,
+    requests are checked and used in the wrapped rate limiter directly, exactly
+    like without leases.
+
+    Leases are only valid for the granule of the quota in which they were
+    taken, since that's where the wrapped rate limiter accounts for them.
+    Quota that was leased but not used by the end of the granule is lost,
+    which makes this rate limiter stricter than the wrapped one: at most
+    ``lease_fraction`` of a limit per process and granule. Unused quota is
+    reported as the ``ratelimits.sliding_windows.lease.unused`` metric.
+    """
+
+    def __init__(
+        self, rate_limiter: SlidingWindowRateLimiter, lease_fraction: float = 0.01, **options: Any
+    ) -> None:
+        assert 0 < lease_fraction < 1
+        self.rate_limiter = rate_limiter
+        self.lease_fraction = lease_fraction
+        self._leases: MutableMapping[LeaseKey, _Lease] = {}
+        self._lock = threading.Lock()
+        super().__init__(**options)
+
+    def validate(self) -> None:
+        self.rate_limiter.validate()
+
+    @staticmethod
+    def _get_lease_key(request: RequestedQuota, quota: Quota) -> LeaseKey:
+        return quota.prefix_override or request.prefix, quota
+
+    def _get_lease(self, key: LeaseKey, timestamp: Timestamp) -> Optional[_Lease]:
+        # Must be called with the lock held.
+        lease = self._leases.get(key)
+        if lease is None:
+            return None
+
+        if lease.granule != timestamp // key[1].granularity_seconds:
+            del self._leases[key]
+            if lease.balance:
+                metrics.incr("ratelimits.sliding_windows.lease.unused", lease.balance)
+            return None
+
+        return lease
+
+    def _get_lease_size(self, quota: Quota, requested: int) -> int:
+        return max(requested, math.ceil(quota.limit * self.lease_fraction))
+
+    def check_within_quotas(
+        self, requests: Sequence[RequestedQuota], timestamp: Optional[Timestamp] = None
+    ) -> Tuple[Timestamp, Sequence[GrantedQuota]]:
+        if timestamp is None:
+            timestamp = int(time.time())
+        else:
+            timestamp = int(timestamp)
+
+        # How much of each lease is requested in total, as multiple requests
+        # may share quotas (e.g. through prefix overrides).
+        requested: MutableMapping[LeaseKey, int] = {}
+        for request in requests:
+            for quota in request.quotas:
+                key = self._get_lease_key(request, quota)
+                requested[key] = requested.get(key, 0) + request.requested
+
+        with self._lock:
+            available = {}
+            for key in requested:
+                lease = self._get_lease(key, timestamp)
+                available[key] = lease.balance if lease is not None else 0
+
+        # Refill all leases that can't serve their requests with a single
+        # call to the wrapped rate limiter.
+        refill_keys = [key for key, amount in requested.items() if available[key] < amount]
+        if refill_keys:
+            refills = [
+                RequestedQuota(
+                    prefix=prefix,
+                    requested=self._get_lease_size(quota, requested[(prefix, quota)]),
+                    quotas=[dataclasses.replace(quota, prefix_override=None)],
+                )
+                for prefix, quota in refill_keys
+            ]
+            _, refill_grants = self.rate_limiter.check_within_quotas(refills, timestamp)
+
+            leased = []
+            for key, refill, grant in zip(refill_keys, refills, refill_grants):
+                if grant.granted < refill.requested:
+                    # Close to the limit, which only the wrapped rate limiter
+                    # can enforce precisely. What's left of it is available,
+                    # and will be used through the wrapped rate limiter.
+                    available[key] += grant.granted
+                else:
+                    leased.append((key, refill, grant))
+
+            if leased:
+                self.rate_limiter.use_quotas(
+                    [refill for _, refill, _ in leased],
+                    [grant for _, _, grant in leased],
+                    timestamp,
+                )
+
+            with self._lock:
+                for key, refill, _ in leased:
+                    lease = self._get_lease(key, timestamp)
+                    if lease is None:
+                        lease = self._leases[key] = _Lease(
+                            granule=timestamp // key[1].granularity_seconds, balance=0
+                        )
+                    lease.balance += refill.requested
+                    available[key] += refill.requested
+
+            metrics.incr(
+                "ratelimits.sliding_windows.lease.refill", len(leased), tags={"result": "leased"}
+            )
+            metrics.incr(
+                "ratelimits.sliding_windows.lease.refill",
+                len(refills) - len(leased),
+                tags={"result": "exhausted"},
+            )
+        else:
+            metrics.incr("ratelimits.sliding_windows.lease.hit")
+
+        grants = []
+        for request in requests:
+            granted = request.requested
+            reached_quotas = []
+            for quota in request.quotas:
+                key = self._get_lease_key(request, quota)
+                if available[key] < granted:
+                    granted = available[key]
+                    reached_quotas.append(quota)
+
+            for quota in request.quotas:
+                available[self._get_lease_key(request, quota)] -= granted
+
+            grants.append(
+                GrantedQuota(prefix=request.prefix, granted=granted, reached_quotas=reached_quotas)
+            )
+
+        return timestamp, grants
+
+    def use_quotas(
+        self,
+        requests: Sequence[RequestedQuota],
+        grants: Sequence[GrantedQuota],
+        timestamp: Timestamp,
+    ) -> None:
+        assert len(requests) == len(grants)
+
+        # Whatever can't be deducted from a lease anymore (e.g. because the
+        # granule ended in the meantime) is used in the wrapped rate limiter.
+        unleased_requests: List[RequestedQuota] = []
+        unleased_grants: List[GrantedQuota] = []
+
+        with self._lock:
+            for request, grant in zip(requests, grants):
+                if not grant.granted:
+                    continue
+
+                for quota in request.quotas:
+                    key = self._get_lease_key(request, quota)
+                    lease = self._get_lease(key, timestamp)
+                    if lease is not None and lease.balance >= grant.granted:
+                        lease.balance -= grant.granted
+                        continue
+
+                    prefix, quota = key
+                    unleased_requests.append(
+                        RequestedQuota(
+                            prefix=prefix,
+                            requested=grant.granted,
+                            quotas=[dataclasses.replace(quota, prefix_override=None)],
+                        )
+                    )
+                    unleased_grants.append(
+                        GrantedQuota(prefix=prefix, granted=grant.granted, reached_quotas=[])
+                    )
+
+        if unleased_requests:
+            self.rate_limiter.use_quotas(unleased_requests, unleased_grants, timestamp)
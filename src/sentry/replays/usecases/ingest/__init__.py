@@ -17,6 +17,7 @@ from sentry.models.project import Project
 from sentry.replays.feature import has_feature_access
 from sentry.replays.lib.storage import RecordingSegmentStorageMeta, make_storage_driver
 from sentry.replays.usecases.ingest.dom_index import parse_and_emit_replay_actions
+from sentry.replays.usecases.ingest.stream import iter_recording_events
 from sentry.signals import first_replay_received
 from sentry.utils import json, metrics
 from sentry.utils.outcomes import Outcome, track_outcome
@@ -160,12 +161,18 @@ def decompress(data: bytes) -> bytes:
 
 
 def _report_size_metrics(
-    size_compressed: Optional[int] = None, size_uncompressed: Optional[int] = None
+    size_compressed: Optional[int] = None,
+    size_uncompressed: Optional[int] = None,
+    size_uncompressed_streamed: Optional[int] = None,
 ) -> None:
     if size_compressed:
         metrics.timing("replays.usecases.ingest.size_compressed", size_compressed)
     if size_uncompressed:
         metrics.timing("replays.usecases.ingest.size_uncompressed", size_uncompressed)
+    if size_uncompressed_streamed:
+        metrics.timing(
+            "replays.usecases.ingest.size_uncompressed_streamed", size_uncompressed_streamed
+        )
 
 
 def replay_click_post_processor(
@@ -182,11 +189,25 @@ def replay_click_post_processor(
         _report_size_metrics(size_compressed=len(segment_bytes))
         return None
 
+    _report_size_metrics(size_compressed=len(segment_bytes))
+
     try:
-        with metrics.timer("replays.usecases.ingest.decompress_and_parse"):
-            decompressed_segment = decompress(segment_bytes)
-            parsed_segment_data = json.loads(decompressed_segment, use_rapid_json=True)
-            _report_size_metrics(len(segment_bytes), len(decompressed_segment))
+        streamed = len(segment_bytes) >= options.get("replay.ingest.stream-min-size")
+        if streamed:
+            # Large segments are decompressed and decoded lazily, skipping over the DOM
+            # snapshots, and only as far as needed to find the user actions.
+            decompressed_size = 0
+
+            def count_decompressed(chunk: bytes) -> None:
+                nonlocal decompressed_size
+                decompressed_size += len(chunk)
+
+            segment_data = iter_recording_events(segment_bytes, on_chunk=count_decompressed)
+        else:
+            with metrics.timer("replays.usecases.ingest.decompress_and_parse"):
+                decompressed_segment = decompress(segment_bytes)
+                segment_data = json.loads(decompressed_segment, use_rapid_json=True)
+                decompressed_size = len(decompressed_segment)
 
         # Emit DOM search metadata to Clickhouse.
         with transaction.start_child(
@@ -197,8 +218,15 @@ def replay_click_post_processor(
                 retention_days=message.retention_days,
                 project_id=message.project_id,
                 replay_id=message.replay_id,
-                segment_data=parsed_segment_data,
+                segment_data=segment_data,
             )
+
+        # Of streamed segments, only the part read to find the user actions is decompressed,
+        # so their size is reported separately from that of fully decompressed segments.
+        if streamed:
+            _report_size_metrics(size_uncompressed_streamed=decompressed_size)
+        else:
+            _report_size_metrics(size_uncompressed=decompressed_size)
     except Exception:
         logging.exception(
             "Failed to parse recording org={}, project={}, replay={}, segment={}".format(
@@ -3,7 +3,7 @@ import random
 import time
 import uuid
 from hashlib import md5
-from typing import Any, Dict, List, Literal, Optional, TypedDict, cast
+from typing import Any, Dict, Iterable, List, Literal, Optional, TypedDict, cast
 
 from django.conf import settings
 
@@ -56,7 +56,7 @@ def parse_and_emit_replay_actions(
     project_id: int,
     replay_id: str,
     retention_days: int,
-    segment_data: List[Dict[str, Any]],
+    segment_data: Iterable[Dict[str, Any]],
 ) -> None:
     with metrics.timer("replays.usecases.ingest.dom_index.parse_and_emit_replay_actions"):
         message = parse_replay_actions(project_id, replay_id, retention_days, segment_data)
@@ -69,7 +69,7 @@ def parse_replay_actions(
     project_id: int,
     replay_id: str,
     retention_days: int,
-    segment_data: List[Dict[str, Any]],
+    segment_data: Iterable[Dict[str, Any]],
 ) -> Optional[ReplayActionsEvent]:
     """Parse RRWeb payload to ReplayActionsEvent."""
     actions = get_user_actions(project_id, replay_id, segment_data)
@@ -110,7 +110,7 @@ def create_replay_actions_payload(
 def get_user_actions(
     project_id: int,
     replay_id: str,
-    events: List[Dict[str, Any]],
+    events: Iterable[Dict[str, Any]],
 ) -> List[ReplayActionsEventPayloadClick]:
     """Return a list of ReplayActionsEventPayloadClick types.
 
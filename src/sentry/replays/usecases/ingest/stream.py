@@ -0,0 +1,124 @@
+"""Incremental parsing of recording segments.
+
+Recording segments are JSON arrays of RRWeb events. Ingest only looks at custom events (breadcrumbs,
+performance spans, SDK options) but a segment can also contain full DOM snapshots which are often
+tens of megabytes once decompressed. Rather than decompressing and decoding the whole segment, the
+segment is decompressed a chunk at a time and split into its top-level events. Events which are of
+no interest to ingest are skipped without being buffered or decoded.
+
+Finding the events takes more CPU than decoding a segment with rapidjson, so this is only worth it
+for large segments.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Any, Callable, Collection, Dict, Iterator, Optional
+
+from sentry.utils import json
+
+# Size of the chunks the segment is read and decompressed in.
+CHUNK_SIZE = 64 * 1024
+
+# RRWeb event type of custom events (breadcrumbs, performance spans, ...).
+CUSTOM_EVENT_TYPE = 5
+
+# The SDK serializes the type of an event first, which lets us skip events without buffering them.
+_EVENT_TYPE_RE = re.compile(rb'\{\s*"type"\s*:\s*(\d+)\s*[,}]')
+# Bytes needed to see the type of an event written as above.
+_EVENT_TYPE_PREFIX_SIZE = 32
+
+
+def iter_decompressed_chunks(data: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the decompressed segment in chunks of at most `chunk_size` bytes."""
+    if data.startswith(b"["):
+        view = memoryview(data)
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start : start + chunk_size])
+        return
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        chunk = decompressor.decompress(view[start : start + chunk_size], chunk_size)
+        while chunk:
+            yield chunk
+            chunk = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+
+    chunk = decompressor.flush()
+    if chunk:
+        yield chunk
+    if not decompressor.eof:
+        raise zlib.error("Incomplete or truncated stream")
+
+
+class EventArrayScanner:
+    """Split a JSON array of objects into its elements as the bytes of the array come in.
+
+    Elements are yielded as raw bytes. When `event_types` is given, elements whose leading
+    `"type"` key is not one of them are skipped: at most one chunk of them is ever buffered.
+    """
+
+    def __init__(self, event_types: Optional[Collection[int]] = None) -> None:
+        self.event_types = event_types
+        self.brackets = json.BracketScanner()
+        # Bytes of the current element, None when outside of an element or skipping it.
+        self.element: Optional[bytearray] = None
+        self.checked_type = False
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        element_start = 0
+
+        for pos, opening in self.brackets.scan(chunk):
+            if opening:
+                if self.brackets.depth == 2:
+                    # Start of an element of the top-level array.
+                    self.element = bytearray()
+                    self.checked_type = False
+                    element_start = pos
+            elif self.brackets.depth == 1 and self.element is not None:
+                self.element += chunk[element_start : pos + 1]
+                if self._is_wanted(self.element):
+                    yield bytes(self.element)
+                self.element = None
+
+        if self.element is not None:
+            self.element += chunk[element_start:]
+            if not self.checked_type and len(self.element) >= _EVENT_TYPE_PREFIX_SIZE:
+                self.checked_type = True
+                if not self._is_wanted(self.element):
+                    self.element = None
+
+    def close(self) -> None:
+        self.brackets.close()
+
+    def _is_wanted(self, element: bytearray) -> bool:
+        if self.event_types is None:
+            return True
+        match = _EVENT_TYPE_RE.match(element)
+        # Events which don't start with their type are decoded to be safe.
+        return match is None or int(match.group(1)) in self.event_types
+
+
+def iter_recording_events(
+    data: bytes,
+    event_types: Optional[Collection[int]] = (CUSTOM_EVENT_TYPE,),
+    on_chunk: Optional[Callable[[bytes], None]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Decode the events of a recording segment lazily.
+
+    Only events of the given RRWeb types are decoded (all events when `event_types` is None), and
+    the segment is only decompressed as far as the consumer iterates. `on_chunk` is called with
+    every decompressed chunk.
+    """
+    scanner = EventArrayScanner(event_types)
+    for chunk in iter_decompressed_chunks(data):
+        if on_chunk is not None:
+            on_chunk(chunk)
+        for element in scanner.feed(chunk):
+            event = json.loads(element, use_rapid_json=True)
+            if isinstance(event, dict) and (
+                event_types is None or event.get("type") in event_types
+            ):
+                yield event
+    scanner.close()
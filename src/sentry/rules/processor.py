@@ -1,19 +1,34 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import timedelta
 from random import randrange
-from typing import Any, Callable, Iterable, List, Mapping, MutableMapping, Sequence, Set, Tuple
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from django.core.cache import cache
 from django.utils import timezone
 
 from sentry import analytics
 from sentry.eventstore.models import GroupEvent
-from sentry.models import Environment, GroupRuleStatus, Rule
+from sentry.models import Environment, GroupRuleStatus, Project, Rule
 from sentry.models.rulesnooze import RuleSnooze
-from sentry.rules import EventState, history, rules
+from sentry.rules import EventState, RuleBase, history, rules
 from sentry.types.rules import RuleFuture
+from sentry.utils import metrics
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
 
@@ -37,6 +52,10 @@ def is_condition_slow(condition: Mapping[str, str]) -> bool:
     return False
 
 
+def build_rule_status_cache_key(group_id: int, rule_id: int) -> str:
+    return "grouprulestatus:1:%s" % hash_values([group_id, rule_id])
+
+
 class RuleProcessor:
     logger = logging.getLogger("sentry.rules")
 
@@ -47,6 +66,7 @@ class RuleProcessor:
         is_regression: bool,
         is_new_group_environment: bool,
         has_reappeared: bool,
+        batch: BatchRuleProcessor | None = None,
     ) -> None:
         self.event = event
         self.group = event.group
@@ -56,6 +76,11 @@ class RuleProcessor:
         self.is_regression = is_regression
         self.is_new_group_environment = is_new_group_environment
         self.has_reappeared = has_reappeared
+        # The rules and snoozes of the batch are only complete for the
+        # projects it prefetched.
+        if batch is not None and self.project.id not in batch.rules_by_project:
+            batch = None
+        self.batch = batch
 
         self.grouped_futures: MutableMapping[
             str, Tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], List[RuleFuture]]
@@ -63,13 +88,23 @@ class RuleProcessor:
 
     def get_rules(self) -> Sequence[Rule]:
         """Get all of the rules for this project from the DB (or cache)."""
+        if self.batch is not None:
+            return self.batch.get_rules(self.project.id)
         rules_: Sequence[Rule] = Rule.get_for_project(self.project.id)
         return rules_
 
     def _build_rule_status_cache_key(self, rule_id: int) -> str:
-        return "grouprulestatus:1:%s" % hash_values([self.group.id, rule_id])
+        return build_rule_status_cache_key(self.group.id, rule_id)
 
     def bulk_get_rule_status(self, rules: Sequence[Rule]) -> Mapping[int, GroupRuleStatus]:
+        if self.batch is not None:
+            batch_statuses = self.batch.get_rule_statuses(self.group.id)
+            # The group may not have been prefetched, e.g. when it was only
+            # unresolved after the batch was built.
+            if all(rule.id in batch_statuses for rule in rules):
+                return batch_statuses
+            metrics.incr("rules.batch_processor.rule_status_fallback")
+
         keys = [self._build_rule_status_cache_key(rule.id) for rule in rules]
         cache_results: Mapping[str, GroupRuleStatus] = cache.get_many(keys)
         missing_rule_ids: Set[int] = set()
@@ -130,17 +165,27 @@ class RuleProcessor:
     def condition_matches(
         self, condition: Mapping[str, Any], state: EventState, rule: Rule
     ) -> bool | None:
-        condition_cls = rules.get(condition["id"])
-        if condition_cls is None:
-            self.logger.warning("Unregistered condition %r", condition["id"])
+        if self.batch is not None:
+            condition_inst = self.batch.get_condition_instance(condition, rule, self.project)
+        else:
+            condition_inst = self.build_condition_instance(condition, rule)
+        if condition_inst is None:
             return None
 
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
         passes: bool = safe_execute(
             condition_inst.passes, self.event, state, _with_transaction=False
         )
         return passes
 
+    def build_condition_instance(self, condition: Mapping[str, Any], rule: Rule) -> RuleBase | None:
+        condition_cls = rules.get(condition["id"])
+        if condition_cls is None:
+            self.logger.warning("Unregistered condition %r", condition["id"])
+            return None
+
+        condition_inst: RuleBase = condition_cls(self.project, data=condition, rule=rule)
+        return condition_inst
+
     def get_rule_type(self, condition: Mapping[str, Any]) -> str | None:
         rule_cls = rules.get(condition["id"])
         if rule_cls is None:
@@ -222,6 +267,11 @@ class RuleProcessor:
         if not updated:
             return
 
+        # Keep the status in sync with the database, so that later events for
+        # this group evaluated from the same status object are throttled
+        # without another query.
+        status.last_active = now
+
         if randrange(10) == 0:
             analytics.record(
                 "issue_alert.fired",
@@ -268,12 +318,277 @@ class RuleProcessor:
 
         self.grouped_futures.clear()
         rules = self.get_rules()
-        snoozed_rules = RuleSnooze.objects.filter(rule__in=rules, user_id=None).values_list(
-            "rule", flat=True
-        )
+        snoozed_rules: Collection[int]
+        if self.batch is not None:
+            snoozed_rules = self.batch.snoozed_rule_ids
+        else:
+            snoozed_rules = RuleSnooze.objects.filter(rule__in=rules, user_id=None).values_list(
+                "rule", flat=True
+            )
         rule_statuses = self.bulk_get_rule_status(rules)
         for rule in rules:
             if rule.id not in snoozed_rules:
                 self.apply_rule(rule, rule_statuses[rule.id])
 
         return self.grouped_futures.values()
+
+
+class RuleProcessorJob(NamedTuple):
+    event: GroupEvent
+    is_new: bool
+    is_regression: bool
+    is_new_group_environment: bool
+    has_reappeared: bool
+
+
+class ProjectRuleCache:
+    """
+    Process wide cache of the active rules of projects, and of the condition
+    instances built for them.
+
+    Batches sharing the cache only fetch the rules of a project and build its
+    conditions once every `ttl` seconds, rather than once per batch. Rule
+    changes are picked up after at most `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 10, max_projects: int = 1000) -> None:
+        self.ttl = ttl
+        self.max_projects = max_projects
+        # Keyed by project id, in the order the entries were fetched.
+        self._entries: Dict[
+            int,
+            Tuple[float, Sequence[Rule], Dict[Tuple[int, int], Tuple[Any, RuleBase | None]]],
+        ] = {}
+
+    def get_rules(self, project_ids: Collection[int]) -> Mapping[int, Sequence[Rule]]:
+        now = time.monotonic()
+        rules_by_project = {}
+        missing = set()
+        for project_id in project_ids:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry[0] > now:
+                rules_by_project[project_id] = entry[1]
+            else:
+                missing.add(project_id)
+
+        metrics.incr(
+            "rules.project_rule_cache", amount=len(rules_by_project), tags={"result": "hit"}
+        )
+        metrics.incr("rules.project_rule_cache", amount=len(missing), tags={"result": "miss"})
+        if missing:
+            fetched = Rule.get_for_projects(missing)
+            for project_id, rules_ in fetched.items():
+                self._set(project_id, now + self.ttl, rules_)
+            rules_by_project.update(fetched)
+        return rules_by_project
+
+    def get_condition_instances(
+        self, project_id: int
+    ) -> MutableMapping[Tuple[int, int], Tuple[Any, RuleBase | None]]:
+        entry = self._entries.get(project_id)
+        # Instances of evicted projects are simply not kept.
+        return entry[2] if entry is not None else {}
+
+    def _set(self, project_id: int, expires_at: float, rules_: Sequence[Rule]) -> None:
+        self._entries.pop(project_id, None)
+        if len(self._entries) >= self.max_projects:
+            # Evict the entry fetched longest ago.
+            self._entries.pop(next(iter(self._entries)), None)
+        self._entries[project_id] = (expires_at, rules_, {})
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+project_rule_cache = ProjectRuleCache()
+
+
+class BatchRuleProcessor:
+    """
+    Evaluates alert rules for many events at once.
+
+    `RuleProcessor` fetches rules, snoozes and `GroupRuleStatus` rows for every
+    event it processes. When many events hit the same handful of rules, this
+    overhead dominates, so the batch processor fetches all of them for the
+    whole batch up front (one cache round-trip and at most a couple of queries
+    per kind), and instantiates each rule condition only once. Given a
+    `ProjectRuleCache`, rules and condition instances are also shared with the
+    other batches of the process.
+
+    Events are still evaluated one by one, in the order given, with the exact
+    same semantics as `RuleProcessor.apply`.
+    """
+
+    logger = logging.getLogger("sentry.rules")
+
+    def __init__(
+        self, jobs: Sequence[RuleProcessorJob], rule_cache: ProjectRuleCache | None = None
+    ) -> None:
+        self.jobs = jobs
+        self.rule_cache = rule_cache
+        self.rules_by_project: Mapping[int, Sequence[Rule]] = {}
+        self.rule_statuses: MutableMapping[int, MutableMapping[int, GroupRuleStatus]] = {}
+        self.snoozed_rule_ids: Set[int] = set()
+        # Keyed by the rule and the identity of the condition data within it,
+        # along with the condition data the instance was built from.
+        self._condition_instances: Dict[Tuple[int, int], Tuple[Any, RuleBase | None]] = {}
+
+    def get_rules(self, project_id: int) -> Sequence[Rule]:
+        return self.rules_by_project.get(project_id, [])
+
+    def get_rule_statuses(self, group_id: int) -> Mapping[int, GroupRuleStatus]:
+        return self.rule_statuses.get(group_id, {})
+
+    def get_condition_instance(
+        self, condition: Mapping[str, Any], rule: Rule, project: Project
+    ) -> RuleBase | None:
+        if self.rule_cache is not None:
+            instances = self.rule_cache.get_condition_instances(project.id)
+        else:
+            instances = self._condition_instances
+
+        key = (rule.id, id(condition))
+        cached = instances.get(key)
+        # The identity of a condition can be reused once its rule is gone, so
+        # make sure the instance was built from this very condition.
+        if cached is not None and cached[0] is condition:
+            return cached[1]
+
+        condition_inst = None
+        condition_cls = rules.get(condition["id"])
+        if condition_cls is None:
+            self.logger.warning("Unregistered condition %r", condition["id"])
+        else:
+            condition_inst = condition_cls(project, data=condition, rule=rule)
+        instances[key] = (condition, condition_inst)
+        return condition_inst
+
+    def prefetch_unresolved(self) -> None:
+        """
+        Prefetch everything needed to apply the rules to the jobs whose group
+        is unresolved.
+        """
+        # we should only apply rules on unresolved issues
+        jobs = [job for job in self.jobs if job.event.group.is_unresolved()]
+        with metrics.timer("rules.batch_processor.prefetch"):
+            self.prefetch(jobs)
+
+    def prefetch(self, jobs: Sequence[RuleProcessorJob]) -> None:
+        project_ids = {job.event.project_id for job in jobs}
+        if self.rule_cache is not None:
+            self.rules_by_project = self.rule_cache.get_rules(project_ids)
+        else:
+            self.rules_by_project = Rule.get_for_projects(project_ids)
+        all_rules = [rule for rules_ in self.rules_by_project.values() for rule in rules_]
+        if not all_rules:
+            return
+
+        self.snoozed_rule_ids = set(
+            RuleSnooze.objects.filter(rule__in=all_rules, user_id=None).values_list(
+                "rule", flat=True
+            )
+        )
+
+        pairs = {
+            (job.event.group.id, rule.id): job.event.group
+            for job in jobs
+            for rule in self.get_rules(job.event.project_id)
+        }
+        for (group_id, rule_id), status in self._bulk_get_rule_statuses(pairs).items():
+            self.rule_statuses.setdefault(group_id, {})[rule_id] = status
+
+    def _bulk_get_rule_statuses(
+        self, pairs: Mapping[Tuple[int, int], Any]
+    ) -> Mapping[Tuple[int, int], GroupRuleStatus]:
+        keys = {
+            build_rule_status_cache_key(group_id, rule_id): (group_id, rule_id)
+            for group_id, rule_id in pairs
+        }
+        cache_results: Mapping[str, GroupRuleStatus] = cache.get_many(list(keys))
+        rule_statuses: MutableMapping[Tuple[int, int], GroupRuleStatus] = {
+            keys[key]: status for key, status in cache_results.items() if status
+        }
+        missing = set(pairs) - set(rule_statuses)
+        metrics.incr(
+            "rules.batch_processor.rule_status_cache",
+            amount=len(rule_statuses),
+            tags={"result": "hit"},
+        )
+        metrics.incr(
+            "rules.batch_processor.rule_status_cache", amount=len(missing), tags={"result": "miss"}
+        )
+        if not missing:
+            return rule_statuses
+
+        to_cache: List[GroupRuleStatus] = []
+
+        def fetch_missing() -> None:
+            statuses = GroupRuleStatus.objects.filter(
+                group_id__in={group_id for group_id, _ in missing},
+                rule_id__in={rule_id for _, rule_id in missing},
+            )
+            for status in statuses:
+                key = (status.group_id, status.rule_id)
+                if key in missing:
+                    rule_statuses[key] = status
+                    missing.remove(key)
+                    to_cache.append(status)
+
+        fetch_missing()
+        if missing:
+            # We use `ignore_conflicts=True` here to avoid race conditions where the statuses
+            # might be created between when we queried above and attempt to create the rows now.
+            GroupRuleStatus.objects.bulk_create(
+                [
+                    GroupRuleStatus(
+                        rule_id=rule_id,
+                        group=pairs[(group_id, rule_id)],
+                        project_id=pairs[(group_id, rule_id)].project_id,
+                    )
+                    for group_id, rule_id in missing
+                ],
+                ignore_conflicts=True,
+            )
+            # Using `ignore_conflicts=True` prevents the pk from being set on the model instances.
+            # Re-query the database to fetch the rows, they should all exist at this point.
+            fetch_missing()
+            if missing:
+                # Shouldn't happen, but log just in case
+                self.logger.error(
+                    "Failed to fetch some GroupRuleStatuses in BatchRuleProcessor",
+                    extra={"missing": sorted(missing)},
+                )
+
+        if to_cache:
+            cache.set_many(
+                {
+                    build_rule_status_cache_key(item.group_id, item.rule_id): item
+                    for item in to_cache
+                }
+            )
+        return rule_statuses
+
+    def apply(
+        self,
+    ) -> Sequence[
+        Iterable[Tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], List[RuleFuture]]]
+    ]:
+        """
+        Apply the rules to every job of the batch, returning the grouped
+        futures of each job in the same order as the jobs.
+        """
+        self.prefetch_unresolved()
+
+        results = []
+        for job in self.jobs:
+            rp = RuleProcessor(
+                job.event,
+                is_new=job.is_new,
+                is_regression=job.is_regression,
+                is_new_group_environment=job.is_new_group_environment,
+                has_reappeared=job.has_reappeared,
+                batch=self,
+            )
+            results.append(rp.apply())
+        metrics.incr("rules.batch_processor.events", amount=len(self.jobs))
+        return results
@@ -0,0 +1,103 @@
+import os
+from datetime import timedelta
+
+import click
+
+from sentry.runner.decorators import configuration
+
+
+@click.group()
+def nodestore():
+    """Tools for interacting with nodestore."""
+
+
+@nodestore.command("train-dictionary")
+@click.argument("platform")
+@click.option(
+    "--project",
+    "project_ids",
+    type=int,
+    multiple=True,
+    required=True,
+    help="Project to sample events from. Can be passed multiple times.",
+)
+@click.option("--samples", default=5000, show_default=True, help="Number of events to sample.")
+@click.option("--days", default=7, show_default=True, help="Sample events of the last N days.")
+@click.option(
+    "--dict-size",
+    default=112640,
+    show_default=True,
+    help="Maximum size of the dictionary in bytes.",
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Where to write the dictionary. Defaults to SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR.",
+)
+@configuration
+def train_dictionary(platform, project_ids, samples, days, dict_size, output_dir):
+    """
+    Train a zstd dictionary for compressing nodestore blobs of PLATFORM.
+
+    Pass "default" as the platform to train the dictionary used for platforms
+    without a dictionary of their own, in which case events of any platform
+    are sampled.
+    """
+    from django.conf import settings
+    from django.utils import timezone
+
+    from sentry import eventstore, nodestore
+    from sentry.eventstore.models import Event
+    from sentry.nodestore.compression import DEFAULT_PLATFORM, dictionary_filename, train_dictionary
+    from sentry.utils.iterators import chunked
+
+    output_dir = output_dir or settings.SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR
+    if not output_dir:
+        raise click.ClickException(
+            "No output directory, pass --output-dir or set SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR."
+        )
+
+    now = timezone.now()
+    conditions = [] if platform == DEFAULT_PLATFORM else [["platform", "=", platform]]
+    snuba_filter = eventstore.Filter(
+        project_ids=list(project_ids),
+        conditions=conditions,
+        start=now - timedelta(days=days),
+        end=now,
+    )
+
+    node_ids = []
+    page_size = min(samples, 1000)
+    while len(node_ids) < samples:
+        events = eventstore.backend.get_unfetched_events(
+            filter=snuba_filter,
+            limit=page_size,
+            offset=len(node_ids),
+            referrer="nodestore.train_dictionary",
+        )
+        node_ids.extend(Event.generate_node_id(e.project_id, e.event_id) for e in events)
+        if len(events) < page_size:
+            break
+
+    if not node_ids:
+        raise click.ClickException("No events found to sample.")
+
+    blobs = []
+    for chunk in chunked(node_ids[:samples], 100):
+        for value in nodestore.backend._get_bytes_multi(chunk).values():
+            if value:
+                blobs.append(nodestore.backend._decompress(value))
+
+    click.echo(f"Training dictionary for {platform!r} from {len(blobs)} events...")
+    dictionary = train_dictionary(blobs, dict_size)
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, dictionary_filename(platform, dictionary))
+    with open(path, "wb") as f:
+        f.write(dictionary.as_bytes())
+
+    sample_size = sum(len(blob) for blob in blobs)
+    click.echo(f"Wrote {path} ({len(dictionary)} bytes, sampled {sample_size} bytes).")
+    click.echo(
+        "Distribute it to every process reading from nodestore before restarting the writers."
+    )
@@ -84,6 +84,19 @@ local function variadic_argument_parser(argument_parser)
     end
 end
 
+local function sized_argument_parser(argument_parser)
+    -- Parses a count, followed by that many arguments.
+    return function (cursor, arguments)
+        local size = tonumber(arguments[cursor])
+        cursor = cursor + 1
+        local results = {}
+        for i = 1, size do
+            cursor, results[i] = argument_parser(cursor, arguments)
+        end
+        return cursor, results
+    end
+end
+
 local function multiple_argument_parser(...)
     local parsers = {...}
     return function (cursor, arguments)
@@ -338,6 +351,47 @@ local function close_digest(configuration, timeline_id, delay_minimum, record_id
     end
 end
 
+local function get_timeline_lock_key(configuration, lock, timeline_id)
+    return lock.prefix .. configuration:get_timeline_key(timeline_id)
+end
+
+local function open_digests(configuration, timeline_capacity, lock, timeline_ids)
+    -- Opens the digests of all timelines that are in the ready state, taking
+    -- the same lock as the one held by single digest operations. Timelines
+    -- that are not ready or locked are skipped rather than raising an error.
+    local results = {}
+    for i, timeline_id in ipairs(timeline_ids) do
+        local state = 'ready'
+        local records = {}
+        if redis.call('ZSCORE', configuration:get_schedule_ready_key(), timeline_id) == false then
+            state = 'invalid_state'
+        elseif not redis.call('SET', get_timeline_lock_key(configuration, lock, timeline_id), lock.value, 'EX', lock.duration, 'NX') then
+            state = 'locked'
+        else
+            records = digest_timeline(configuration, timeline_id, timeline_capacity)
+        end
+        results[i] = {timeline_id, state, records}
+    end
+    return results
+end
+
+local function close_digests(configuration, lock, digests)
+    -- Closes the digests and releases their locks, returning the IDs of the
+    -- timelines that were closed. Writes done by a script are kept even if
+    -- it fails, so one digest failing to close doesn't fail the others.
+    local closed = {}
+    for _, digest in ipairs(digests) do
+        if pcall(close_digest, configuration, digest.timeline_id, digest.delay_minimum, digest.record_ids) then
+            local lock_key = get_timeline_lock_key(configuration, lock, digest.timeline_id)
+            if redis.call('GET', lock_key) == lock.value then
+                redis.call('DEL', lock_key)
+            end
+            table.insert(closed, digest.timeline_id)
+        end
+    end
+    return closed
+end
+
 local function delete_timeline(configuration, timeline_id)
     truncate_timeline(configuration, timeline_id, 0)
     truncate_digest(configuration, timeline_id, 0)
@@ -383,6 +437,12 @@ local configuration_argument_parser = object_argument_parser({
     return configuration
 end)
 
+local lock_argument_parser = object_argument_parser({
+    {"prefix", argument_parser()},
+    {"value", argument_parser()},
+    {"duration", argument_parser(tonumber)},
+})
+
 local commands = {
     SCHEDULE = function (cursor, arguments)
         local cursor, configuration, deadline = multiple_argument_parser(
@@ -448,6 +508,29 @@ local commands = {
         )(cursor, arguments)
         return close_digest(configuration, timeline_id, delay_minimum, record_ids)
     end,
+    DIGEST_OPEN_MANY = function (cursor, arguments)
+        local cursor, configuration, timeline_capacity, lock, timeline_ids = multiple_argument_parser(
+            configuration_argument_parser,
+            argument_parser(tonumber),
+            lock_argument_parser,
+            variadic_argument_parser(argument_parser())
+        )(cursor, arguments)
+        return open_digests(configuration, timeline_capacity, lock, timeline_ids)
+    end,
+    DIGEST_CLOSE_MANY = function (cursor, arguments)
+        local cursor, configuration, lock, digests = multiple_argument_parser(
+            configuration_argument_parser,
+            lock_argument_parser,
+            variadic_argument_parser(
+                object_argument_parser({
+                    {"timeline_id", argument_parser()},
+                    {"delay_minimum", argument_parser(tonumber)},
+                    {"record_ids", sized_argument_parser(argument_parser())},
+                })
+            )
+        )(cursor, arguments)
+        return close_digests(configuration, lock, digests)
+    end,
 }
 
 local cursor, command = argument_parser(
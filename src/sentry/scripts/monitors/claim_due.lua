@@ -0,0 +1,15 @@
+-- Claim the members of a sorted set scored below a bound by moving them to a
+-- later score (a lease), and return them with their previous scores.
+assert(#KEYS == 1, "provide exactly one sorted set key")
+assert(#ARGV == 2, "provide the (exclusive) bound and the end of the lease")
+
+local key = KEYS[1]
+local max_score = ARGV[1]
+local lease_until = tonumber(ARGV[2])
+
+local due = redis.call("ZRANGEBYSCORE", key, "-inf", max_score, "WITHSCORES")
+for i = 1, #due, 2 do
+    redis.call("ZADD", key, lease_until, due[i])
+end
+
+return due
@@ -0,0 +1,9 @@
+-- Returns the estimated cardinality of each HyperLogLog in KEYS, in order.
+--
+-- Calling `PFCOUNT` with multiple keys returns the cardinality of their union,
+-- so this is used to fetch a whole distinct counter series in a single call.
+local counts = {}
+for i, key in ipairs(KEYS) do
+    counts[i] = redis.call('PFCOUNT', key)
+end
+return counts
@@ -6,6 +6,7 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Iterator,
     List,
     Mapping,
     Match,
@@ -87,6 +88,7 @@ from sentry.utils.snuba import (
     is_span_op_breakdown,
     raw_snql_query,
     resolve_column,
+    stream_snql_query,
 )
 from sentry.utils.validators import INVALID_ID_DETAILS, INVALID_SPAN_ID, WILDCARD_NOT_ALLOWED
 
@@ -1529,23 +1531,66 @@ class QueryBuilder(BaseQueryBuilder):
             InvalidSearchQuery("Query missing referrer.")
         return raw_snql_query(self.get_snql_query(), referrer, use_cache)
 
+    def run_query_stream(self, referrer: str) -> Iterator[Dict[str, Any]]:
+        """
+        Like `process_results(run_query(referrer))["data"]`, but the rows are
+        decoded and processed one at a time as they are read from Snuba.
+        """
+        translated_columns = self.get_translated_columns()
+        for row in stream_snql_query(self.get_snql_query(), referrer):
+            yield self.process_row(row, translated_columns)
+
+    def get_translated_columns(self) -> Dict[str, str]:
+        """Map the result columns to the names the caller asked for."""
+        translated_columns = {}
+        if self.transform_alias_to_input_format:
+            translated_columns = {
+                column: function_details.field
+                for column, function_details in self.function_alias_map.items()
+            }
+            if self.raw_equations:
+                for index, equation in enumerate(self.raw_equations):
+                    translated_columns[f"equation[{index}]"] = f"equation|{equation}"
+        return translated_columns
+
+    def process_row(
+        self, row: Dict[str, Any], translated_columns: Dict[str, str]
+    ) -> Dict[str, Any]:
+        transformed = {}
+        for key, value in row.items():
+            if isinstance(value, float):
+                # 0 for nan, and none for inf were chosen arbitrarily, nan and inf are invalid json
+                # so needed to pick something valid to use instead
+                if math.isnan(value):
+                    value = 0
+                elif math.isinf(value):
+                    value = None
+                value = self.handle_invalid_float(value)
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    if isinstance(item, float):
+                        value[index] = self.handle_invalid_float(item)
+            if key in self.value_resolver_map:
+                new_value = self.value_resolver_map[key](value)
+            else:
+                new_value = value
+
+            resolved_key = translated_columns.get(key, key)
+            if not self.skip_tag_resolution:
+                resolved_key = self.prefixed_to_tag_map.get(resolved_key, resolved_key)
+            transformed[resolved_key] = new_value
+
+        return transformed
+
     def process_results(self, results: Any) -> EventsResponse:
         with sentry_sdk.start_span(op="QueryBuilder", description="process_results") as span:
             span.set_data("result_count", len(results.get("data", [])))
-            translated_columns = {}
+            translated_columns = self.get_translated_columns()
             if self.transform_alias_to_input_format:
-                translated_columns = {
-                    column: function_details.field
-                    for column, function_details in self.function_alias_map.items()
-                }
-
                 self.function_alias_map = {
                     translated_columns.get(column, column): function_details
                     for column, function_details in self.function_alias_map.items()
                 }
-                if self.raw_equations:
-                    for index, equation in enumerate(self.raw_equations):
-                        translated_columns[f"equation[{index}]"] = f"equation|{equation}"
 
             # process the field meta
             field_meta: Dict[str, str] = {}
@@ -1565,35 +1610,8 @@ class QueryBuilder(BaseQueryBuilder):
                             field_meta[field_key] = "string"
 
             # process the field results
-            def get_row(row: Dict[str, Any]) -> Dict[str, Any]:
-                transformed = {}
-                for key, value in row.items():
-                    if isinstance(value, float):
-                        # 0 for nan, and none for inf were chosen arbitrarily, nan and inf are invalid json
-                        # so needed to pick something valid to use instead
-                        if math.isnan(value):
-                            value = 0
-                        elif math.isinf(value):
-                            value = None
-                        value = self.handle_invalid_float(value)
-                    if isinstance(value, list):
-                        for index, item in enumerate(value):
-                            if isinstance(item, float):
-                                value[index] = self.handle_invalid_float(item)
-                    if key in self.value_resolver_map:
-                        new_value = self.value_resolver_map[key](value)
-                    else:
-                        new_value = value
-
-                    resolved_key = translated_columns.get(key, key)
-                    if not self.skip_tag_resolution:
-                        resolved_key = self.prefixed_to_tag_map.get(resolved_key, resolved_key)
-                    transformed[resolved_key] = new_value
-
-                return transformed
-
             return {
-                "data": [get_row(row) for row in results["data"]],
+                "data": [self.process_row(row, translated_columns) for row in results["data"]],
                 "meta": {
                     "fields": field_meta,
                     "tips": {},
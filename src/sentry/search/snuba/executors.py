@@ -4,6 +4,8 @@ import functools
 import logging
 import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 from hashlib import md5
@@ -13,6 +15,7 @@ from typing import Any, List, Mapping, Optional, Sequence, Set, Tuple, TypedDict
 import sentry_sdk
 from django.db.models import Q
 from django.utils import timezone
+from sentry_sdk import Hub
 from snuba_sdk import (
     Column,
     Condition,
@@ -97,6 +100,22 @@ class BetterPriorityParams:
     normalize: bool
 
 
+@dataclass(frozen=True)
+class PreparedSnubaSearch:
+    """The Snuba queries of a search, one per group category, ready to be executed."""
+
+    query_params_for_categories: Mapping[int, SnubaQueryParams]
+    referrer: str
+    sort_field: str
+    get_sample: bool
+
+
+# Runs the Snuba queries of a search which can happen concurrently with the rest of the search
+# (e.g. the hits sample), bounding how many extra threads a search can occupy. The queries of
+# each search are themselves fanned out per group category by `bulk_raw_query`.
+_search_thread_pool = ThreadPoolExecutor(max_workers=10)
+
+
 def get_search_filter(
     search_filters: Optional[Sequence[SearchFilter]], name: str, operator: str
 ) -> Optional[Any]:
@@ -381,6 +400,59 @@ class AbstractQueryExecutor(metaclass=ABCMeta):
             * a sorted list of (group_id, group_score) tuples sorted descending by score,
             * the count of total results (rows) available for this query.
         """
+        return self._execute_snuba_search(
+            self._prepare_snuba_search(
+                start=start,
+                end=end,
+                project_ids=project_ids,
+                environment_ids=environment_ids,
+                sort_field=sort_field,
+                organization=organization,
+                cursor=cursor,
+                group_ids=group_ids,
+                limit=limit,
+                offset=offset,
+                get_sample=get_sample,
+                search_filters=search_filters,
+                referrer=referrer,
+                actor=actor,
+                aggregate_kwargs=aggregate_kwargs,
+            )
+        )
+
+    def submit_snuba_search(self, **kwargs: Any) -> Future[Tuple[List[Tuple[int, Any]], int]]:
+        """Like `snuba_search`, but runs the Snuba queries in the background.
+
+        Everything that needs the database is done before returning, only the Snuba queries run
+        on the search thread pool.
+        """
+        prepared = self._prepare_snuba_search(**kwargs)
+        hub = Hub(Hub.current)
+
+        def execute() -> Tuple[List[Tuple[int, Any]], int]:
+            with hub:
+                return self._execute_snuba_search(prepared)
+
+        return _search_thread_pool.submit(execute)
+
+    def _prepare_snuba_search(
+        self,
+        start: datetime,
+        end: datetime,
+        project_ids: Sequence[int],
+        environment_ids: Optional[Sequence[int]],
+        sort_field: str,
+        organization: Organization,
+        cursor: Optional[Cursor] = None,
+        group_ids: Optional[Sequence[int]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        get_sample: bool = False,
+        search_filters: Optional[Sequence[SearchFilter]] = None,
+        referrer: Optional[str] = None,
+        actor: Optional[Any] = None,
+        aggregate_kwargs: Optional[PrioritySortWeights] = None,
+    ) -> PreparedSnubaSearch:
         filters = {"project_id": project_ids}
 
         environments = None
@@ -460,6 +532,21 @@ class AbstractQueryExecutor(metaclass=ABCMeta):
             if query_params is not None
         }
 
+        return PreparedSnubaSearch(
+            query_params_for_categories=query_params_for_categories,
+            referrer=referrer,
+            sort_field="sample" if get_sample else sort_field,
+            get_sample=get_sample,
+        )
+
+    def _execute_snuba_search(
+        self, prepared: PreparedSnubaSearch
+    ) -> Tuple[List[Tuple[int, Any]], int]:
+        query_params_for_categories = prepared.query_params_for_categories
+        referrer = prepared.referrer
+        get_sample = prepared.get_sample
+        sort_field = prepared.sort_field
+
         try:
             bulk_query_results = bulk_raw_query(
                 list(query_params_for_categories.values()), referrer=referrer
@@ -497,9 +584,6 @@ class AbstractQueryExecutor(metaclass=ABCMeta):
         if not get_sample:
             metrics.timing("snuba.search.num_result_groups", row_length)
 
-        if get_sample:
-            sort_field = "sample"
-
         return [(row["group_id"], row[sort_field]) for row in rows], total  # type: ignore[literal-required]
 
     def has_sort_strategy(self, sort_by: str) -> bool:
@@ -874,26 +958,22 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         chunk_limit = limit
         offset = 0
         num_chunks = 0
-        hits = self.calculate_hits(
+        # The hits are estimated from a sample of the Snuba results, which is queried concurrently
+        # with the first chunk.
+        hits_sample = self._submit_hits_sample(
             group_ids,
             too_many_candidates,
             sort_field,
             projects,
-            retention_window_start,
-            group_queryset,
             environments,
-            sort_by,
-            limit,
             cursor,
             count_hits,
-            paginator_options,
             search_filters,
             start,
             end,
             actor,
         )
-        if count_hits and hits == 0:
-            return self.empty_result
+        hits: Optional[int] = None
 
         paginator_results = self.empty_result
         result_groups = []
@@ -936,6 +1016,16 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
                 aggregate_kwargs=aggregate_kwargs,
             )
             metrics.timing("snuba.search.num_snuba_results", len(snuba_groups))
+
+            if num_chunks == 1:
+                hits = self._get_hits_from_sample(
+                    hits_sample,
+                    group_queryset,
+                    timeout=max(max_time - (time.time() - time_start), 0),
+                )
+                if count_hits and hits == 0:
+                    return self.empty_result
+
             count = len(snuba_groups)
             more_results = count >= limit and (offset + limit) < total
             offset += len(snuba_groups)
@@ -1035,72 +1125,124 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
         It will return 0 if hits were calculated and there are none.
         It will return None if hits were not calculated.
         """
-        if count_hits is False:
+        hits_sample = self._submit_hits_sample(
+            group_ids,
+            too_many_candidates,
+            sort_field,
+            projects,
+            environments,
+            cursor,
+            count_hits,
+            search_filters,
+            start,
+            end,
+            actor,
+        )
+        return self._get_hits_from_sample(
+            hits_sample,
+            group_queryset,
+            timeout=options.get("snuba.search.max-total-chunk-time-seconds"),
+        )
+
+    def _submit_hits_sample(
+        self,
+        group_ids: Sequence[int],
+        too_many_candidates: bool,
+        sort_field: str,
+        projects: Sequence[Project],
+        environments: Optional[Sequence[Environment]],
+        cursor: Cursor | None,
+        count_hits: bool,
+        search_filters: Optional[Sequence[SearchFilter]],
+        start: datetime,
+        end: datetime,
+        actor: Optional[Any] = None,
+    ) -> Optional[Future[Tuple[List[Tuple[int, Any]], int]]]:
+        """
+        Start the Snuba query for the sample of groups used to estimate the hits, when hits
+        can't be known otherwise. Returns None if no sample is needed.
+        """
+        if count_hits is False or not (too_many_candidates or cursor is not None):
             return None
-        elif too_many_candidates or cursor is not None:
-            # If we had too many candidates to reasonably pass down to snuba,
-            # or if we have a cursor that bisects the overall result set (such
-            # that our query only sees results on one side of the cursor) then
-            # we need an alternative way to figure out the total hits that this
-            # query has.
-
-            # To do this, we get a sample of groups matching the snuba side of
-            # the query, and see how many of those pass the post-filter in
-            # postgres. This should give us an estimate of the total number of
-            # snuba matches that will be overall matches, which we can use to
-            # get an estimate for X-Hits.
-
-            # The sampling is not simple random sampling. It will return *all*
-            # matching groups if there are less than N groups matching the
-            # query, or it will return a random, deterministic subset of N of
-            # the groups if there are more than N overall matches. This means
-            # that the "estimate" is actually an accurate result when there are
-            # less than N matching groups.
-
-            # The number of samples required to achieve a certain error bound
-            # with a certain confidence interval can be calculated from a
-            # rearrangement of the normal approximation (Wald) confidence
-            # interval formula:
-            #
-            # https://en.wikipedia.org/wiki/Binomial_proportion_confidence_interval
-            #
-            # Effectively if we want the estimate to be within +/- 10% of the
-            # real value with 95% confidence, we would need (1.96^2 * p*(1-p))
-            # / 0.1^2 samples. With a starting assumption of p=0.5 (this
-            # requires the most samples) we would need 96 samples to achieve
-            # +/-10% @ 95% confidence.
-
-            sample_size = options.get("snuba.search.hits-sample-size")
-            kwargs = dict(
-                start=start,
-                end=end,
-                project_ids=[p.id for p in projects],
-                environment_ids=environments and [environment.id for environment in environments],
-                organization=projects[0].organization,
-                sort_field=sort_field,
-                limit=sample_size,
-                offset=0,
-                get_sample=True,
-                search_filters=search_filters,
-                actor=actor,
-            )
-            if not too_many_candidates:
-                kwargs["group_ids"] = group_ids
-
-            snuba_groups, snuba_total = self.snuba_search(**kwargs)
-            snuba_count = len(snuba_groups)
-            if snuba_count == 0:
-                # Maybe check for 0 hits and return EMPTY_RESULT in ::query? self.empty_result
-                return 0
-            else:
-                filtered_count = group_queryset.filter(
-                    id__in=[gid for gid, _ in snuba_groups]
-                ).count()
 
-                hit_ratio = filtered_count / float(snuba_count)
-                hits = int(hit_ratio * snuba_total)
-                return hits
-        return None
+        # If we had too many candidates to reasonably pass down to snuba,
+        # or if we have a cursor that bisects the overall result set (such
+        # that our query only sees results on one side of the cursor) then
+        # we need an alternative way to figure out the total hits that this
+        # query has.
+
+        # To do this, we get a sample of groups matching the snuba side of
+        # the query, and see how many of those pass the post-filter in
+        # postgres. This should give us an estimate of the total number of
+        # snuba matches that will be overall matches, which we can use to
+        # get an estimate for X-Hits.
+
+        # The sampling is not simple random sampling. It will return *all*
+        # matching groups if there are less than N groups matching the
+        # query, or it will return a random, deterministic subset of N of
+        # the groups if there are more than N overall matches. This means
+        # that the "estimate" is actually an accurate result when there are
+        # less than N matching groups.
+
+        # The number of samples required to achieve a certain error bound
+        # with a certain confidence interval can be calculated from a
+        # rearrangement of the normal approximation (Wald) confidence
+        # interval formula:
+        #
+        # https://en.wikipedia.org/wiki/Binomial_proportion_confidence_interval
+        #
+        # Effectively if we want the estimate to be within +/- 10% of the
+        # real value with 95% confidence, we would need (1.96^2 * p*(1-p))
+        # / 0.1^2 samples. With a starting assumption of p=0.5 (this
+        # requires the most samples) we would need 96 samples to achieve
+        # +/-10% @ 95% confidence.
+
+        sample_size = options.get("snuba.search.hits-sample-size")
+        kwargs = dict(
+            start=start,
+            end=end,
+            project_ids=[p.id for p in projects],
+            environment_ids=environments and [environment.id for environment in environments],
+            organization=projects[0].organization,
+            sort_field=sort_field,
+            limit=sample_size,
+            offset=0,
+            get_sample=True,
+            search_filters=search_filters,
+            actor=actor,
+        )
+        if not too_many_candidates:
+            kwargs["group_ids"] = group_ids
+
+        return self.submit_snuba_search(**kwargs)
+
+    def _get_hits_from_sample(
+        self,
+        hits_sample: Optional[Future[Tuple[List[Tuple[int, Any]], int]]],
+        group_queryset: Query,
+        timeout: Optional[float] = None,
+    ) -> Optional[int]:
+        if hits_sample is None:
+            return None
+
+        try:
+            snuba_groups, snuba_total = hits_sample.result(timeout=timeout)
+        except FutureTimeoutError:
+            # The search thread pool is shared by all searches of the process, so the sample
+            # may still be queued. Rather than waiting for it, the hits are left unknown.
+            hits_sample.cancel()
+            metrics.incr("snuba.search.hits_sample.timeout", skip_internal=False)
+            return None
+        snuba_count = len(snuba_groups)
+        if snuba_count == 0:
+            # Maybe check for 0 hits and return EMPTY_RESULT in ::query? self.empty_result
+            return 0
+        else:
+            filtered_count = group_queryset.filter(id__in=[gid for gid, _ in snuba_groups]).count()
+
+            hit_ratio = filtered_count / float(snuba_count)
+            hits = int(hit_ratio * snuba_total)
+            return hits
 
 
 class InvalidQueryForExecutor(Exception):
@@ -1306,7 +1448,7 @@ class CdcPostgresSnubaQueryExecutor(PostgresSnubaQueryExecutor):
             ],
             where=where_conditions,
         )
-        hits = None
+        hits: Optional[int] = None
         if count_hits:
             request = Request(
                 dataset="events", app_id="cdc", query=hits_query, tenant_ids=tenant_ids
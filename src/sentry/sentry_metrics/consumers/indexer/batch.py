@@ -42,6 +42,19 @@ MAX_TAG_VALUE_LENGTH = 200
 ACCEPTED_METRIC_TYPES = {"s", "c", "d"}  # set, counter, distribution
 MRI_RE_PATTERN = re.compile("^([c|s|d|g|e]):([a-zA-Z0-9_]+)/.*$")
 
+# The value of sets and distributions (a list of numbers) is never looked at
+# by the indexer, only passed through to the output, and it's by far the
+# largest part of those payloads. Instead of decoding and encoding it again,
+# it's cut out of the payload and copied to the output as is.
+# Only numbers which are valid JSON are let through, since the value is not
+# validated again before being written out.
+_NUMBER_PATTERN = rb"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+RAW_VALUE_RE_PATTERN = re.compile(
+    rb'"value"\s*:\s*(\[\s*(?:%s(?:\s*,\s*%s)*)?\s*\])' % (_NUMBER_PATTERN, _NUMBER_PATTERN)
+)
+_RAW_VALUE_PLACEHOLDER = "__raw_value__"
+_RAW_VALUE_PLACEHOLDER_JSON = b'"__raw_value__"'
+
 OrgId = int
 
 
@@ -75,6 +88,36 @@ def invalid_metric_tags(tags: Mapping[str, str]) -> Sequence[str]:
     return invalid_strs
 
 
+def loads_with_raw_value(payload: bytes) -> Optional[ParsedMessage]:
+    """
+    Decodes an ingest metric, except for its value which is kept as raw JSON
+    (see `RAW_VALUE_RE_PATTERN`). Returns `None` when the value is not a list
+    of numbers or can't be located, in which case the payload has to be
+    decoded fully.
+    """
+    match = RAW_VALUE_RE_PATTERN.match(payload, max(payload.find(b'"value"'), 0))
+    if match is None:
+        return None
+
+    start, end = match.span(1)
+    try:
+        parsed_payload = rapidjson.loads(
+            b"".join((payload[:start], _RAW_VALUE_PLACEHOLDER_JSON, payload[end:]))
+        )
+    except rapidjson.JSONDecodeError:
+        return None
+
+    # The first "value" key could also have been a nested one, e.g. in tags.
+    if (
+        not isinstance(parsed_payload, dict)
+        or parsed_payload.get("value") != _RAW_VALUE_PLACEHOLDER
+    ):
+        return None
+
+    parsed_payload["value"] = rapidjson.RawJSON(payload[start:end].decode("ascii"))
+    return cast(ParsedMessage, parsed_payload)
+
+
 # TODO: Move this to where we do use case registration
 def extract_use_case_id(mri: str) -> UseCaseID:
     """
@@ -94,11 +137,13 @@ class IndexerBatch:
         should_index_tag_values: bool,
         is_output_sliced: bool,
         input_codec: Optional[Codec[Any]],
+        input_validation_rate: float = 1.0,
     ) -> None:
         self.outer_message = outer_message
         self.__should_index_tag_values = should_index_tag_values
         self.is_output_sliced = is_output_sliced
         self.__input_codec = input_codec
+        self.__input_validation_rate = input_validation_rate
 
         self.__message_count: MutableMapping[UseCaseID, int] = defaultdict(int)
         self.__message_size_sum: MutableMapping[UseCaseID, int] = defaultdict(int)
@@ -110,15 +155,29 @@ class IndexerBatch:
     def _extract_messages(self) -> None:
         self.skipped_offsets: Set[PartitionIdxOffset] = set()
         self.parsed_payloads_by_offset: MutableMapping[PartitionIdxOffset, ParsedMessage] = {}
+        raw_value_count = 0
 
         for msg in self.outer_message.payload:
             assert isinstance(msg.value, BrokerValue)
             partition_offset = PartitionIdxOffset(msg.value.partition.index, msg.value.offset)
 
+            # Schema validation needs the fully decoded payload.
+            should_validate = self.__input_codec is not None and (
+                self.__input_validation_rate >= 1.0
+                or random.random() < self.__input_validation_rate
+            )
+
+            parsed_payload: Optional[ParsedMessage] = None
+            if not should_validate:
+                parsed_payload = loads_with_raw_value(msg.payload.value)
+                if parsed_payload is not None:
+                    raw_value_count += 1
+
             try:
-                parsed_payload: ParsedMessage = json.loads(
-                    msg.payload.value.decode("utf-8"), use_rapid_json=True
-                )
+                if parsed_payload is None:
+                    parsed_payload = json.loads(
+                        msg.payload.value.decode("utf-8"), use_rapid_json=True
+                    )
             except rapidjson.JSONDecodeError:
                 self.skipped_offsets.add(partition_offset)
                 logger.error(
@@ -128,7 +187,7 @@ class IndexerBatch:
                 )
                 continue
             try:
-                if self.__input_codec:
+                if self.__input_codec and should_validate:
                     self.__input_codec.validate(parsed_payload)
             except ValidationError:
                 if settings.SENTRY_METRICS_INDEXER_RAISE_VALIDATION_ERRORS:
@@ -169,6 +228,8 @@ class IndexerBatch:
 
             self.parsed_payloads_by_offset[partition_offset] = parsed_payload
 
+        metrics.incr("process_messages.raw_value", amount=raw_value_count)
+
     @metrics.wraps("process_messages.filter_messages")
     def filter_messages(self, keys_to_remove: Sequence[PartitionIdxOffset]) -> None:
         # XXX: it is useful to be able to get a sample of organization ids that are affected by rate limits, but this is really slow.
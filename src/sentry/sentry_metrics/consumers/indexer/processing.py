@@ -93,6 +93,7 @@ class MessageProcessor:
             should_index_tag_values=should_index_tag_values,
             is_output_sliced=is_output_sliced,
             input_codec=_INGEST_CODEC,
+            input_validation_rate=options.get("sentry-metrics.indexer.input-validation-rate"),
         )
 
         sdk.set_measurement("indexer_batch.payloads.len", len(batch.parsed_payloads_by_offset))
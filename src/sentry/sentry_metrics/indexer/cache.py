@@ -1,7 +1,12 @@
+from __future__ import annotations
+
 import logging
 import random
-from typing import Mapping, MutableMapping, Optional, Sequence, Set
+import threading
+import time
+from typing import Callable, Mapping, MutableMapping, Optional, Sequence, Set, Tuple, Union
 
+from cachetools import TLRUCache
 from django.conf import settings
 from django.core.cache import caches
 
@@ -22,6 +27,7 @@ from sentry.utils.hashlib import md5_text
 logger = logging.getLogger(__name__)
 
 _INDEXER_CACHE_METRIC = "sentry_metrics.indexer.memcache"
+_INDEXER_LOCAL_CACHE_METRIC = "sentry_metrics.indexer.local_cache"
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
 
@@ -97,10 +103,122 @@ class StringIndexerCache:
         self.cache.delete_many(cache_keys, version=self.version)
 
 
+LocalCacheKey = Union[str, Tuple[str, int]]
+
+
+class LocalStringIndexerCache:
+    """
+    A bounded, in-process cache in front of `StringIndexerCache`.
+
+    A consumer resolves the same hot metric names and tag values over and over,
+    so most lookups can be answered without a round-trip to Redis. Every use
+    case gets its own LRU and size budget (in number of entries), so that a use
+    case with a high cardinality can't evict the hot strings of the others.
+
+    Both directions of a mapping are stored: keys formatted like
+    "use_case_id:org_id:string" map to their id, and `(org_id, id)` maps back
+    to the string within the use case's LRU.
+
+    Entries can't be invalidated across processes, so they expire after `ttl`
+    seconds, with the same jitter as `StringIndexerCache.randomized_ttl`.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        ttl: int,
+        use_case_sizes: Optional[Mapping[str, int]] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.use_case_sizes = use_case_sizes or {}
+        self.timer = timer
+        self._caches: MutableMapping[str, TLRUCache[LocalCacheKey, Union[int, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _ttu(self, key: LocalCacheKey, value: Union[int, str], now: float) -> float:
+        return now + self.ttl + random.uniform(0, 0.25) * self.ttl
+
+    def _get_cache(self, use_case_id: str) -> Optional[TLRUCache[LocalCacheKey, Union[int, str]]]:
+        # Must be called with the lock held.
+        cache = self._caches.get(use_case_id)
+        if cache is None:
+            size = self.use_case_sizes.get(use_case_id, self.size)
+            if size <= 0:
+                return None
+            cache = self._caches[use_case_id] = TLRUCache(
+                maxsize=size, ttu=self._ttu, timer=self.timer
+            )
+        return cache
+
+    def get_many(self, keys: Sequence[str]) -> MutableMapping[str, Optional[int]]:
+        results: MutableMapping[str, Optional[int]] = {}
+        with self._lock:
+            for key in keys:
+                cache = self._get_cache(key.split(":", 1)[0])
+                value = cache.get(key) if cache is not None else None
+                results[key] = value if isinstance(value, int) else None
+        return results
+
+    def get(self, key: str) -> Optional[int]:
+        return self.get_many([key])[key]
+
+    def get_string(self, use_case_id: str, org_id: int, id: int) -> Optional[str]:
+        with self._lock:
+            cache = self._get_cache(use_case_id)
+            value = cache.get((str(org_id), id)) if cache is not None else None
+        return value if isinstance(value, str) else None
+
+    def set_many(self, key_values: Mapping[str, int]) -> None:
+        with self._lock:
+            for key, value in key_values.items():
+                use_case_id, org_id, string = key.split(":", 2)
+                cache = self._get_cache(use_case_id)
+                if cache is not None:
+                    cache[key] = value
+                    cache[(org_id, value)] = string
+
+    def set(self, key: str, value: int) -> None:
+        self.set_many({key: value})
+
+    def delete_many(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                cache = self._get_cache(key.split(":", 1)[0])
+                if cache is None:
+                    continue
+                value = cache.pop(key, None)
+                if value is not None:
+                    cache.pop((key.split(":", 2)[1], value), None)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._caches.clear()
+
+
+def _record_local_cache_metrics(caller: str, hits: int, misses: int) -> None:
+    metrics.incr(
+        _INDEXER_LOCAL_CACHE_METRIC, tags={"cache_hit": "true", "caller": caller}, amount=hits
+    )
+    metrics.incr(
+        _INDEXER_LOCAL_CACHE_METRIC, tags={"cache_hit": "false", "caller": caller}, amount=misses
+    )
+
+
 class CachingIndexer(StringIndexer):
-    def __init__(self, cache: StringIndexerCache, indexer: StringIndexer) -> None:
+    def __init__(
+        self,
+        cache: StringIndexerCache,
+        indexer: StringIndexer,
+        local_cache: Optional[LocalStringIndexerCache] = None,
+    ) -> None:
         self.cache = cache
         self.indexer = indexer
+        self.local_cache = local_cache
 
     def bulk_record(
         self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
@@ -108,7 +226,17 @@ class CachingIndexer(StringIndexer):
         cache_keys = UseCaseKeyCollection(strings)
         metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=cache_keys.size)
         cache_key_strs = cache_keys.as_strings()
-        cache_results = self.cache.get_many(cache_key_strs)
+
+        local_cache_hits: Mapping[str, Optional[int]] = {}
+        if self.local_cache is not None:
+            local_cache_results = self.local_cache.get_many(cache_key_strs)
+            local_cache_hits = {k: v for k, v in local_cache_results.items() if v is not None}
+            _record_local_cache_metrics(
+                "get_many_ids", len(local_cache_hits), len(cache_key_strs) - len(local_cache_hits)
+            )
+            cache_key_strs = [k for k in cache_key_strs if k not in local_cache_hits]
+
+        cache_results = self.cache.get_many(cache_key_strs) if cache_key_strs else {}
 
         hits = [k for k, v in cache_results.items() if v is not None]
 
@@ -130,9 +258,17 @@ class CachingIndexer(StringIndexer):
             amount=cache_keys.size,
         )
 
+        if self.local_cache is not None and hits:
+            self.local_cache.set_many({k: cache_results[k] for k in hits})
+
         cache_key_results = UseCaseKeyResults()
         cache_key_results.add_use_case_key_results(
-            [UseCaseKeyResult.from_string(k, v) for k, v in cache_results.items() if v is not None],
+            [
+                UseCaseKeyResult.from_string(k, v)
+                for results in (local_cache_hits, cache_results)
+                for k, v in results.items()
+                if v is not None
+            ],
             FetchType.CACHE_HIT,
         )
 
@@ -148,7 +284,10 @@ class CachingIndexer(StringIndexer):
             }
         )
 
-        self.cache.set_many(db_record_key_results.get_mapped_strings_to_ints())
+        db_mapped_strings = db_record_key_results.get_mapped_strings_to_ints()
+        self.cache.set_many(db_mapped_strings)
+        if self.local_cache is not None:
+            self.local_cache.set_many(db_mapped_strings)
 
         return cache_key_results.merge(db_record_key_results)
 
@@ -159,10 +298,19 @@ class CachingIndexer(StringIndexer):
     @metric_path_key_compatible_resolve
     def resolve(self, use_case_id: UseCaseID, org_id: int, string: str) -> Optional[int]:
         key = f"{use_case_id.value}:{org_id}:{string}"
+
+        if self.local_cache is not None:
+            result = self.local_cache.get(key)
+            _record_local_cache_metrics("resolve", int(result is not None), int(result is None))
+            if result is not None:
+                return result
+
         result = self.cache.get(key)
 
         if result and isinstance(result, int):
             metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "true", "caller": "resolve"})
+            if self.local_cache is not None:
+                self.local_cache.set(key, result)
             return result
 
         metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "false", "caller": "resolve"})
@@ -170,12 +318,26 @@ class CachingIndexer(StringIndexer):
 
         if id is not None:
             self.cache.set(key, id)
+            if self.local_cache is not None:
+                self.local_cache.set(key, id)
 
         return id
 
     @metric_path_key_compatible_rev_resolve
     def reverse_resolve(self, use_case_id: UseCaseID, org_id: int, id: int) -> Optional[str]:
-        return self.indexer.reverse_resolve(use_case_id, org_id, id)
+        if self.local_cache is None:
+            return self.indexer.reverse_resolve(use_case_id, org_id, id)
+
+        result = self.local_cache.get_string(use_case_id.value, org_id, id)
+        _record_local_cache_metrics("reverse_resolve", int(result is not None), int(result is None))
+        if result is not None:
+            return result
+
+        string = self.indexer.reverse_resolve(use_case_id, org_id, id)
+        if string is not None:
+            self.local_cache.set(f"{use_case_id.value}:{org_id}:{string}", id)
+
+        return string
 
     def resolve_shared_org(self, string: str) -> Optional[int]:
         raise NotImplementedError(
@@ -6,9 +6,11 @@ from typing import Any, Mapping, MutableMapping, Optional, Sequence, Tuple, Unio
 from sentry import options
 from sentry.ratelimits.sliding_windows import (
     GrantedQuota,
+    LeasedSlidingWindowRateLimiter,
     Quota,
     RedisSlidingWindowRateLimiter,
     RequestedQuota,
+    SlidingWindowRateLimiter,
     Timestamp,
 )
 from sentry.sentry_metrics.configuration import MetricsIngestConfiguration, UseCaseKey
@@ -37,6 +39,14 @@ def _build_quota_key(namespace: str, org_id: Optional[OrgId] = None) -> str:
         return f"metrics-indexer-{namespace}-global"
 
 
+def _build_rate_limiter(limiter_options: Mapping[str, Any]) -> SlidingWindowRateLimiter:
+    rate_limiter = RedisSlidingWindowRateLimiter(**limiter_options)
+    lease_fraction = options.get("sentry-metrics.writes-limiter.lease-fraction")
+    if lease_fraction:
+        return LeasedSlidingWindowRateLimiter(rate_limiter, lease_fraction=lease_fraction)
+    return rate_limiter
+
+
 @metrics.wraps("sentry_metrics.indexer.construct_quotas")
 def _construct_quotas(use_case_id: UseCaseKey, namespace: str) -> Sequence[Quota]:
     """
@@ -123,7 +133,7 @@ class RateLimitState:
 class WritesLimiter:
     def __init__(self, namespace: str, **options: Mapping[str, str]) -> None:
         self.namespace = namespace
-        self.rate_limiter: RedisSlidingWindowRateLimiter = RedisSlidingWindowRateLimiter(**options)
+        self.rate_limiter: SlidingWindowRateLimiter = _build_rate_limiter(options)
 
     @metrics.wraps("sentry_metrics.indexer.check_write_limits")
     def check_write_limits(
@@ -227,7 +237,7 @@ class UcaRateLimitState:
 class UcaWritesLimiter:
     def __init__(self, namespace: str, **options: Mapping[str, str]) -> None:
         self.namespace = namespace
-        self.rate_limiter: RedisSlidingWindowRateLimiter = RedisSlidingWindowRateLimiter(**options)
+        self.rate_limiter: SlidingWindowRateLimiter = _build_rate_limiter(options)
 
     def _build_quota_key(self, use_case_id: UseCaseID, org_id: Optional[OrgId] = None) -> str:
         if org_id is not None:
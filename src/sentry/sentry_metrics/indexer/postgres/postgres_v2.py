@@ -21,7 +21,11 @@ from sentry.sentry_metrics.indexer.base import (
     metric_path_key_compatible_resolve,
     metric_path_key_compatible_rev_resolve,
 )
-from sentry.sentry_metrics.indexer.cache import CachingIndexer, StringIndexerCache
+from sentry.sentry_metrics.indexer.cache import (
+    CachingIndexer,
+    LocalStringIndexerCache,
+    StringIndexerCache,
+)
 from sentry.sentry_metrics.indexer.limiters.writes import writes_limiter_factory
 from sentry.sentry_metrics.indexer.postgres.models import TABLE_MAPPING, BaseIndexer, IndexerTable
 from sentry.sentry_metrics.indexer.strings import StaticStringIndexer
@@ -40,6 +44,17 @@ indexer_cache = StringIndexerCache(
     **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS, partition_key=_PARTITION_KEY
 )
 
+indexer_local_cache = (
+    LocalStringIndexerCache(
+        size=settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE,
+        ttl=settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_TTL,
+        use_case_sizes=settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_USE_CASE_SIZES,
+    )
+    if settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE
+    or settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_USE_CASE_SIZES
+    else None
+)
+
 
 class PGStringIndexerV2(StringIndexer):
     """
@@ -436,4 +451,4 @@ class PGStringIndexerV2(StringIndexer):
 
 class PostgresIndexer(StaticStringIndexer):
     def __init__(self) -> None:
-        super().__init__(CachingIndexer(indexer_cache, PGStringIndexerV2()))
+        super().__init__(CachingIndexer(indexer_cache, PGStringIndexerV2(), indexer_local_cache))
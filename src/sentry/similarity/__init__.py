@@ -71,7 +71,17 @@ def _make_index_backend(cluster, namespace="sim:1"):
 
     return MetricsWrapper(
         RedisScriptMinHashIndexBackend(
-            cluster, namespace, MinHashSignatureBuilder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
+            cluster,
+            namespace,
+            MinHashSignatureBuilder(
+                16,
+                0xFFFF,
+                cache_size=getattr(settings, "SENTRY_SIMILARITY_SIGNATURE_CACHE_SIZE", 0),
+            ),
+            8,
+            60 * 60 * 24 * 30,
+            3,
+            5000,
         ),
         scope_tag_name=None,
     )
@@ -1,17 +1,67 @@
 from __future__ import annotations
 
-from typing import Iterable
+import threading
+from typing import Iterable, Sequence, Tuple, Union
 
 import mmh3
+from cachetools import LRUCache
+
+Feature = Union[str, bytes]
 
 
 class MinHashSignatureBuilder:
-    def __init__(self, columns: int, rows: int) -> None:
+    """
+    Builds MinHash signatures of feature sets, with one value per column.
+
+    Signatures are stored in the similarity index, so the hash of a feature
+    for a column has to remain `mmh3.hash(feature, column) % rows`. Computing
+    it for every column is most of the cost of a signature, and the same
+    features (e.g. the frames of a stack trace) show up in most events of an
+    issue, so when `cache_size` is set the column hashes of the most recently
+    seen features are kept in a LRU.
+    """
+
+    def __init__(self, columns: int, rows: int, cache_size: int = 0) -> None:
         self.columns = columns
         self.rows = rows
+        self.cache: LRUCache[Feature, Tuple[int, ...]] | None = (
+            LRUCache(cache_size) if cache_size > 0 else None
+        )
+        self._lock = threading.Lock()
+
+    def _hash(self, feature: Feature) -> Tuple[int, ...]:
+        rows = self.rows
+        return tuple([mmh3.hash(feature, column) % rows for column in range(self.columns)])
+
+    def _get_hashes(self, features: Iterable[Feature]) -> Sequence[Tuple[int, ...]]:
+        unique_features = set(features)
+        if self.cache is None:
+            return [self._hash(feature) for feature in unique_features]
+
+        rv = []
+        misses = []
+        with self._lock:
+            for feature in unique_features:
+                hashes = self.cache.get(feature)
+                if hashes is None:
+                    misses.append(feature)
+                else:
+                    rv.append(hashes)
+
+        if misses:
+            computed = [(feature, self._hash(feature)) for feature in misses]
+            with self._lock:
+                for feature, hashes in computed:
+                    self.cache[feature] = hashes
+            rv.extend(hashes for _, hashes in computed)
+
+        return rv
 
-    def __call__(self, features: Iterable[str]) -> list[int]:
-        return [
-            min(mmh3.hash(feature, column) % self.rows for feature in features)
-            for column in range(self.columns)
-        ]
+    def __call__(self, features: Iterable[Feature]) -> list[int]:
+        hashes = self._get_hashes(features)
+        if not hashes:
+            raise ValueError("Cannot build the signature of an empty feature set.")
+        if len(hashes) == 1:
+            return list(hashes[0])
+        # Minimum of every column across all features
+        return list(map(min, *hashes))
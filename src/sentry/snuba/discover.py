@@ -4,7 +4,7 @@ import random
 from collections import namedtuple
 from copy import deepcopy
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import sentry_sdk
 from sentry_relay.consts import SPAN_STATUS_CODE_TO_NAME
@@ -250,6 +250,46 @@ def query(
     return result
 
 
+def stream_query(
+    selected_columns,
+    query,
+    params,
+    equations=None,
+    orderby=None,
+    offset=None,
+    limit=50,
+    referrer=None,
+    auto_fields=False,
+    auto_aggregations=False,
+    use_aggregate_conditions=False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Like `query`, but yield the rows of the result as they are read from
+    Snuba rather than returning them all at once, which keeps the memory use
+    of queries returning many rows (e.g. data exports) down. Field meta and
+    tips are not available.
+
+    The query is only run once iteration starts.
+    """
+    if not selected_columns:
+        raise InvalidSearchQuery("No columns selected")
+
+    builder = QueryBuilder(
+        Dataset.Discover,
+        params,
+        query=query,
+        selected_columns=selected_columns,
+        equations=equations,
+        orderby=orderby,
+        auto_fields=auto_fields,
+        auto_aggregations=auto_aggregations,
+        use_aggregate_conditions=use_aggregate_conditions,
+        limit=limit,
+        offset=offset,
+    )
+    return builder.run_query_stream(referrer)
+
+
 def timeseries_query(
     selected_columns: Sequence[str],
     query: str,
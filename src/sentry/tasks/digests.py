@@ -1,12 +1,14 @@
 import logging
 import time
 
+from sentry import options
 from sentry.digests import get_option_key
 from sentry.digests.backends.base import InvalidState
 from sentry.digests.notifications import build_digest, split_key
 from sentry.models import Project, ProjectOption
 from sentry.tasks.base import instrumented_task
-from sentry.utils import snuba
+from sentry.utils import metrics, snuba
+from sentry.utils.iterators import chunked
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +30,44 @@ def schedule_digests():
     timeout = 300
     digests.maintenance(deadline - timeout)
 
-    for entry in digests.schedule(deadline):
-        deliver_digest.delay(entry.key, entry.timestamp)
+    entries = digests.schedule(deadline)
+    if options.get("digests.batch-delivery.enabled"):
+        batch_size = options.get("digests.batch-delivery.batch-size")
+        for batch in chunked(entries, batch_size):
+            deliver_digests.delay([entry.key for entry in batch])
+    else:
+        for entry in entries:
+            deliver_digest.delay(entry.key, entry.timestamp)
+
+
+def _send_digest(target, digest, logs):
+    from sentry.mail import mail_adapter
+
+    project, target_type, target_identifier, fallthrough_choice = target
+    if digest:
+        mail_adapter.notify_digest(
+            project,
+            digest,
+            target_type,
+            target_identifier,
+            fallthrough_choice=fallthrough_choice,
+        )
+    else:
+        logger.info(
+            "Skipped digest delivery due to empty digest",
+            extra={
+                "project": project.id,
+                "target_type": target_type.value,
+                "target_identifier": target_identifier,
+                "build_digest_logs": logs,
+                "fallthrough_choice": fallthrough_choice.value if fallthrough_choice else None,
+            },
+        )
 
 
 @instrumented_task(name="sentry.tasks.digests.deliver_digest", queue="digests.delivery")
 def deliver_digest(key, schedule_timestamp=None):
     from sentry import digests
-    from sentry.mail import mail_adapter
 
     try:
         project, target_type, target_identifier, fallthrough_choice = split_key(key)
@@ -56,22 +88,42 @@ def deliver_digest(key, schedule_timestamp=None):
             logger.info(f"Skipped digest delivery: {error}", exc_info=True)
             return
 
-        if digest:
-            mail_adapter.notify_digest(
-                project,
-                digest,
-                target_type,
-                target_identifier,
-                fallthrough_choice=fallthrough_choice,
-            )
-        else:
-            logger.info(
-                "Skipped digest delivery due to empty digest",
-                extra={
-                    "project": project.id,
-                    "target_type": target_type.value,
-                    "target_identifier": target_identifier,
-                    "build_digest_logs": logs,
-                    "fallthrough_choice": fallthrough_choice.value if fallthrough_choice else None,
-                },
-            )
+        _send_digest((project, target_type, target_identifier, fallthrough_choice), digest, logs)
+
+
+@instrumented_task(name="sentry.tasks.digests.deliver_digests", queue="digests.delivery")
+def deliver_digests(keys):
+    """
+    Delivers the digests of many timelines at once, see
+    ``Backend.digest_many``.
+    """
+    from sentry import digests
+
+    split_keys = {}
+    minimum_delays = {}
+    for key in keys:
+        try:
+            split_keys[key] = split_key(key)
+        except Project.DoesNotExist as error:
+            logger.info(f"Cannot deliver digest {key} due to error: {error}")
+            digests.delete(key)
+            continue
+
+        minimum_delays[key] = ProjectOption.objects.get_value(
+            split_keys[key][0], get_option_key("mail", "minimum_delay")
+        )
+
+    def build(key, records):
+        return build_digest(split_keys[key][0], records)
+
+    with snuba.options_override({"consistent": True}):
+        built = digests.digest_many(
+            list(split_keys),
+            build,
+            minimum_delays=minimum_delays,
+            concurrency=options.get("digests.batch-delivery.concurrency"),
+        )
+
+        with metrics.timer("digests.batch.send"):
+            for key, (digest, logs) in built.items():
+                _send_digest(split_keys[key], digest, logs)
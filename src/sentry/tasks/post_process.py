@@ -10,7 +10,7 @@ from django.conf import settings
 from django.utils import timezone
 from google.api_core.exceptions import ServiceUnavailable
 
-from sentry import features
+from sentry import features, options
 from sentry.exceptions import PluginError
 from sentry.issues.grouptype import GroupCategory
 from sentry.issues.issue_occurrence import IssueOccurrence
@@ -815,7 +815,12 @@ def process_rules(job: PostProcessJob) -> None:
     if job["is_reprocessed"]:
         return
 
-    from sentry.rules.processor import RuleProcessor
+    from sentry.rules.processor import (
+        BatchRuleProcessor,
+        RuleProcessor,
+        RuleProcessorJob,
+        project_rule_cache,
+    )
 
     group_event = job["event"]
     is_new = job["group_state"]["is_new"]
@@ -826,13 +831,32 @@ def process_rules(job: PostProcessJob) -> None:
     has_alert = False
 
     with metrics.timer("post_process.process_rules.duration"):
-        rp = RuleProcessor(
-            group_event, is_new, is_regression, is_new_group_environment, has_reappeared
-        )
+        if options.get("post_process.batch-rule-processor"):
+            # Evaluated after the post-process gates and snoozes, with the
+            # rules and conditions of the project shared by all events of
+            # this process.
+            batch = BatchRuleProcessor(
+                [
+                    RuleProcessorJob(
+                        group_event,
+                        is_new=is_new,
+                        is_regression=is_regression,
+                        is_new_group_environment=is_new_group_environment,
+                        has_reappeared=has_reappeared,
+                    )
+                ],
+                rule_cache=project_rule_cache,
+            )
+            grouped_futures = batch.apply()[0]
+        else:
+            rp = RuleProcessor(
+                group_event, is_new, is_regression, is_new_group_environment, has_reappeared
+            )
+            grouped_futures = rp.apply()
         with sentry_sdk.start_span(op="tasks.post_process_group.rule_processor_callbacks"):
             # TODO(dcramer): ideally this would fanout, but serializing giant
             # objects back and forth isn't super efficient
-            for callback, futures in rp.apply():
+            for callback, futures in grouped_futures:
                 has_alert = True
                 safe_execute(callback, group_event, futures, _with_transaction=False)
 
@@ -25,6 +25,10 @@ SketchParameters = namedtuple("SketchParameters", "depth width capacity")
 
 CountMinScript = SentryScript(None, resource_string("sentry", "scripts/tsdb/cmsketch.lua"))
 
+PFCountSeriesScript = SentryScript(
+    None, resource_string("sentry", "scripts/tsdb/pfcount_series.lua")
+)
+
 
 class SuppressionWrapper:
     """\
@@ -293,25 +297,30 @@ class RedisTSDB(BaseTSDB):
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
         series = [to_datetime(item) for item in series]
 
-        results = []
+        # The counters of all keys that share a vnode are fields of the same
+        # hash for a given rollup interval, so rather than issuing an HGET for
+        # every key and interval, fetch all fields of a hash with one HMGET.
+        fields_by_hash_key = defaultdict(list)
+        for key in keys:
+            for timestamp in series:
+                hash_key, hash_field = self.make_counter_key(
+                    model, rollup, timestamp, key, environment_id
+                )
+                fields_by_hash_key[hash_key].append((to_timestamp(timestamp), key, hash_field))
+
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
-            for key in keys:
-                for timestamp in series:
-                    hash_key, hash_field = self.make_counter_key(
-                        model, rollup, timestamp, key, environment_id
-                    )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
-                    )
+            responses = {
+                hash_key: client.hmget(hash_key, [hash_field for _, _, hash_field in fields])
+                for hash_key, fields in fields_by_hash_key.items()
+            }
 
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
+        results_by_key = {key: {} for key in keys}
+        for hash_key, fields in fields_by_hash_key.items():
+            for (epoch, key, _), count in zip(fields, responses[hash_key].value):
+                results_by_key[key][epoch] = int(count or 0)
 
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        return {key: sorted(points.items()) for key, points in results_by_key.items()}
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
@@ -427,23 +436,26 @@ class RedisTSDB(BaseTSDB):
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
 
-        responses = {}
-        cluster, _ = self.get_cluster(environment_id)
-        with cluster.fanout() as client:
-            for key in keys:
-                c = client.target_key(key)
-                r = responses[key] = []
-                for timestamp in series:
-                    r.append(
-                        (
-                            timestamp,
-                            c.pfcount(self.make_key(model, rollup, timestamp, key, environment_id)),
-                        )
-                    )
+        # All intervals of a key are routed to the same host, so the whole
+        # series is counted with a single script call per key.
+        commands = {
+            key: [
+                (
+                    PFCountSeriesScript,
+                    [
+                        self.make_key(model, rollup, timestamp, key, environment_id)
+                        for timestamp in series
+                    ],
+                    [],
+                )
+            ]
+            for key in keys
+        }
 
+        cluster, _ = self.get_cluster(environment_id)
         return {
-            key: [(timestamp, promise.value) for timestamp, promise in value]
-            for key, value in responses.items()
+            key: list(zip(series, responses[0].value))
+            for key, responses in cluster.execute_commands(commands).items()
         }
 
     def get_distinct_counts_totals(
@@ -57,6 +57,9 @@ def compact(seq):
         return [k for k in seq if k is not None]
 
 
+_MISSING = object()
+
+
 def cached(cache, function, *args, **kwargs):
     """Calls ``function`` or retrieves its return value from the ``cache``.
 
@@ -65,9 +68,10 @@ def cached(cache, function, *args, **kwargs):
     """
     key = (function, args, tuple(sorted(kwargs.items())))
 
-    if key in cache:
-        rv = cache[key]
-    else:
+    # A single lookup, so that caches which are shared between threads can
+    # evict entries at any time.
+    rv = cache.get(key, _MISSING)
+    if rv is _MISSING:
         rv = cache[key] = function(*args)
 
     return rv
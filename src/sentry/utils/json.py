@@ -4,9 +4,21 @@ from __future__ import annotations
 
 import datetime
 import decimal
+import re
 import uuid
 from enum import Enum
-from typing import IO, TYPE_CHECKING, Any, Generator, Mapping, NoReturn, TypeVar, overload
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Generator,
+    Iterator,
+    Mapping,
+    NoReturn,
+    Tuple,
+    TypeVar,
+    overload,
+)
 
 import rapidjson
 import sentry_sdk
@@ -169,7 +181,93 @@ def prune_empty_keys(obj: None | Mapping[TKey, TValue | None]) -> None | dict[TK
     return {k: v for k, v in obj.items() if v is not None}
 
 
+# The next bracket, preceded by anything but brackets and unterminated strings.
+_NEXT_BRACKET_RE = re.compile(rb'(?:[^"\[\]{}]|"[^"\\]*(?:\\.[^"\\]*)*")*([\[\]{}])', re.DOTALL)
+# The rest of a string, up to and including its closing quote.
+_STRING_END_RE = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+
+class BracketScanner:
+    """
+    Find the brackets of a JSON document which is fed in chunks, skipping over
+    the contents of strings.
+
+    This is the building block for splitting large documents into parts
+    without decoding them as a whole. Strings are matched by a regex as a
+    whole, so the work done in Python is proportional to the number of
+    brackets rather than the size of the document.
+    """
+
+    def __init__(self) -> None:
+        # Nesting depth after the last bracket found.
+        self.depth = 0
+        self.in_string = False
+        # Whether the last chunk ended with the backslash of an escape.
+        self.escaped = False
+
+    def scan(self, chunk: bytes) -> Iterator[Tuple[int, bool]]:
+        """
+        Yield the position of every bracket of `chunk` outside of strings, and
+        whether it opens an array or object. `depth` is updated before
+        every bracket is yielded.
+        """
+        pos = 0
+        if self.in_string:
+            if self.escaped:
+                self.escaped = False
+                pos = 1
+            pos = self._skip_string(chunk, pos)
+            if pos < 0:
+                return
+
+        match_bracket = _NEXT_BRACKET_RE.match
+        while True:
+            # Anchored at `pos`, which keeps a failing match linear.
+            match = match_bracket(chunk, pos)
+            if match is None:
+                break
+            pos = match.start(1)
+            if chunk[pos] in b"[{":
+                self.depth += 1
+                yield pos, True
+            else:
+                self.depth -= 1
+                if self.depth < 0:
+                    raise ValueError("Unbalanced JSON document")
+                yield pos, False
+            pos += 1
+
+        # There are no more brackets, but the chunk may end within a string.
+        while True:
+            pos = chunk.find(b'"', pos)
+            if pos < 0:
+                return
+            pos = self._skip_string(chunk, pos + 1)
+            if pos < 0:
+                return
+
+    def _skip_string(self, chunk: bytes, pos: int) -> int:
+        """Return the position after the string `pos` is in, or -1 if it doesn't end in `chunk`."""
+        match = _STRING_END_RE.match(chunk, pos)
+        if match is not None:
+            self.in_string = False
+            return match.end()
+
+        # The chunk ends within the string, possibly in the middle of an escape.
+        self.in_string = True
+        end = len(chunk)
+        while end > pos and chunk[end - 1] == ord("\\"):
+            end -= 1
+        self.escaped = (len(chunk) - end) % 2 == 1
+        return -1
+
+    def close(self) -> None:
+        if self.depth != 0 or self.in_string:
+            raise ValueError("Incomplete JSON document")
+
+
 __all__ = (
+    "BracketScanner",
     "JSONData",
     "JSONDecodeError",
     "JSONEncoder",
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import hashlib
+import math
 import random
 import re
 from abc import ABC, abstractmethod
+from array import array
 from datetime import timedelta
 from enum import Enum
-from typing import Any, ClassVar, Dict, List, Optional, Union, cast
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Union, cast
 from urllib.parse import parse_qs, urlparse
 
 from sentry import options
@@ -84,9 +86,15 @@ class PerformanceDetector(ABC):
     type: ClassVar[DetectorType]
     stored_problems: PerformanceProblemsMap
 
-    def __init__(self, settings: Dict[DetectorType, Any], event: dict[str, Any]) -> None:
+    def __init__(
+        self,
+        settings: Dict[DetectorType, Any],
+        event: dict[str, Any],
+        span_features: Optional[SpanFeatureTable] = None,
+    ) -> None:
         self.settings = settings[self.settings_key]
         self._event = event
+        self.span_features = span_features if span_features is not None else SpanFeatureTable([])
         self.init()
 
     @abstractmethod
@@ -105,7 +113,7 @@ class PerformanceDetector(ABC):
         if not op or not span_id:
             return None
 
-        span_duration = get_span_duration(span)
+        span_duration = self.span_features.duration(span)
         for setting in self.settings:
             op_prefix = self.find_span_prefix(setting, op)
             if op_prefix:
@@ -163,6 +171,82 @@ def get_span_duration(span: Span) -> timedelta:
     )
 
 
+_UNSET = object()
+
+
+class SpanFeatureTable:
+    """
+    Per-span values shared by all the detectors run on an event.
+
+    Most detectors need the duration of every span they visit, and several of
+    them fingerprint spans or parse their URLs. Rather than having each
+    detector recompute those for the same spans, the table is built once per
+    event and handed to every detector. Columns are filled in the first time a
+    detector asks for them, since most spans are only of interest to a few
+    detectors.
+
+    Spans that are not part of the table (e.g. when a detector is run on its
+    own) are computed on every lookup, as before.
+    """
+
+    __slots__ = ("_index", "_durations", "_fingerprints", "_urls", "_parameterized_urls")
+
+    def __init__(self, spans: Sequence[Span]) -> None:
+        # Spans are plain dicts, which can't be hashed. They are kept alive by
+        # the event for as long as the table is in use, so their ids are
+        # stable.
+        self._index = {id(span): i for i, span in enumerate(spans)}
+        self._durations = array("d", [math.nan]) * len(spans)
+        self._fingerprints: List[Any] = [_UNSET] * len(spans)
+        self._urls: List[Any] = [_UNSET] * len(spans)
+        self._parameterized_urls: List[Any] = [_UNSET] * len(spans)
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def _duration_seconds(self, span: Span) -> float:
+        i = self._index.get(id(span))
+        if i is None:
+            return get_span_duration(span).total_seconds()
+        rv = self._durations[i]
+        if math.isnan(rv):
+            rv = self._durations[i] = get_span_duration(span).total_seconds()
+        return rv
+
+    def duration(self, span: Span) -> timedelta:
+        return timedelta(seconds=self._duration_seconds(span))
+
+    def duration_ms(self, span: Span) -> float:
+        return self._duration_seconds(span) * 1000
+
+    def fingerprint(self, span: Span) -> Optional[str]:
+        i = self._index.get(id(span))
+        if i is None:
+            return fingerprint_span(span)
+        rv = self._fingerprints[i]
+        if rv is _UNSET:
+            rv = self._fingerprints[i] = fingerprint_span(span)
+        return cast(Optional[str], rv)
+
+    def url(self, span: Span) -> str:
+        i = self._index.get(id(span))
+        if i is None:
+            return get_url_from_span(span)
+        rv = self._urls[i]
+        if rv is _UNSET:
+            rv = self._urls[i] = get_url_from_span(span)
+        return cast(str, rv)
+
+    def parameterized_url(self, span: Span) -> str:
+        i = self._index.get(id(span))
+        if i is None:
+            return parameterize_url(get_url_from_span(span))
+        rv = self._parameterized_urls[i]
+        if rv is _UNSET:
+            rv = self._parameterized_urls[i] = parameterize_url(self.url(span))
+        return cast(str, rv)
+
+
 def get_duration_between_spans(first_span: Span, second_span: Span):
     first_span_ends = first_span.get("timestamp", 0)
     second_span_begins = second_span.get("start_timestamp", 0)
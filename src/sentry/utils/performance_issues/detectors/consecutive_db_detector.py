@@ -17,7 +17,6 @@ from ..base import (
     PerformanceDetector,
     fingerprint_spans,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
 )
 from ..performance_problem import PerformanceProblem
@@ -85,8 +84,7 @@ class ConsecutiveDBSpanDetector(PerformanceDetector):
             "consecutive_count_threshold"
         )
         exceeds_span_duration_threshold = all(
-            get_span_duration(span).total_seconds() * 1000
-            > self.settings.get("span_duration_threshold")
+            self.span_features.duration_ms(span) > self.settings.get("span_duration_threshold")
             for span in self.independent_db_spans
         )
 
@@ -185,7 +183,7 @@ class ConsecutiveDBSpanDetector(PerformanceDetector):
         "Given a list of spans, find the sum of the span durations in milliseconds"
         sum = 0.0
         for span in spans:
-            sum += get_span_duration(span).total_seconds() * 1000
+            sum += self.span_features.duration_ms(span)
         return sum
 
     def _set_independent_spans(self, spans: list[Span]):
@@ -216,13 +214,13 @@ class ConsecutiveDBSpanDetector(PerformanceDetector):
         total_duration = self._sum_span_duration(consecutive_spans)
 
         max_independent_span_duration = max(
-            [get_span_duration(span).total_seconds() * 1000 for span in independent_spans]
+            [self.span_features.duration_ms(span) for span in independent_spans]
         )
 
         sum_of_dependent_span_durations = 0.0
         for span in consecutive_spans:
             if span not in independent_spans:
-                sum_of_dependent_span_durations += get_span_duration(span).total_seconds() * 1000
+                sum_of_dependent_span_durations += self.span_features.duration_ms(span)
 
         return total_duration - max(max_independent_span_duration, sum_of_dependent_span_durations)
 
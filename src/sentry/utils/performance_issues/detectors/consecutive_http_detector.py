@@ -15,7 +15,6 @@ from ..base import (
     fingerprint_http_spans,
     get_duration_between_spans,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
 )
 from ..performance_problem import PerformanceProblem
@@ -61,8 +60,7 @@ class ConsecutiveHTTPSpanDetector(PerformanceDetector):
             "consecutive_count_threshold"
         )
         exceeds_span_duration_threshold = all(
-            get_span_duration(span).total_seconds() * 1000
-            > self.settings.get("span_duration_threshold")
+            self.span_features.duration_ms(span) > self.settings.get("span_duration_threshold")
             for span in self.consecutive_http_spans
         )
 
@@ -125,7 +123,7 @@ class ConsecutiveHTTPSpanDetector(PerformanceDetector):
         "Given a list of spans, find the sum of the span durations in milliseconds"
         sum = 0.0
         for span in spans:
-            sum += get_span_duration(span).total_seconds() * 1000
+            sum += self.span_features.duration_ms(span)
         return sum
 
     def _overlaps_last_span(self, span: Span) -> bool:
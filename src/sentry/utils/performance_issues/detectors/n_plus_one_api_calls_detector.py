@@ -20,10 +20,8 @@ from ..base import (
     PerformanceDetector,
     fingerprint_http_spans,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
     get_url_from_span,
-    parameterize_url,
 )
 from ..performance_problem import PerformanceProblem
 from ..types import PerformanceProblemsMap, Span
@@ -62,7 +60,7 @@ class NPlusOneAPICallsDetector(PerformanceDetector):
             return
 
         duration_threshold = timedelta(milliseconds=self.settings.get("duration_threshold"))
-        span_duration = get_span_duration(span)
+        span_duration = self.span_features.duration(span)
 
         if span_duration < duration_threshold:
             return
@@ -209,7 +207,7 @@ class NPlusOneAPICallsDetector(PerformanceDetector):
         if not self.spans or len(self.spans) == 0:
             return []
 
-        urls = [get_url_from_span(span) for span in self.spans]
+        urls = [self.span_features.url(span) for span in self.spans]
 
         all_parameters: Mapping[str, List[str]] = defaultdict(list)
 
@@ -228,13 +226,13 @@ class NPlusOneAPICallsDetector(PerformanceDetector):
         if not repeating_span:
             return ""
 
-        url = get_url_from_span(repeating_span)
+        url = self.span_features.url(repeating_span)
         parsed_url = urlparse(url)
         return parsed_url.path or ""
 
     def _fingerprint(self) -> Optional[str]:
-        first_url = get_url_from_span(self.spans[0])
-        parameterized_first_url = parameterize_url(first_url)
+        first_url = self.span_features.url(self.spans[0])
+        parameterized_first_url = self.span_features.parameterized_url(self.spans[0])
 
         # Check if we parameterized the URL at all. If not, do not attempt
         # fingerprinting. Unparameterized URLs run too high a risk of
@@ -13,7 +13,6 @@ from ..base import (
     DETECTOR_TYPE_TO_GROUP_TYPE,
     DetectorType,
     PerformanceDetector,
-    fingerprint_span,
     get_notification_attachment_body,
     get_span_evidence_value,
 )
@@ -41,7 +40,7 @@ class SlowDBQueryDetector(PerformanceDetector):
         op, span_id, op_prefix, span_duration, settings = settings_for_span
         duration_threshold = settings.get("duration_threshold")
 
-        fingerprint = fingerprint_span(span)
+        fingerprint = self.span_features.fingerprint(span)
 
         if not fingerprint:
             return
@@ -3,7 +3,7 @@ from __future__ import annotations
 import hashlib
 import logging
 import random
-from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, cast
 
 import sentry_sdk
 
@@ -16,7 +16,7 @@ from sentry.utils.event import is_event_from_browser_javascript_sdk
 from sentry.utils.event_frames import get_sdk_name
 from sentry.utils.safe import get_path
 
-from .base import DetectorType, PerformanceDetector
+from .base import DetectorType, PerformanceDetector, SpanFeatureTable
 from .detectors import (
     ConsecutiveDBSpanDetector,
     ConsecutiveHTTPSpanDetector,
@@ -47,6 +47,20 @@ INTEGRATIONS_OF_INTEREST = [
 SDKS_OF_INTEREST = [
     "sentry.javascript.node",
 ]
+DETECTOR_CLASSES: Sequence[Type[PerformanceDetector]] = [
+    ConsecutiveDBSpanDetector,
+    ConsecutiveHTTPSpanDetector,
+    DBMainThreadDetector,
+    SlowDBQueryDetector,
+    RenderBlockingAssetSpanDetector,
+    NPlusOneDBSpanDetector,
+    NPlusOneDBSpanDetectorExtended,
+    FileIOMainThreadDetector,
+    NPlusOneAPICallsDetector,
+    MNPlusOneDBSpanDetector,
+    UncompressedAssetSpanDetector,
+    LargeHTTPPayloadDetector,
+]
 
 
 class EventPerformanceProblem:
@@ -277,23 +291,13 @@ def _detect_performance_problems(
     project_id = cast(int, project.id)
 
     detection_settings = get_detection_settings(project_id)
+    span_features = SpanFeatureTable(data.get("spans", []))
     detectors: List[PerformanceDetector] = [
-        ConsecutiveDBSpanDetector(detection_settings, data),
-        ConsecutiveHTTPSpanDetector(detection_settings, data),
-        DBMainThreadDetector(detection_settings, data),
-        SlowDBQueryDetector(detection_settings, data),
-        RenderBlockingAssetSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetectorExtended(detection_settings, data),
-        FileIOMainThreadDetector(detection_settings, data),
-        NPlusOneAPICallsDetector(detection_settings, data),
-        MNPlusOneDBSpanDetector(detection_settings, data),
-        UncompressedAssetSpanDetector(detection_settings, data),
-        LargeHTTPPayloadDetector(detection_settings, data),
+        detector_class(detection_settings, data, span_features)
+        for detector_class in DETECTOR_CLASSES
     ]
 
-    for detector in detectors:
-        run_detector_on_data(detector, data)
+    run_detectors_on_data(detectors, data)
 
     # Metrics reporting only for detection, not created issues.
     report_metrics_for_detectors(data, event_id, detectors, sdk_span, project.organization)
@@ -335,14 +339,25 @@ def _detect_performance_problems(
 
 
 def run_detector_on_data(detector, data):
-    if not detector.is_event_eligible(data):
+    run_detectors_on_data([detector], data)
+
+
+def run_detectors_on_data(detectors: Sequence[PerformanceDetector], data) -> None:
+    """
+    Walk the spans of the event once, visiting each span with every eligible
+    detector in turn.
+    """
+    eligible = [detector for detector in detectors if detector.is_event_eligible(data)]
+    if not eligible:
         return
 
-    spans = data.get("spans", [])
-    for span in spans:
-        detector.visit_span(span)
+    visitors = [detector.visit_span for detector in eligible]
+    for span in data.get("spans", []):
+        for visit_span in visitors:
+            visit_span(span)
 
-    detector.on_complete()
+    for detector in eligible:
+        detector.on_complete()
 
 
 # Reports metrics and creates spans for detection
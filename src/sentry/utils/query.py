@@ -1,9 +1,15 @@
+import queue
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import progressbar
 from django.db import connections, router
+from django.db.models import Max, Min
 
 from sentry import eventstore
+from sentry.utils import metrics
 
 _leaf_re = re.compile(r"^(UserReport|Event|Group)(.+)")
 
@@ -205,6 +211,168 @@ class RangeQuerySetWrapperWithProgressBarApprox(RangeQuerySetWrapperWithProgress
         return cursor.fetchone()[0]
 
 
+class _ShardDone:
+    def __init__(self, error=None):
+        self.error = error
+
+
+class ParallelRangeQuerySetWrapper:
+    """
+    Iterates through a queryset like ``RangeQuerySetWrapper``, but splits the
+    primary key range into ``shards`` contiguous ranges which are paged
+    through concurrently, each in a thread (and thus a database connection)
+    of its own.
+
+    Results are yielded as batches come in, so they are NOT ordered by
+    primary key. If ``values_list`` is given, results are tuples of the
+    primary key followed by these fields rather than model instances.
+
+    Intended for bulk jobs on large tables, where a single connection paging
+    through the table is the bottleneck.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        step=1000,
+        shards=4,
+        min_id=None,
+        max_id=None,
+        values_list=None,
+    ):
+        if (
+            queryset.query.low_mark
+            or queryset.query.high_mark is not None
+            or queryset.query.order_by
+            or queryset.query.extra_order_by
+        ):
+            raise InvalidQuerySetError
+
+        assert step > 0
+        assert shards > 0
+        self.queryset = queryset
+        self.step = step
+        self.shards = shards
+        self.min_id = min_id
+        self.max_id = max_id
+        self.values_list = values_list
+
+    def get_shard_ranges(self):
+        """Returns the ``[start, end)`` primary key ranges of the shards."""
+        min_id, max_id = self.min_id, self.max_id
+        if min_id is None or max_id is None:
+            bounds = self.queryset.aggregate(min_id=Min("pk"), max_id=Max("pk"))
+            if min_id is None:
+                min_id = bounds["min_id"]
+            if max_id is None:
+                max_id = bounds["max_id"]
+        if min_id is None or max_id is None or min_id > max_id:
+            return []
+
+        span = max_id - min_id + 1
+        shards = min(self.shards, span)
+        edges = [min_id + span * i // shards for i in range(shards)] + [max_id + 1]
+        return list(zip(edges[:-1], edges[1:]))
+
+    def _put(self, results, item, stop):
+        # The consumer may stop iterating at any time, so we must never block
+        # on a full queue for good.
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _iter_shard(self, start, end, results, stop):
+        tags = {"model": self.queryset.model.__name__}
+        error = None
+        try:
+            queryset = self.queryset.filter(pk__gte=start, pk__lt=end).order_by("pk")
+            if self.values_list is not None:
+                queryset = queryset.values_list("pk", *self.values_list)
+
+            last_pk = None
+            while not stop.is_set():
+                page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+
+                batch_start = time.monotonic()
+                batch = list(page[: self.step])
+                metrics.timing(
+                    "query.parallel_range_wrapper.batch_duration",
+                    time.monotonic() - batch_start,
+                    tags=tags,
+                )
+                if not batch:
+                    break
+
+                metrics.incr("query.parallel_range_wrapper.rows", len(batch), tags=tags)
+                if not self._put(results, batch, stop):
+                    break
+
+                last = batch[-1]
+                last_pk = last[0] if self.values_list is not None else last.pk
+                if len(batch) < self.step:
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            # Connections are per thread and would otherwise leak with the
+            # executor's threads.
+            connections.close_all()
+            self._put(results, _ShardDone(error), stop)
+
+    def __iter__(self):
+        shard_ranges = self.get_shard_ranges()
+        if not shard_ranges:
+            return
+
+        results = queue.Queue(maxsize=len(shard_ranges) * 2)
+        stop = threading.Event()
+        num = 0
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(
+            max_workers=len(shard_ranges), thread_name_prefix="parallel-range-query"
+        ) as executor:
+            for start, end in shard_ranges:
+                executor.submit(self._iter_shard, start, end, results, stop)
+
+            try:
+                pending = len(shard_ranges)
+                while pending:
+                    item = results.get()
+                    if isinstance(item, _ShardDone):
+                        if item.error is not None:
+                            raise item.error
+                        pending -= 1
+                        continue
+
+                    num += len(item)
+                    yield from item
+            finally:
+                stop.set()
+
+        duration = time.monotonic() - started
+        metrics.timing(
+            "query.parallel_range_wrapper.throughput",
+            num / duration if duration else 0,
+            tags={"model": self.queryset.model.__name__},
+        )
+
+
+class ParallelRangeQuerySetWrapperWithProgressBar(ParallelRangeQuerySetWrapper):
+    def get_total_count(self):
+        return self.queryset.count()
+
+    def __iter__(self):
+        total_count = self.get_total_count()
+        iterator = super().__iter__()
+        label = self.queryset.model._meta.verbose_name_plural.title()
+        return iter(WithProgressBar(iterator, total_count, label))
+
+
 class WithProgressBar:
     def __init__(self, iterator, count=None, caption=None):
         if count is None and hasattr(iterator, "__len__"):
@@ -6,12 +6,23 @@ import os
 import re
 import time
 from collections import namedtuple
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
 from hashlib import sha1
-from typing import Any, Callable, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
 
 import pytz
@@ -24,6 +35,7 @@ from sentry_sdk import Hub
 from snuba_sdk import Request
 from snuba_sdk.legacy import json_to_snql
 
+from sentry import options
 from sentry.models import (
     Environment,
     Group,
@@ -40,6 +52,8 @@ from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
 from sentry.utils import json, metrics
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.snuba_query_cache import LocalResultCache, SingleFlight
+from sentry.utils.snuba_stream import ResponseScanner
 
 logger = logging.getLogger(__name__)
 
@@ -397,6 +411,17 @@ _snuba_pool = connection_from_url(
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
 
+# Size of the chunks streamed responses are read in, see `stream_snql_query`.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Identical queries in flight in this process, see `_apply_cache_and_build_results`.
+_query_single_flight = SingleFlight()
+_local_result_cache = (
+    LocalResultCache(settings.SENTRY_SNUBA_LOCAL_CACHE_SIZE)
+    if settings.SENTRY_SNUBA_LOCAL_CACHE_SIZE
+    else None
+)
+
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
 
@@ -838,6 +863,14 @@ def bulk_raw_query(
     return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
 
 
+def _get_local_cache_ttl(referrer: Optional[str]) -> Optional[int]:
+    """Seconds results of `referrer` are kept in the local result cache, if at all."""
+    if _local_result_cache is None or not referrer:
+        return None
+    ttl = (options.get("snuba.local-cache.referrer-ttls") or {}).get(referrer)
+    return int(ttl) if ttl else None
+
+
 def _apply_cache_and_build_results(
     snuba_param_list: Sequence[SnubaQueryBody],
     referrer: Optional[str] = None,
@@ -851,32 +884,96 @@ def _apply_cache_and_build_results(
     query_param_list = list(enumerate(snuba_param_list))
 
     results = []
+    metric_tags = {"referrer": referrer} if referrer else None
+    local_cache_ttl = _get_local_cache_ttl(referrer)
+    coalesce = settings.SENTRY_SNUBA_COALESCE_QUERIES
+
+    to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]]
+    if use_cache or coalesce or local_cache_ttl:
+        to_query = [
+            (query_pos, query_params, get_cache_key(query_params[0]))
+            for query_pos, query_params in query_param_list
+        ]
+    else:
+        to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
 
-    if use_cache:
-        cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
-        to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
-        for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
+    if local_cache_ttl:
+        assert _local_result_cache is not None
+        remaining = []
+        for query_pos, query_params, cache_key in to_query:
+            assert cache_key is not None
+            cached_result = _local_result_cache.get(cache_key)
+            if cached_result is None:
+                metrics.incr("snuba.local_cache.miss", tags=metric_tags)
+                remaining.append((query_pos, query_params, cache_key))
+            else:
+                metrics.incr("snuba.local_cache.hit", tags=metric_tags)
+                results.append((query_pos, json.loads(cached_result)))
+        to_query = remaining
+
+    if use_cache and to_query:
+        cache_data = cache.get_many([cache_key for _, _, cache_key in to_query])
+        remaining = []
+        for query_pos, query_params, cache_key in to_query:
             cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
             if cached_result is None:
                 metrics.incr("snuba.query_cache.miss", tags=metric_tags)
-                to_query.append((query_pos, query_params, cache_key))
+                remaining.append((query_pos, query_params, cache_key))
             else:
                 metrics.incr("snuba.query_cache.hit", tags=metric_tags)
                 results.append((query_pos, json.loads(cached_result)))
-    else:
-        to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
+        to_query = remaining
+
+    # Identical queries which are already running in another thread are not
+    # sent again, we wait for their result instead. Consistent queries have to
+    # see writes made right before, so they are always sent.
+    waiting: List[Tuple[int, Future[Any]]] = []
+    claimed: List[str] = []
+    if coalesce and to_query:
+        remaining = []
+        for query_pos, query_params, cache_key in to_query:
+            assert cache_key is not None
+            query = query_params[0]
+            if isinstance(query, Request) and query.flags.consistent:
+                remaining.append((query_pos, query_params, cache_key))
+                continue
+
+            future, is_leader = _query_single_flight.claim(cache_key)
+            if is_leader:
+                claimed.append(cache_key)
+                remaining.append((query_pos, query_params, cache_key))
+            else:
+                metrics.incr("snuba.query_coalesced", tags=metric_tags)
+                waiting.append((query_pos, future))
+        to_query = remaining
 
-    if to_query:
-        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+    try:
+        if to_query:
+            query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+            for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+                if cache_key and (use_cache or local_cache_ttl):
+                    serialized = json.dumps(result)
+                    if use_cache:
+                        cache.set(cache_key, serialized, settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
+                    if local_cache_ttl:
+                        assert _local_result_cache is not None
+                        _local_result_cache.set(cache_key, serialized, local_cache_ttl)
+                if cache_key in claimed:
+                    claimed.remove(cache_key)
+                    _query_single_flight.resolve(cache_key, result, copy=deepcopy)
+                results.append((query_pos, result))
+    except BaseException as e:
+        # Threads waiting for our queries must not wait forever
+        for cache_key in claimed:
+            _query_single_flight.resolve(cache_key, error=e)
+        raise
+
+    for query_pos, future in waiting:
+        # Every thread gets its own copy, as callers may modify results
+        results.append((query_pos, deepcopy(future.result())))
 
     # Sort so that we get the results back in the original param list order
-    results.sort()
+    results.sort(key=lambda result: result[0])
     # Drop the sort order val
     return [result[1] for result in results]
 
@@ -945,20 +1042,7 @@ def _bulk_snuba_query(
             raise UnexpectedResponseError(f"Could not decode JSON response: {response.data!r}")
 
         if response.status != 200:
-            if body.get("error"):
-                error = body["error"]
-                if response.status == 429:
-                    raise RateLimitExceeded(error["message"])
-                elif error["type"] == "schema":
-                    raise SchemaValidationError(error["message"])
-                elif error["type"] == "clickhouse":
-                    raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
-                        error["message"]
-                    )
-                else:
-                    raise SnubaError(error["message"])
-            else:
-                raise SnubaError(f"HTTP {response.status}")
+            _raise_error_response(response.status, body)
 
         # Forward and reverse translation maps from model ids to snuba keys, per column
         body["data"] = [reverse(d) for d in body["data"]]
@@ -967,6 +1051,107 @@ def _bulk_snuba_query(
     return results
 
 
+def _raise_error_response(status: int, body: Mapping[str, Any]) -> None:
+    if body.get("error"):
+        error = body["error"]
+        if status == 429:
+            raise RateLimitExceeded(error["message"])
+        elif error["type"] == "schema":
+            raise SchemaValidationError(error["message"])
+        elif error["type"] == "clickhouse":
+            raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
+                error["message"]
+            )
+        else:
+            raise SnubaError(error["message"])
+    else:
+        raise SnubaError(f"HTTP {status}")
+
+
+def stream_snql_query(
+    request: Request,
+    referrer: Optional[str] = None,
+) -> Iterator[Mapping[str, Any]]:
+    """
+    Like `raw_snql_query`, but yield the rows of the result as they are read
+    off the response, instead of decoding the whole response at once. Meant
+    for queries returning a lot of rows, e.g. data exports. Results are never
+    cached, and the query is only sent once iteration starts.
+    """
+    metrics.incr("snql.sdk.api", tags={"referrer": referrer or "unknown"})
+    if "consistent" in OVERRIDE_OPTIONS:
+        request.flags.consistent = OVERRIDE_OPTIONS["consistent"]
+
+    if referrer:
+        request.tenant_ids = request.tenant_ids or dict()
+        request.tenant_ids["referrer"] = referrer
+
+    headers = {}
+    validate_referrer(referrer)
+    if referrer:
+        headers["referer"] = referrer
+
+    return _stream_snuba_query((request, lambda x: x, lambda x: x), headers)
+
+
+def _stream_snuba_query(
+    query: SnubaQueryBody, headers: Mapping[str, str]
+) -> Iterator[Mapping[str, Any]]:
+    request, _, reverse = query
+    assert isinstance(request, Request)
+    query_referrer = headers.get("referer", "<unknown>")
+
+    with sentry_sdk.start_span(op="snuba_query", description=query_referrer) as span:
+        span.set_tag("query.referrer", query_referrer)
+        sentry_sdk.set_tag("query.referrer", query_referrer)
+        with sentry_sdk.configure_scope() as scope:
+            if scope.transaction:
+                request.parent_api = scope.transaction.name
+
+        try:
+            response = _raw_snql_query(request, Hub(Hub.current), headers, preload_content=False)
+        except urllib3.exceptions.HTTPError as err:
+            raise SnubaError(err)
+
+    finished = False
+    try:
+        if response.status != 200:
+            data = response.data
+            try:
+                body = json.loads(data)
+            except ValueError:
+                logger.exception("snuba.query.invalid-json", extra={"response.data": data})
+                raise SnubaError("Failed to parse snuba error response")
+            _raise_error_response(response.status, body)
+
+        scanner = ResponseScanner()
+        row_count = 0
+        try:
+            for chunk in response.stream(STREAM_CHUNK_SIZE):
+                for row in scanner.feed(chunk):
+                    row_count += 1
+                    yield reverse(json.loads(row))
+            body = scanner.close()
+        except ValueError:
+            raise UnexpectedResponseError("Could not decode JSON response")
+        except urllib3.exceptions.HTTPError as err:
+            raise SnubaError(err)
+        finished = True
+
+        metrics.timing("snuba.stream.rows", row_count, tags={"referrer": query_referrer})
+        if SNUBA_INFO and "sql" in body:
+            print(  # NOQA: only prints when an env variable is set
+                "{}.sql:\n {}".format(
+                    query_referrer, sqlparse.format(body["sql"], reindent_aligned=True)
+                )
+            )
+    finally:
+        if not finished:
+            # The rest of the response is not read, so the connection can't be reused.
+            response.close()
+        response.release_conn()
+
+
 RawResult = Tuple[urllib3.response.HTTPResponse, Callable[[Any], Any], Callable[[Any], Any]]
 
 
@@ -1004,7 +1189,7 @@ def _legacy_snql_query(params: Tuple[SnubaQuery, Hub, Mapping[str, str], str]) -
 
 
 def _raw_snql_query(
-    request: Request, thread_hub: Hub, headers: Mapping[str, str]
+    request: Request, thread_hub: Hub, headers: Mapping[str, str], preload_content: bool = True
 ) -> urllib3.response.HTTPResponse:
     # Enter hub such that http spans are properly nested
     with thread_hub, timer("snql_query"):
@@ -1024,7 +1209,11 @@ def _raw_snql_query(
         with thread_hub.start_span(op="snuba_snql.run", description=str(request)) as span:
             span.set_tag("snuba.referrer", referrer)
             return _snuba_pool.urlopen(
-                "POST", f"/{request.dataset}/snql", body=body, headers=headers
+                "POST",
+                f"/{request.dataset}/snql",
+                body=body,
+                headers=headers,
+                preload_content=preload_content,
             )
 
 
@@ -0,0 +1,136 @@
+"""
+In-process deduplication of Snuba queries.
+
+Popular pages (e.g. a dashboard opened by many users at once) run the exact
+same queries at the same time. `SingleFlight` lets only one thread of a
+process send a query while identical queries wait for its result, and
+`LocalResultCache` keeps results of selected referrers around for a few
+seconds after that.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sentry.utils import metrics
+
+
+class SingleFlight:
+    """
+    Tracks calls in flight by key.
+
+    The first thread to `claim` a key becomes its leader and has to `resolve`
+    it once done, whether the call succeeded or not. Threads claiming a key
+    while it is in flight get the future of the leader's call instead.
+    """
+
+    def __init__(self) -> None:
+        # Future of the call and number of threads waiting for it, by key
+        self._calls: Dict[str, Tuple[Future[Any], int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def claim(self, key: str) -> Tuple[Future[Any], bool]:
+        """Return the future of the call of `key`, and whether the caller has to make the call."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                future: Future[Any] = Future()
+                self._calls[key] = (future, 0)
+                return future, True
+
+            future, waiters = call
+            self._calls[key] = (future, waiters + 1)
+            return future, False
+
+    def resolve(
+        self,
+        key: str,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+        copy: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """
+        Hand the result (or error) of the call of `key` to the threads waiting
+        for it. When given, `copy` is applied to the result if any thread is
+        waiting, so that the caller is free to modify the original.
+        """
+        with self._lock:
+            future, waiters = self._calls.pop(key)
+
+        if error is not None:
+            future.set_exception(error)
+            return
+
+        try:
+            future.set_result(copy(result) if copy is not None and waiters else result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+
+
+class LocalResultCache:
+    """
+    A bounded, in-process LRU cache of serialized query results.
+
+    Every entry has its own TTL. The cache is bounded by the total size of the
+    stored results, which are kept serialized so that every hit hands out a
+    fresh copy.
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.monotonic) -> None:
+        assert max_size > 0
+        self.max_size = max_size
+        self.clock = clock
+        self.size = 0
+        self._entries: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        if len(value) > self.max_size:
+            return
+
+        evicted = 0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, self.clock() + ttl)
+            self.size += len(value)
+            while self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+
+        if evicted:
+            metrics.incr("snuba.local_cache.evicted", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
@@ -0,0 +1,79 @@
+"""
+Incremental decoding of Snuba responses.
+
+The rows of a query result make up almost all of a Snuba response, so large
+results are split into their rows as the response is read, rather than being
+decoded as a whole: only the rows the caller still holds on to are kept in
+memory, instead of the raw response, the decoded response and the translated
+rows all at once.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Iterator, Mapping, Optional
+
+from sentry.utils import json
+
+# The key of the rows of a response, up to the start of the array. The key
+# has to follow the start of the object or a comma, so that it can't be the
+# end of an (escaped) string.
+_DATA_KEY_RE = re.compile(rb'[{,]\s*"data"\s*:\s*\[\Z')
+
+
+class ResponseScanner:
+    """
+    Split the body of a Snuba response into the rows of its `data` array as
+    the bytes of the body come in.
+
+    Rows are yielded by `feed` as raw bytes. Everything else (`meta`,
+    `timing`, ...) is buffered and returned by `close`, with `data` left empty.
+    """
+
+    def __init__(self) -> None:
+        self.brackets = json.BracketScanner()
+        self.in_data = False
+        # Bytes of the current row, None when outside of a row.
+        self.row: Optional[bytearray] = None
+        # The body without the rows.
+        self.rest = bytearray()
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        # Start of the bytes of the chunk which are still to be copied to
+        # either the current row or the rest of the body.
+        copy_start = 0
+
+        for pos, opening in self.brackets.scan(chunk):
+            depth = self.brackets.depth
+            if self.in_data:
+                if opening and depth == 3:
+                    # Start of a row.
+                    self.row = bytearray()
+                    copy_start = pos
+                elif not opening and depth == 2 and self.row is not None:
+                    self.row += chunk[copy_start : pos + 1]
+                    yield bytes(self.row)
+                    self.row = None
+                elif not opening and depth == 1:
+                    # End of the rows.
+                    self.in_data = False
+                    copy_start = pos
+            elif opening and depth == 2 and chunk[pos] == ord("["):
+                self.rest += chunk[copy_start : pos + 1]
+                copy_start = pos + 1
+                # Only the end of the body is matched, the key is close to it.
+                if _DATA_KEY_RE.search(self.rest, max(len(self.rest) - 64, 0)):
+                    self.in_data = True
+
+        if self.row is not None:
+            self.row += chunk[copy_start:]
+        elif not self.in_data:
+            self.rest += chunk[copy_start:]
+
+    def close(self) -> Mapping[str, Any]:
+        """Return the body without its rows, once all of it has been fed."""
+        self.brackets.close()
+        body = json.loads(bytes(self.rest))
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object")
+        return body
@@ -15,6 +15,7 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    parse_query_tree,
     parse_search_query,
 )
 from sentry.constants import MODULE_ROOT
@@ -633,6 +634,47 @@ class ParseSearchQueryBackendTest(SimpleTestCase):
         # the slash should be removed in the final value
         assert search_filter.value.value == 'a"b'
 
+    def test_parse_tree_cache(self):
+        parse_query_tree.cache_clear()
+        query = "user.email:foo@example.com release:1.2.1 title:hello"
+        expected = parse_search_query(query)
+        with patch("sentry.api.event_search.event_search_grammar.parse") as parse:
+            assert parse_search_query(query) == expected
+            assert parse_search_query(query, config_overrides={"allowed_keys": set()}) == expected
+            assert parse.call_count == 0
+
+    def test_empty_query(self):
+        with patch("sentry.api.event_search.event_search_grammar.parse") as parse:
+            assert parse_search_query("") == []
+            assert parse_search_query("   ") == []
+            assert parse.call_count == 0
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("cached", [True, False], ids=["cached", "uncached"])
+def test_benchmark_parse_search_query(cached, benchmark):
+    query = (
+        "event.type:transaction transaction.duration:>500ms "
+        "(http.method:GET OR http.method:POST) !transaction:/api/0/* "
+        "p95(transaction.duration):>1s user.email:*@example.com has:release"
+    )
+
+    def setup():
+        if not cached:
+            parse_query_tree.cache_clear()
+        return (query,), {}
+
+    benchmark.pedantic(parse_search_query, setup=setup, rounds=100)
+
 
 @pytest.mark.parametrize(
     "raw,result",
@@ -7,9 +7,10 @@ from django.utils import timezone
 from django.utils.encoding import force_text
 from freezegun import freeze_time
 
-from sentry.buffer.redis import RedisBuffer
+from sentry.buffer.redis import MSGPACK_PREFIX, RedisBuffer
 from sentry.models import Group, Project
 from sentry.testutils import TestCase
+from sentry.testutils.helpers.options import override_options
 from sentry.utils import json
 
 
@@ -216,6 +217,92 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(mock.Mock, {"times_seen": 1}, {"pk": 1}, {}, True)
 
+    @override_options({"buffer.redis.msgpack-encoding": True})
+    def test_incr_saves_msgpack_to_redis(self):
+        now = datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1, "datetime": now}
+        key = self.buf._make_key(model, filters=filters)
+        self.buf.incr(model, {"times_seen": 1}, filters, extra={"foo": "bar", "datetime": now})
+        result = {force_text(k): v for k, v in client.hgetall(key).items()}
+
+        assert RedisBuffer._decode_values(result.pop("f")) == filters
+        assert RedisBuffer._decode_value(result.pop("e+datetime")) == now
+        assert RedisBuffer._decode_value(result.pop("e+foo")) == "bar"
+        assert result == {"i+times_seen": b"1", "m": b"unittest.mock.Mock"}
+
+    @override_options({"buffer.redis.msgpack-encoding": True})
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_incr_msgpack_falls_back_to_pickle(self, process):
+        now = datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        # The extra values `_process_existing_aggregate` buffers for groups
+        extra = {
+            "last_seen": now,
+            "data": {"type": "error", "metadata": {"type": "ValueError", "value": "x"}},
+            "message": "ValueError x",
+            "level": 40,
+            "culprit": None,
+            "first_seen": now,
+        }
+        filters = {"id": 1}
+        key = self.buf._make_key(Group, filters)
+        self.buf.incr(Group, {"times_seen": 1}, filters, extra=extra)
+
+        client = self.buf.cluster.get_routing_client()
+        assert client.hget(key, "e+last_seen").startswith(MSGPACK_PREFIX)
+        assert not client.hget(key, "e+data").startswith(MSGPACK_PREFIX)
+
+        self.buf.process(key)
+        process.assert_called_once_with(Group, {"times_seen": 1}, filters, extra, None)
+
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_batch(self, process):
+        now = datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        keys = []
+        for pk in (1, 2, 3):
+            filters = {"pk": pk}
+            keys.append(self.buf._make_key(Group, filters))
+            with override_options({"buffer.redis.msgpack-encoding": pk != 2}):
+                self.buf.incr(Group, {"times_seen": pk}, filters, extra={"last_seen": now})
+
+        self.buf.process(batch_keys=keys)
+
+        assert process.call_count == 3
+        for pk in (1, 2, 3):
+            process.assert_any_call(Group, {"times_seen": pk}, {"pk": pk}, {"last_seen": now}, None)
+        client = self.buf.cluster.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+        for key in keys:
+            assert not client.exists(key)
+            assert not client.exists(self.buf._make_lock_key(key))
+
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_batch_skips_locked_keys(self, process):
+        keys = [self.buf._make_key(Group, {"pk": pk}) for pk in (1, 2)]
+        for pk in (1, 2):
+            self.buf.incr(Group, {"times_seen": 1}, {"pk": pk})
+        client = self.buf.cluster.get_routing_client()
+        client.set(self.buf._make_lock_key(keys[0]), "1")
+
+        self.buf.process(batch_keys=keys)
+
+        process.assert_called_once_with(Group, {"times_seen": 1}, {"pk": 2}, {}, None)
+        assert client.exists(keys[0])
+        assert client.exists(self.buf._make_lock_key(keys[0]))
+
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_batch_isolates_failures(self, process):
+        process.side_effect = [Exception("boom"), None]
+        keys = [self.buf._make_key(Group, {"pk": pk}) for pk in (1, 2)]
+        for pk in (1, 2):
+            self.buf.incr(Group, {"times_seen": 1}, {"pk": pk})
+
+        self.buf.process(batch_keys=keys)
+
+        assert process.call_count == 2
+
 
 #    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
 #    def test_incr_uses_signal_only(self):
@@ -248,3 +335,27 @@ class RedisBufferTest(TestCase):
 )
 def test_dump_value(value):
     assert RedisBuffer._load_value(json.loads(json.dumps(RedisBuffer._dump_value(value)))) == value
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "foo",
+        1,
+        1.5,
+        datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc),
+        datetime.date(2017, 5, 3),
+    ],
+)
+def test_encode_value(value):
+    assert RedisBuffer._decode_value(RedisBuffer._encode_value(value)) == value
+    assert RedisBuffer._decode_value(pickle.dumps(value)) == value
+    assert RedisBuffer._decode_value(json.dumps(RedisBuffer._dump_value(value)).encode()) == value
+
+
+@pytest.mark.parametrize("value", [None, True, False, {"type": "error", "metadata": {}}, ["a", 1]])
+def test_encode_value_fallback(value):
+    assert RedisBuffer._decode_value(RedisBuffer._encode_value(value)) == value
+    assert RedisBuffer._decode_values(RedisBuffer._encode_values({"a": value})) == {"a": value}
+    decoded = RedisBuffer._decode_value(RedisBuffer._encode_value(value))
+    assert type(decoded) is type(value)
@@ -393,7 +393,7 @@ class AssembleDownloadTest(TestCase, SnubaTestCase):
 
         assert emailer.called
 
-    @patch("sentry.search.events.builder.discover.raw_snql_query")
+    @patch("sentry.search.events.builder.discover.stream_snql_query")
     @patch("sentry.data_export.models.ExportedData.email_failure")
     def test_discover_outside_retention(self, emailer, mock_query):
         """
@@ -420,7 +420,7 @@ class AssembleDownloadTest(TestCase, SnubaTestCase):
         error = emailer.call_args[1]["message"]
         assert error == "Invalid date range. Please try a more recent date range."
 
-    @patch("sentry.snuba.discover.query")
+    @patch("sentry.snuba.discover.stream_query")
     @patch("sentry.data_export.models.ExportedData.email_failure")
     def test_discover_invalid_search_query(self, emailer, mock_query):
         de = ExportedData.objects.create(
@@ -443,7 +443,7 @@ class AssembleDownloadTest(TestCase, SnubaTestCase):
         error = emailer.call_args[1]["message"]
         assert error == "Invalid query. Please fix the query and try again."
 
-    @patch("sentry.search.events.builder.discover.raw_snql_query")
+    @patch("sentry.search.events.builder.discover.stream_snql_query")
     def test_retries_on_recoverable_snuba_errors(self, mock_query):
         de = ExportedData.objects.create(
             user_id=self.user.id,
@@ -453,10 +453,7 @@ class AssembleDownloadTest(TestCase, SnubaTestCase):
         )
         mock_query.side_effect = [
             QueryMemoryLimitExceeded("test"),
-            {
-                "data": [{"count": 3}],
-                "meta": [{"name": "count", "type": "UInt64"}],
-            },
+            iter([{"count": 3}]),
         ]
         with self.tasks():
             assemble_download(de.id, count_down=0)
@@ -472,7 +469,7 @@ class AssembleDownloadTest(TestCase, SnubaTestCase):
         with file.getfile() as f:
             header, row = f.read().strip().split(b"\r\n")
 
-    @patch("sentry.search.events.builder.discover.raw_snql_query")
+    @patch("sentry.search.events.builder.discover.stream_snql_query")
     @patch("sentry.data_export.models.ExportedData.email_failure")
     def test_discover_snuba_error(self, emailer, mock_query):
         de = ExportedData.objects.create(
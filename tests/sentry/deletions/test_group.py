@@ -1,8 +1,13 @@
+from datetime import timedelta
 from unittest import mock
 from uuid import uuid4
 
-from sentry import nodestore
-from sentry.deletions.defaults.group import EventDataDeletionTask
+from sentry import deletions, nodestore
+from sentry.deletions.defaults.group import (
+    EventDataDeletionTask,
+    delete_nodes,
+    get_event_data_partitions,
+)
 from sentry.eventstore.models import Event
 from sentry.models import (
     EventAttachment,
@@ -14,8 +19,10 @@ from sentry.models import (
     GroupRedirect,
     UserReport,
 )
+from sentry.nodestore.django import DjangoNodeStorage
 from sentry.tasks.deletion.groups import delete_groups
 from sentry.testutils import SnubaTestCase, TestCase
+from sentry.testutils.helpers import override_options
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.testutils.silo import region_silo_test
 
@@ -138,3 +145,97 @@ class DeleteGroupTest(TestCase, SnubaTestCase):
             delete_groups(object_ids=[group.id])
 
         assert nodestore_delete_multi.call_count == 0
+
+    def test_partitioned(self):
+        old_event = self.store_event(
+            data={
+                "event_id": "d" * 32,
+                "timestamp": iso_format(before_now(hours=3)),
+                "fingerprint": ["group1"],
+            },
+            project_id=self.project.id,
+        )
+        old_node_id = Event.generate_node_id(self.project.id, old_event.event_id)
+        group = self.event.group
+        group.update(first_seen=before_now(hours=3))
+        assert len(get_event_data_partitions([group], 3)) == 3
+
+        with override_options({"deletions.group.event-data-partitions": 3}), self.tasks():
+            delete_groups(object_ids=[group.id])
+
+        assert not Group.objects.filter(id=group.id).exists()
+        assert not nodestore.get(self.node_id)
+        assert not nodestore.get(self.node_id2)
+        assert not nodestore.get(old_node_id)
+        assert nodestore.get(self.node_id3), "Does not remove from second group"
+
+    @mock.patch.object(EventDataDeletionTask, "DEFAULT_CHUNK_SIZE", 1)
+    def test_checkpoint(self):
+        group = self.event.group
+        transaction_id = uuid4().hex
+
+        with override_options({"deletions.group.event-data-checkpoints": True}):
+            task = EventDataDeletionTask(
+                deletions.default_manager, groups=[group], transaction_id=transaction_id
+            )
+            assert task.chunk()
+            assert not nodestore.get(self.node_id2)
+            assert nodestore.get(self.node_id)
+
+            # A retried deletion continues after the last deleted event
+            retried = EventDataDeletionTask(
+                deletions.default_manager, groups=[group], transaction_id=transaction_id
+            )
+            assert retried.chunk()
+            assert not nodestore.get(self.node_id)
+            [partition] = retried.partitions
+            assert partition.cursor[1] == self.event_id
+
+            assert not retried.chunk()
+            assert retried.load_checkpoint() is None
+
+    @mock.patch.object(EventDataDeletionTask, "delete_partition_chunk", autospec=True)
+    def test_concurrent(self, delete_partition_chunk):
+        def delete_all(task, partition, *args):
+            partition.done = True
+
+        delete_partition_chunk.side_effect = delete_all
+        group = self.event.group
+        group.update(first_seen=before_now(hours=3))
+
+        with override_options(
+            {
+                "deletions.group.event-data-partitions": 3,
+                "deletions.group.event-data-concurrency": 3,
+            }
+        ):
+            task = EventDataDeletionTask(deletions.default_manager, groups=[group])
+            assert not task.chunk()
+
+        assert delete_partition_chunk.call_count == 3
+        assert all(partition.done for partition in task.partitions)
+
+    def test_get_event_data_partitions(self):
+        group = self.event.group
+        group.first_seen = before_now(hours=3).replace(microsecond=0)
+        group.last_seen = group.first_seen + timedelta(hours=3)
+
+        first, second, third = get_event_data_partitions([group], 3)
+        assert (first.start, first.end) == (None, second.start)
+        assert second.start == (group.first_seen + timedelta(hours=1)).isoformat()
+        assert second.end == (group.first_seen + timedelta(hours=2)).isoformat()
+        assert (third.start, third.end) == (second.end, None)
+
+        group.last_seen = group.first_seen
+        [partition] = get_event_data_partitions([group], 3)
+        assert (partition.start, partition.end) == (None, None)
+
+    @mock.patch.object(DjangoNodeStorage, "delete_batch_size", 2)
+    @mock.patch("sentry.nodestore.delete_multi")
+    def test_delete_nodes(self, delete_multi):
+        delete_nodes(["a", "b", "c", "d", "e"])
+        assert delete_multi.call_args_list == [
+            mock.call(["a", "b"]),
+            mock.call(["c", "d"]),
+            mock.call(["e"]),
+        ]
@@ -1,4 +1,5 @@
 import time
+from unittest import mock
 
 import pytest
 
@@ -151,3 +152,145 @@ class RedisBackendTestCase(TestCase):
 
         with backend.digest("timeline", 0) as records:
             assert len(set(records)) == n
+
+    def test_digest_many(self):
+        backend = RedisBackend()
+
+        timelines = [f"timeline:{i}" for i in range(10)]
+        records = {}
+        for timeline in timelines:
+            records[timeline] = Record(f"{timeline}:record", "value", time.time())
+            backend.add(timeline, records[timeline])
+
+        # Being digested elsewhere
+        lock = backend._get_timeline_lock("timeline:1", duration=30)
+        lock.acquire()
+
+        def build(key, records):
+            if key == "timeline:2":
+                raise Exception("This causes the digest to not be closed.")
+            return set(records)
+
+        results = backend.digest_many(
+            timelines + ["timeline:unknown"], build, minimum_delays={"timeline:3": 0}
+        )
+        assert results == {
+            timeline: {records[timeline]}
+            for timeline in timelines
+            if timeline not in ("timeline:1", "timeline:2")
+        }
+        lock.release()
+
+        # Failed and skipped timelines were neither closed nor left locked.
+        for timeline in ("timeline:1", "timeline:2"):
+            with backend.digest(timeline) as digest_records:
+                assert set(digest_records) == {records[timeline]}
+
+        # Closed timelines were moved to the waiting state, and are due
+        # after their minimum delay.
+        assert {entry.key for entry in backend.schedule(time.time())} == {"timeline:3"}
+        with backend.digest("timeline:3", 0) as digest_records:
+            assert set(digest_records) == set()
+
+        with pytest.raises(InvalidState):
+            with backend.digest("timeline:4", 0):
+                pass
+
+    def test_digest_many_concurrency(self):
+        backend = RedisBackend()
+
+        timelines = [f"timeline:{i}" for i in range(10)]
+        for timeline in timelines:
+            backend.add(timeline, Record(f"{timeline}:record", "value", time.time()))
+
+        results = backend.digest_many(
+            timelines, lambda key, records: [record.key for record in records], concurrency=4
+        )
+        assert results == {timeline: [f"{timeline}:record"] for timeline in timelines}
+
+    def test_digest_many_unset_minimum_delay(self):
+        backend = RedisBackend(minimum_delay=0)
+        backend.add("timeline", Record("record", "value", time.time()))
+
+        # Projects without a minimum delay option get None
+        results = backend.digest_many(
+            ["timeline"], lambda key, records: set(records), {"timeline": None}
+        )
+        assert list(results) == ["timeline"]
+
+        # The digest was closed with the default minimum delay
+        assert {entry.key for entry in backend.schedule(time.time())} == {"timeline"}
+        with backend.digest("timeline", 0) as digest_records:
+            assert set(digest_records) == set()
+
+    def test_digest_many_close_failure(self):
+        backend = RedisBackend()
+        record = Record("record", "value", time.time())
+        backend.add("timeline", record)
+
+        execute_commands = backend.cluster.execute_commands
+
+        def fail_close(commands):
+            for host_commands in commands.values():
+                if host_commands[0][2][0] == "DIGEST_CLOSE_MANY":
+                    raise Exception("boom")
+            return execute_commands(commands)
+
+        with mock.patch.object(backend.cluster, "execute_commands", side_effect=fail_close):
+            assert backend.digest_many(["timeline"], lambda key, records: set(records)) == {}
+
+        # The digest was neither delivered nor left locked, and is delivered later on.
+        with backend.digest("timeline") as digest_records:
+            assert set(digest_records) == {record}
+
+    def test_digest_many_partial_close_failure(self):
+        backend = RedisBackend()
+        timelines = ["timeline:0", "timeline:1"]
+        for timeline in timelines:
+            backend.add(timeline, Record(f"{timeline}:record", "value", time.time()))
+
+        def build(key, records):
+            if key == "timeline:1":
+                # Closing this digest fails within the script.
+                client = backend._get_connection(key)
+                client.delete(f"{backend.namespace}:t:{key}:d")
+                client.set(f"{backend.namespace}:t:{key}:d", "value")
+            return set(records)
+
+        # Both digests are closed with the same script call.
+        results = backend.digest_many(timelines, build, concurrency=2)
+
+        # The digest closed before the failure is still delivered.
+        assert list(results) == ["timeline:0"]
+        for timeline in timelines:
+            lock = backend._get_timeline_lock(timeline, duration=1)
+            lock.acquire()
+            lock.release()
+
+    def test_digest_many_lock_duration(self):
+        backend = RedisBackend()
+        timelines = [f"timeline:{i}" for i in range(4)]
+        for timeline in timelines:
+            backend.add(timeline, Record(f"{timeline}:record", "value", time.time()))
+
+        def build(key, records):
+            lock = backend._get_timeline_lock(key, duration=0)
+            client = backend.locks.backend.get_client(lock.key, lock.routing_key)
+            return client.ttl(backend.locks.backend.prefix_key(lock.key))
+
+        execute_commands = backend.cluster.execute_commands
+        with mock.patch.object(
+            backend.cluster, "execute_commands", side_effect=execute_commands
+        ) as mock_execute_commands:
+            results = backend.digest_many(timelines, build, concurrency=2)
+
+        # Timelines are digested in batches of one timeline per thread, with
+        # the lock duration of a single digest.
+        assert all(30 - 5 < ttl <= 30 for ttl in results.values())
+        opened = [
+            host_commands[0][2][-2:]
+            for (commands,), _ in mock_execute_commands.call_args_list
+            for host_commands in commands.values()
+            if host_commands[0][2][0] == "DIGEST_OPEN_MANY"
+        ]
+        assert opened == [timelines[:2], timelines[2:]]
@@ -442,3 +442,50 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+def test_rules_filtered_by_family():
+    enhancements = Enhancements.from_config_string(
+        """
+        family:native function:foo          -app
+        family:javascript function:foo      +app
+        !family:native function:bar         +app
+        family:native,javascript function:baz +app
+        family:native family:javascript function:qux +app
+        """
+    )
+
+    def rule_descriptions(platform, frames):
+        match_frames = [create_match_frame(frame, platform) for frame in frames]
+        return [
+            rule.matcher_description
+            for rule in enhancements._get_rules_for_frames("_modifier_rules", match_frames)
+        ]
+
+    assert rule_descriptions("javascript", [{"function": "foo"}]) == [
+        "family:javascript function:foo +app",
+        "!family:native function:bar +app",
+        "family:native,javascript function:baz +app",
+    ]
+    assert rule_descriptions(
+        "javascript", [{"function": "foo"}, {"function": "foo", "platform": "native"}]
+    ) == [
+        "family:native function:foo -app",
+        "family:javascript function:foo +app",
+        "!family:native function:bar +app",
+        "family:native,javascript function:baz +app",
+    ]
+
+    frames = [{"function": "foo"}, {"function": "bar"}, {"function": "foo", "platform": "native"}]
+    enhancements.apply_modifications_to_frame(frames, "javascript", None)
+    assert [frame["in_app"] for frame in frames] == [True, True, False]
+
+
+def test_loads_cached():
+    dumped = Enhancements.from_config_string("function:foo +app", bases=["common:v1"]).dumps()
+    enhancements = Enhancements.loads(dumped)
+    assert Enhancements.loads(dumped) is enhancements
+    assert Enhancements.loads(dumped.encode("ascii")) is enhancements
+
+    with pytest.raises(ValueError):
+        Enhancements.loads("invalid")
@@ -0,0 +1,165 @@
+import copy
+from unittest import mock
+
+import pytest
+
+from sentry import eventstore
+from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.enhancer import Enhancements
+from sentry.grouping.result_cache import GroupingResultCache, get_grouping_cache_key
+from sentry.grouping.strategies.configurations import CONFIGURATIONS
+from sentry.testutils.helpers import override_options
+from tests.sentry.grouping import with_grouping_input
+
+EVENT_DATA = {
+    "platform": "python",
+    "exception": {
+        "values": [
+            {
+                "type": "ValueError",
+                "value": "invalid literal",
+                "mechanism": {"type": "generic", "exception_id": 1, "parent_id": 0},
+                "stacktrace": {
+                    "frames": [
+                        {
+                            "function": "main",
+                            "module": "app",
+                            "filename": "app.py",
+                            "lineno": 10,
+                            "context_line": "run()",
+                            "in_app": True,
+                            "vars": {"user_id": "1"},
+                        },
+                        {
+                            "function": "run",
+                            "module": "app.run",
+                            "filename": "app/run.py",
+                            "lineno": 20,
+                            "context_line": "int(value)",
+                            "in_app": True,
+                            "pre_context": ["value = get()"],
+                        },
+                    ]
+                },
+            },
+            {
+                "type": "ExceptionGroup",
+                "value": "errors",
+                "mechanism": {"type": "generic", "exception_id": 0, "is_exception_group": True},
+            },
+        ]
+    },
+}
+
+
+def make_event(data):
+    return eventstore.backend.create_event(project_id=1, data=copy.deepcopy(data))
+
+
+@pytest.fixture
+def grouping_config():
+    return get_default_grouping_config_dict()
+
+
+def test_cache_key_ignores_irrelevant_data(grouping_config):
+    key = get_grouping_cache_key(EVENT_DATA, grouping_config)
+    assert key is not None
+
+    data = copy.deepcopy(EVENT_DATA)
+    frame = data["exception"]["values"][0]["stacktrace"]["frames"][0]
+    frame["vars"] = {"user_id": "2"}
+    frame["post_context"] = ["exit()"]
+    data["exception"]["values"][0]["raw_stacktrace"] = {"frames": [{"function": "a"}]}
+    data["tags"] = [["browser", "Firefox"]]
+    assert get_grouping_cache_key(data, grouping_config) == key
+
+
+def test_cache_key_covers_grouping_input(grouping_config):
+    key = get_grouping_cache_key(EVENT_DATA, grouping_config)
+
+    data = copy.deepcopy(EVENT_DATA)
+    data["exception"]["values"][0]["stacktrace"]["frames"][1]["function"] = "walk"
+    assert get_grouping_cache_key(data, grouping_config) != key
+
+    data = dict(EVENT_DATA, fingerprint=["{{ default }}", "{{ tags.browser }}"])
+    firefox = get_grouping_cache_key(dict(data, tags=[["browser", "Firefox"]]), grouping_config)
+    chrome = get_grouping_cache_key(dict(data, tags=[["browser", "Chrome"]]), grouping_config)
+    assert firefox != chrome
+    assert key not in (firefox, chrome)
+
+    enhancements = Enhancements.loads(grouping_config["enhancements"])
+    updated_config = dict(
+        grouping_config,
+        enhancements=Enhancements.from_config_string(
+            "function:run -app", bases=enhancements.bases
+        ).dumps(),
+    )
+    assert get_grouping_cache_key(EVENT_DATA, updated_config) != key
+    assert get_grouping_cache_key(EVENT_DATA, dict(grouping_config, id="legacy:2019-03-12")) != key
+
+
+def test_cache_key_of_unhashable_data(grouping_config):
+    data = copy.deepcopy(EVENT_DATA)
+    data["exception"]["values"][0]["stacktrace"]["frames"][0]["data"] = {"offset": 0.5}
+    assert get_grouping_cache_key(data, grouping_config) is None
+
+    cache = GroupingResultCache(10)
+    event = make_event(data)
+    assert cache.get_hashes(event, grouping_config, {}) == event.get_hashes(grouping_config)
+    assert len(cache) == 0
+
+
+def test_get_hashes(grouping_config):
+    cache = GroupingResultCache(10)
+    expected = make_event(EVENT_DATA).get_hashes(grouping_config)
+
+    event = make_event(EVENT_DATA)
+    assert cache.get_hashes(event, grouping_config, {}) == expected
+    assert event.data["main_exception_id"] == 1
+    assert len(cache) == 1
+
+    event = make_event(EVENT_DATA)
+    with mock.patch.object(event, "get_hashes") as get_hashes:
+        hashes = cache.get_hashes(event, grouping_config, {})
+    assert not get_hashes.called
+    assert hashes == expected
+    assert event.data["main_exception_id"] == 1
+
+    # Results handed out can't change the cached result
+    hashes.hashes.append("a" * 32)
+    assert cache.get_hashes(make_event(EVENT_DATA), grouping_config, {}) == expected
+
+
+def test_get_hashes_verification(grouping_config):
+    cache = GroupingResultCache(10)
+    event = make_event(EVENT_DATA)
+    expected = cache.get_hashes(event, grouping_config, {})
+
+    key = get_grouping_cache_key(make_event(EVENT_DATA).data, grouping_config)
+    stale = cache.get(key)
+    stale.hashes.hashes[0] = "a" * 32
+    cache.set(key, stale)
+
+    with override_options({"store.grouping-result-cache-verify-sample-rate": 1.0}), mock.patch(
+        "sentry.grouping.result_cache.metrics"
+    ) as metrics:
+        assert cache.get_hashes(make_event(EVENT_DATA), grouping_config, {}) == expected
+
+    metrics.incr.assert_any_call("grouping.result_cache.verify", tags={"result": "mismatch"})
+    assert cache.get(key).hashes == expected
+
+
+@with_grouping_input("grouping_input")
+@pytest.mark.parametrize("config_name", CONFIGURATIONS.keys(), ids=lambda x: x.replace("-", "_"))
+def test_cached_hashes_match(config_name, grouping_input):
+    grouping_config = get_default_grouping_config_dict(config_name)
+    cache = GroupingResultCache(10)
+
+    event = grouping_input.create_event(grouping_config)
+    expected = event.get_hashes(grouping_config)
+    expected_data = dict(event.data)
+
+    for _ in range(2):
+        event = grouping_input.create_event(grouping_config)
+        assert cache.get_hashes(event, grouping_config, {}) == expected
+        assert dict(event.data) == expected_data
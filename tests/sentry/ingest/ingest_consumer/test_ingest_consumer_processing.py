@@ -11,6 +11,7 @@ from sentry.event_manager import EventManager
 from sentry.ingest.ingest_consumer import (
     process_attachment_chunk,
     process_event,
+    process_event_batch,
     process_individual_attachment,
     process_userreport,
 )
@@ -81,6 +82,57 @@ def test_deduplication_works(default_project, task_runner, preprocess_event):
     }
 
 
+@pytest.mark.django_db
+def test_process_event_batch(default_project, task_runner, preprocess_event, monkeypatch):
+    start_time = time.time() - 3600
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, default_project) for i in range(3)
+    ]
+    messages = [
+        (
+            {
+                "payload": json.dumps(payload),
+                "start_time": start_time,
+                "event_id": payload["event_id"],
+                "project_id": default_project.id,
+                "remote_addr": "127.0.0.1",
+            },
+            default_project,
+        )
+        for payload in payloads
+    ]
+
+    process_event(*messages[0])
+    process_event_batch(messages + messages[1:2])
+
+    assert [kwargs["data"] for kwargs in preprocess_event] == payloads
+
+    # Events that fail don't prevent the rest of the batch from being processed
+    def inner(**kwargs):
+        if kwargs["event_id"] == payloads[0]["event_id"]:
+            raise ValueError("processing failed")
+        preprocess_event.append(kwargs)
+
+    monkeypatch.setattr("sentry.ingest.ingest_consumer.preprocess_event", inner)
+    preprocess_event.clear()
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, default_project) for i in range(2)
+    ]
+    messages = [
+        (dict(message, payload=json.dumps(payload), event_id=payload["event_id"]), project)
+        for (message, project), payload in zip(messages, payloads)
+    ]
+
+    with pytest.raises(ValueError):
+        process_event_batch(messages)
+    assert [kwargs["data"] for kwargs in preprocess_event] == payloads[1:]
+
+    # On retry, only the failed event is processed again
+    with pytest.raises(ValueError):
+        process_event_batch(messages)
+    assert [kwargs["data"] for kwargs in preprocess_event] == payloads[1:]
+
+
 @pytest.mark.django_db
 def test_transactions_spawn_save_event_transaction(
     default_project,
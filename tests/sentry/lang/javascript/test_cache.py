@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from sentry.lang.javascript.cache import SourceCache
+from sentry.lang.javascript.cache import LocalProcessingCache, SourceCache
 
 
 class BasicCacheTest(TestCase):
@@ -34,3 +34,31 @@ class BasicCacheTest(TestCase):
         # fall back to utf-8
         cache.add(url, "foobar".encode("utf-32"), encoding="utf-32")
         assert cache.get(url)[0] == "foobar"
+
+
+class LocalProcessingCacheTest(TestCase):
+    def test_basic_features(self):
+        now = [0.0]
+        cache = LocalProcessingCache(max_bytes=10, ttl=60, clock=lambda: now[0])
+
+        assert cache.get("a") is None
+        cache.set("a", "foo", 4)
+        cache.set("b", "bar", 4)
+        assert cache.get("a") == "foo"
+        assert cache.size == 8
+
+        # "b" is the least recently used entry
+        cache.set("c", "baz", 4)
+        assert cache.get("b") is None
+        assert cache.get("a") == "foo"
+        assert cache.get("c") == "baz"
+        assert cache.size == 8
+
+        # Too large to be cached at all
+        cache.set("d", "qux", 11)
+        assert cache.get("d") is None
+        assert len(cache) == 2
+
+        now[0] = 60
+        assert cache.get("a") is None
+        assert cache.size == 4
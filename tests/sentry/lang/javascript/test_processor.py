@@ -16,6 +16,7 @@ from sentry_relay.processing import StoreNormalizer
 from sentry import http, options
 from sentry.constants import DEFAULT_STORE_NORMALIZER_ARGS
 from sentry.event_manager import get_tag
+from sentry.lang.javascript.cache import LocalProcessingCache
 from sentry.lang.javascript.errormapping import REACT_MAPPING_URL, rewrite_exception
 from sentry.lang.javascript.processor import (
     CACHE_CONTROL_MAX,
@@ -1850,6 +1851,59 @@ class FetchByDebugIdTest(FetchTest):
 
             fetcher.close()
 
+    @patch("sentry.lang.javascript.processor.cache.get", side_effect=cache.get)
+    def test_fetch_by_debug_id_local_cache(self, cache_get):
+        debug_id = "c941d872-af1f-4f0c-a7ff-ad3d295fe153"
+        file = self.get_compressed_zip_file(
+            "bundle.zip",
+            {
+                "index.js.map": {
+                    "url": "~/index.js.map",
+                    "type": "source_map",
+                    "content": b"foo",
+                    "headers": {
+                        "content-type": "application/json",
+                        "debug-id": debug_id,
+                    },
+                },
+            },
+        )
+
+        artifact_bundle = ArtifactBundle.objects.create(
+            organization_id=self.organization.id, bundle_id=uuid4(), file=file, artifact_count=1
+        )
+        DebugIdArtifactBundle.objects.create(
+            organization_id=self.organization.id,
+            debug_id=debug_id,
+            artifact_bundle=artifact_bundle,
+            source_file_type=SourceFileType.SOURCE_MAP.value,
+        )
+        ProjectArtifactBundle.objects.create(
+            organization_id=self.organization.id,
+            project_id=self.project.id,
+            artifact_bundle=artifact_bundle,
+        )
+
+        local_cache = LocalProcessingCache(max_bytes=1024 * 1024, ttl=60)
+        with patch(
+            "sentry.lang.javascript.processor.get_local_processing_cache", return_value=local_cache
+        ):
+            for expected_cache_gets in (1, 0):
+                # A new fetcher, as for every event.
+                fetcher = Fetcher(self.organization, self.project)
+                result = fetcher.fetch_by_debug_id(
+                    debug_id=debug_id, source_file_type=SourceFileType.SOURCE_MAP
+                )
+                assert result is not None
+                assert result.body == b"foo"
+                assert (
+                    len(self.relevant_calls(cache_get, "artifactbundle:v1")) == expected_cache_gets
+                )
+                fetcher.close()
+                cache_get.reset_mock()
+
+        assert len(local_cache) == 1
+
     def test_fetch_by_debug_id_caching_with_failure(self):
         debug_id = "c941d872-af1f-4f0c-a7ff-ad3d295fe153"
         file = self.get_compressed_zip_file(
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pytest
@@ -13,7 +13,9 @@ from sentry.issues.grouptype import (
     MonitorCheckInTimeout,
 )
 from sentry.monitors.models import (
+    CheckInStatus,
     Monitor,
+    MonitorCheckIn,
     MonitorEnvironment,
     MonitorEnvironmentLimitsExceeded,
     MonitorFailure,
@@ -539,6 +541,48 @@ class MonitorEnvironmentTestCase(TestCase):
         ) == dict(event)
 
     @override_settings(MAX_ENVIRONMENTS_PER_MONITOR=2)
+    @with_feature({"organizations:crons-issue-platform": False})
+    @patch("sentry.coreapi.insert_data_to_database_legacy")
+    def test_mark_ok_and_failed_update_instance(self, mock_insert_data_to_database_legacy):
+        monitor = Monitor.objects.create(
+            name="test monitor",
+            organization_id=self.organization.id,
+            project_id=self.project.id,
+            type=MonitorType.CRON_JOB,
+            config={"schedule": [1, "month"], "schedule_type": ScheduleType.INTERVAL},
+        )
+        monitor_environment = MonitorEnvironment.objects.create(
+            monitor=monitor,
+            environment=self.environment,
+            status=monitor.status,
+        )
+        checkin = MonitorCheckIn.objects.create(
+            monitor=monitor,
+            monitor_environment=monitor_environment,
+            project_id=self.project.id,
+            status=CheckInStatus.OK,
+        )
+        ts = timezone.now().replace(microsecond=0)
+
+        assert monitor_environment.mark_ok(checkin, ts)
+        assert monitor_environment.status == MonitorStatus.OK
+        assert monitor_environment.last_checkin == ts
+        assert monitor_environment.next_checkin == monitor.get_next_scheduled_checkin(ts)
+
+        assert monitor_environment.mark_failed(ts + timedelta(minutes=1))
+        assert monitor_environment.status == MonitorStatus.ERROR
+        assert monitor_environment.last_checkin == ts + timedelta(minutes=1)
+
+        # Older check-ins don't update the monitor environment
+        assert not monitor_environment.mark_ok(checkin, ts)
+        assert monitor_environment.status == MonitorStatus.ERROR
+
+        fields = ["status", "last_checkin", "next_checkin"]
+        stored = MonitorEnvironment.objects.get(id=monitor_environment.id)
+        assert [getattr(stored, f) for f in fields] == [
+            getattr(monitor_environment, f) for f in fields
+        ]
+
     def test_monitor_environment_limits(self):
         monitor = Monitor.objects.create(
             organization_id=self.organization.id,
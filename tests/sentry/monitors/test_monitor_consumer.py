@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from unittest import mock
 
 import msgpack
@@ -457,3 +457,91 @@ class MonitorConsumerTest(TestCase):
 
         monitor_environments = MonitorEnvironment.objects.filter(monitor=monitor)
         assert len(monitor_environments) == settings.MAX_ENVIRONMENTS_PER_MONITOR
+
+    def send_batch(self, *payloads: Dict[str, Any]) -> None:
+        now = datetime.now()
+        commit = mock.Mock()
+        partition = Partition(Topic("test"), 0)
+        strategy = StoreMonitorCheckInStrategyFactory(
+            max_batch_size=len(payloads)
+        ).create_with_partitions(commit, {partition: 0})
+
+        for offset, payload in enumerate(payloads):
+            payload = {
+                "status": "ok",
+                "duration": None,
+                "check_in_id": uuid.uuid4().hex,
+                "environment": "production",
+                **payload,
+            }
+            wrapper = {
+                "start_time": now.timestamp(),
+                "project_id": self.project.id,
+                "payload": json.dumps(payload),
+                "sdk": "test/1.0",
+            }
+            strategy.submit(
+                Message(
+                    BrokerValue(
+                        KafkaPayload(b"fake-key", msgpack.packb(wrapper), []),
+                        partition,
+                        offset,
+                        now,
+                    )
+                )
+            )
+        strategy.poll()
+        strategy.join()
+
+    def test_batch(self) -> None:
+        monitor = self._create_monitor(slug="my-monitor")
+        other_monitor = self._create_monitor(slug="other-monitor")
+        guid = uuid.uuid4().hex
+
+        self.send_batch(
+            {"monitor_slug": monitor.slug, "check_in_id": guid, "status": "in_progress"},
+            {"monitor_slug": other_monitor.slug, "status": "error"},
+            {
+                "monitor_slug": "new-monitor",
+                "monitor_config": {"schedule": {"type": "crontab", "value": "13 * * * *"}},
+            },
+            # Check-ins of a monitor are processed in order
+            {"monitor_slug": monitor.slug, "check_in_id": guid, "duration": 5},
+            {"monitor_slug": monitor.slug, "environment": "staging"},
+            {"monitor_slug": "unknown-monitor"},
+        )
+
+        checkin = MonitorCheckIn.objects.get(guid=guid)
+        assert checkin.status == CheckInStatus.OK
+        assert checkin.duration == 5000
+
+        monitor_environment = MonitorEnvironment.objects.get(
+            monitor=monitor, environment__name="production"
+        )
+        assert monitor_environment.status == MonitorStatus.OK
+        assert monitor_environment.last_checkin is not None
+        assert MonitorEnvironment.objects.filter(
+            monitor=monitor, environment__name="staging", status=MonitorStatus.OK
+        ).exists()
+
+        checkin = MonitorCheckIn.objects.get(monitor=other_monitor)
+        assert checkin.status == CheckInStatus.ERROR
+        assert MonitorEnvironment.objects.get(monitor=other_monitor).status == MonitorStatus.ERROR
+
+        new_monitor = Monitor.objects.get(slug="new-monitor")
+        assert MonitorCheckIn.objects.filter(monitor=new_monitor).count() == 1
+        assert not Monitor.objects.filter(slug="unknown-monitor").exists()
+
+    def test_batch_without_refresh(self) -> None:
+        monitor = self._create_monitor(slug="my-monitor")
+
+        with mock.patch.object(MonitorEnvironment, "refresh_from_db", autospec=True) as refresh:
+            self.send_batch(
+                {"monitor_slug": monitor.slug},
+                {"monitor_slug": monitor.slug, "status": "error"},
+            )
+
+        # The cached monitor environment is kept in sync without reading it again.
+        assert refresh.call_count == 0
+        monitor_environment = MonitorEnvironment.objects.get(monitor=monitor)
+        assert monitor_environment.status == MonitorStatus.ERROR
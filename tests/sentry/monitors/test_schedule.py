@@ -0,0 +1,89 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from sentry.monitors import schedule
+from sentry.monitors.models import (
+    CheckInStatus,
+    Monitor,
+    MonitorCheckIn,
+    MonitorEnvironment,
+    MonitorStatus,
+    MonitorType,
+    ScheduleType,
+)
+from sentry.testutils import TestCase
+from sentry.testutils.helpers import override_options
+
+
+def run_on_commit(func, using=None):
+    func()
+
+
+class ScheduleTest(TestCase):
+    def test_get_due(self):
+        now = timezone.now().replace(microsecond=0)
+        schedule.schedule(
+            {
+                1: now - timedelta(minutes=2),
+                2: now - timedelta(minutes=5),
+                17: now,
+                18: now + timedelta(minutes=1),
+            }
+        )
+        assert schedule.get_due(now) == [2, 1]
+        assert schedule.get_due(now + timedelta(minutes=2)) == [2, 1, 17, 18]
+
+        # Rescheduling moves the entry
+        schedule.schedule({2: now + timedelta(minutes=3)})
+        schedule.unschedule([1])
+        assert schedule.get_due(now + timedelta(minutes=5)) == [17, 18, 2]
+
+    def test_claim_due(self):
+        now = timezone.now().replace(microsecond=0)
+        schedule.schedule({1: now - timedelta(minutes=2), 2: now - timedelta(minutes=5), 17: now})
+
+        assert schedule.claim_due(now) == [2, 1]
+        # Claimed entries aren't handed out again until their lease runs out
+        assert schedule.claim_due(now) == []
+        assert schedule.claim_due(now + timedelta(minutes=1)) == [17]
+        assert schedule.claim_due(now + schedule.CLAIM_LEASE + timedelta(seconds=1)) == [2, 1]
+
+        # Rescheduling replaces the lease
+        schedule.schedule({2: now})
+        assert schedule.claim_due(now + timedelta(seconds=1)) == [2]
+
+    @mock.patch("sentry.monitors.schedule.transaction.on_commit", side_effect=run_on_commit)
+    def test_check_ins_schedule(self, on_commit):
+        monitor = Monitor.objects.create(
+            organization_id=self.organization.id,
+            project_id=self.project.id,
+            type=MonitorType.CRON_JOB,
+            config={"schedule": "* * * * *", "schedule_type": ScheduleType.CRONTAB},
+        )
+        monitor_environment = MonitorEnvironment.objects.create(
+            monitor=monitor, environment=self.environment, status=MonitorStatus.ACTIVE
+        )
+        now = timezone.now()
+        checkin = MonitorCheckIn.objects.create(
+            monitor=monitor,
+            monitor_environment=monitor_environment,
+            project_id=self.project.id,
+            status=CheckInStatus.OK,
+        )
+
+        monitor_environment.mark_ok(checkin, now)
+        assert not on_commit.called
+        assert schedule.get_due(now + timedelta(days=1)) == []
+
+        with override_options({"monitors.schedule-index.write": True}):
+            monitor_environment.mark_ok(checkin, now)
+            next_checkin = MonitorEnvironment.objects.get(id=monitor_environment.id).next_checkin
+            assert schedule.get_due(next_checkin) == []
+            assert schedule.get_due(next_checkin + timedelta(seconds=1)) == [monitor_environment.id]
+
+            monitor_environment.mark_failed(now + timedelta(minutes=1))
+            next_checkin = MonitorEnvironment.objects.get(id=monitor_environment.id).next_checkin
+            assert schedule.get_due(next_checkin) == []
+            assert schedule.get_due(next_checkin + timedelta(seconds=1)) == [monitor_environment.id]
@@ -4,6 +4,7 @@ from unittest.mock import patch
 from django.utils import timezone
 
 from sentry.constants import ObjectStatus
+from sentry.monitors import schedule
 from sentry.monitors.models import (
     CheckInStatus,
     Monitor,
@@ -13,8 +14,10 @@ from sentry.monitors.models import (
     MonitorType,
     ScheduleType,
 )
-from sentry.monitors.tasks import check_monitors
+from sentry.monitors.tasks import _mark_missed, check_monitors, mark_missed_checkins
 from sentry.testutils import TestCase
+from sentry.testutils.helpers import override_options
+from sentry.utils.dates import to_timestamp
 
 
 class CheckMonitorsTest(TestCase):
@@ -474,3 +477,98 @@ class CheckMonitorsTest(TestCase):
         assert MonitorEnvironment.objects.filter(
             id=monitor_environment.id, status=MonitorStatus.TIMEOUT
         ).exists()
+
+    @override_options({"monitors.schedule-index.read": True})
+    def test_overlapping_mark_missed_checkins(self):
+        task_run_ts, next_checkin_ts = self.make_ref_time()
+        monitor = Monitor.objects.create(
+            organization_id=self.organization.id,
+            project_id=self.project.id,
+            type=MonitorType.CRON_JOB,
+            config={"schedule": "* * * * *", "schedule_type": ScheduleType.CRONTAB},
+        )
+        monitor_environment = MonitorEnvironment.objects.create(
+            monitor=monitor,
+            environment=self.environment,
+            last_checkin=next_checkin_ts - timedelta(minutes=2),
+            next_checkin=next_checkin_ts - timedelta(minutes=1),
+            status=MonitorStatus.OK,
+        )
+        ids = [monitor_environment.id]
+        current_timestamp = to_timestamp(task_run_ts.replace(second=0, microsecond=0))
+
+        def mark_missed(monitor_environment):
+            # Another task for the same monitor environment starts while this
+            # one marks it, and again once it is done.
+            mark_missed_checkins(ids, current_timestamp)
+            _mark_missed(monitor_environment)
+            mark_missed_checkins(ids, current_timestamp)
+
+        with patch("sentry.monitors.tasks._mark_missed", side_effect=mark_missed) as mock:
+            mark_missed_checkins(ids, current_timestamp)
+
+        assert mock.call_count == 1
+        assert (
+            MonitorCheckIn.objects.filter(
+                monitor_environment=monitor_environment.id, status=CheckInStatus.MISSED
+            ).count()
+            == 1
+        )
+
+    def test_missing_checkin_from_schedule_index(self):
+        task_run_ts, next_checkin_ts = self.make_ref_time()
+
+        def create_monitor_environment(next_checkin, status=MonitorStatus.OK):
+            monitor = Monitor.objects.create(
+                organization_id=self.organization.id,
+                project_id=self.project.id,
+                type=MonitorType.CRON_JOB,
+                config={"schedule": "* * * * *", "schedule_type": ScheduleType.CRONTAB},
+            )
+            return MonitorEnvironment.objects.create(
+                monitor=monitor,
+                environment=self.environment,
+                last_checkin=next_checkin - timedelta(minutes=1),
+                next_checkin=next_checkin,
+                status=status,
+            )
+
+        missed = create_monitor_environment(next_checkin_ts - timedelta(minutes=1))
+        # Checked in since it was scheduled
+        checked_in = create_monitor_environment(next_checkin_ts + timedelta(minutes=1))
+        disabled = create_monitor_environment(
+            next_checkin_ts - timedelta(minutes=1), status=MonitorStatus.DISABLED
+        )
+        # Not in the index
+        not_scheduled = create_monitor_environment(next_checkin_ts - timedelta(minutes=1))
+
+        schedule.schedule(
+            {
+                missed.id: missed.next_checkin,
+                checked_in.id: next_checkin_ts - timedelta(minutes=1),
+                disabled.id: disabled.next_checkin,
+                # Deleted
+                0: next_checkin_ts - timedelta(minutes=1),
+            }
+        )
+
+        with self.tasks():
+            check_monitors(task_run_ts)
+
+        assert MonitorEnvironment.objects.filter(
+            id=missed.id, status=MonitorStatus.MISSED_CHECKIN
+        ).exists()
+        assert MonitorCheckIn.objects.filter(
+            monitor_environment=missed.id, status=CheckInStatus.MISSED
+        ).exists()
+        for monitor_environment in (checked_in, disabled, not_scheduled):
+            assert not MonitorCheckIn.objects.filter(
+                monitor_environment=monitor_environment.id
+            ).exists()
+
+        # Stale entries of the index are corrected
+        due = schedule.get_due(next_checkin_ts + timedelta(minutes=2))
+        assert checked_in.id in due
+        assert disabled.id not in due
+        assert 0 not in due
+        assert disabled.id in schedule.get_due(next_checkin_ts + timedelta(hours=2))
@@ -1,3 +1,4 @@
+import base64
 import pickle
 from datetime import timedelta
 from unittest import mock
@@ -6,6 +7,7 @@ import pytest
 from django.utils import timezone
 
 from sentry.nodestore.base import json_dumps
+from sentry.nodestore.compression import ZstdDictionaryCodec, is_compressed
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.nodestore.django.models import Node
 from sentry.testutils.silo import region_silo_test
@@ -55,6 +57,25 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    @region_silo_test(stable=True)
+    def test_set_zstd_compressed(self):
+        self.ns.compression_codec = ZstdDictionaryCodec({})
+        self.ns.set("d2502ebbd7df41ceba8d3275595cac33", {"foo": "bar"})
+        self.ns.set("5394aa025b8e401ca6bc3ddee3130edc", {"foo": "baz"})
+
+        # zstd blobs are stored without being compressed again with zlib
+        data = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data
+        assert is_compressed(base64.b64decode(data))
+
+        # Blobs written with zlib only stay readable
+        Node.objects.create(id="a" * 32, data=compress(b'{"foo": "qux"}'))
+
+        blob = self.ns._get_bytes("d2502ebbd7df41ceba8d3275595cac33")
+        assert self.ns._decompress(blob) == b'{"foo":"bar"}'
+        blobs = self.ns._get_bytes_multi(["5394aa025b8e401ca6bc3ddee3130edc", "a" * 32])
+        assert self.ns._decompress(blobs["5394aa025b8e401ca6bc3ddee3130edc"]) == b'{"foo":"baz"}'
+        assert blobs["a" * 32] == b'{"foo": "qux"}'
+
     @region_silo_test(stable=True)
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
@@ -3,11 +3,15 @@ Testsuite of backend-independent nodestore tests. Add your backend to the
 `ns` fixture to have it tested.
 """
 from contextlib import nullcontext
+from unittest import mock
 
 import pytest
 
+from sentry.nodestore.compression import ZstdDictionaryCodec, is_compressed, train_dictionary
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.local_cache import LocalNodeCache
 from sentry.testutils.silo import region_silo_test
+from sentry.utils import json
 from tests.sentry.nodestore.bigtable.test_backend import (
     MockedBigtableNodeStorage,
     get_temporary_bigtable_nodestorage,
@@ -97,3 +101,57 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@region_silo_test(stable=True)
+def test_local_cache(ns):
+    ns.local_cache = LocalNodeCache(max_bytes=1024 * 1024, ttl=60)
+
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    assert "node_1" in ns.local_cache._entries
+
+    with mock.patch.object(ns, "_get_bytes") as get_bytes, mock.patch.object(
+        ns, "_get_bytes_multi"
+    ) as get_bytes_multi:
+        assert ns.get("node_1") == {"foo": "a"}
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+        assert ns.get_multi(["node_1"], subkey="other") == {"node_1": {"foo": "b"}}
+    assert not get_bytes.called
+    assert not get_bytes_multi.called
+
+    # Mutating a returned node must not affect the cache
+    ns.get("node_1", subkey="other")["foo"] = "c"
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+
+    ns.set("node_1", {"foo": "d"})
+    assert ns.get("node_1") == {"foo": "d"}
+    assert ns.get("node_1", subkey="other") is None
+
+    ns.delete("node_1")
+    assert "node_1" not in ns.local_cache._entries
+    assert ns.get("node_1") is None
+
+
+@region_silo_test(stable=True)
+def test_dictionary_compression(ns):
+    samples = [
+        json.dumps({"platform": "python", "message": f"message {i}"}).encode("utf-8")
+        for i in range(100)
+    ]
+
+    # Written before compression was enabled
+    ns.compression_codec = None
+    ns.set("node_1", {"platform": "python", "message": "uncompressed"})
+
+    ns.compression_codec = ZstdDictionaryCodec({"python": [train_dictionary(samples, 1024)]})
+    ns.set_subkeys("node_2", {None: {"platform": "python", "message": "a"}, "other": {"foo": "b"}})
+    assert is_compressed(ns._get_bytes("node_2"))
+    assert not is_compressed(ns._get_bytes("node_1"))
+
+    assert ns.get("node_1") == {"platform": "python", "message": "uncompressed"}
+    assert ns.get("node_2") == {"platform": "python", "message": "a"}
+    assert ns.get("node_2", subkey="other") == {"foo": "b"}
+    assert ns.get_multi(["node_1", "node_2"]) == {
+        "node_1": {"platform": "python", "message": "uncompressed"},
+        "node_2": {"platform": "python", "message": "a"},
+    }
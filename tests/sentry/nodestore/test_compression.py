@@ -0,0 +1,100 @@
+import pytest
+import zstandard
+
+from sentry.nodestore.compression import (
+    MissingDictionary,
+    ZstdDictionaryCodec,
+    dictionary_filename,
+    is_compressed,
+    train_dictionary,
+)
+from sentry.utils import json
+
+
+def make_samples(platform, count=200):
+    return [
+        json.dumps(
+            {
+                "event_id": f"{i:032x}",
+                "platform": platform,
+                "exception": {
+                    "values": [
+                        {
+                            "type": "ValueError",
+                            "value": f"invalid value {i}",
+                            "stacktrace": {
+                                "frames": [
+                                    {"filename": f"app/module_{j}.py", "lineno": i + j}
+                                    for j in range(10)
+                                ]
+                            },
+                        }
+                    ]
+                },
+            }
+        ).encode("utf-8")
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def python_dictionary():
+    return train_dictionary(make_samples("python"), 4096, dict_id=1000)
+
+
+def test_roundtrip(python_dictionary):
+    codec = ZstdDictionaryCodec({"python": [python_dictionary]})
+    data = make_samples("python", 1)[0]
+
+    compressed = codec.compress(data, "python")
+    assert is_compressed(compressed)
+    assert zstandard.get_frame_parameters(compressed).dict_id == 1000
+    assert len(compressed) < len(zstandard.ZstdCompressor().compress(data))
+    assert codec.decompress(compressed) == data
+
+    # No dictionary for this platform and no default
+    compressed = codec.compress(data, "javascript")
+    assert zstandard.get_frame_parameters(compressed).dict_id == 0
+    assert codec.decompress(compressed) == data
+
+
+def test_uncompressed_passthrough():
+    codec = ZstdDictionaryCodec({})
+    assert not is_compressed(b'{"foo":"bar"}')
+    assert not is_compressed(None)
+    assert codec.decompress(b'{"foo":"bar"}') == b'{"foo":"bar"}'
+
+
+def test_dictionary_versions(python_dictionary):
+    data = make_samples("python", 1)[0]
+    old_blob = ZstdDictionaryCodec({"python": [python_dictionary]}).compress(data, "python")
+
+    new_dictionary = train_dictionary(make_samples("python"), 4096, dict_id=2000)
+    codec = ZstdDictionaryCodec({"python": [new_dictionary, python_dictionary]})
+    new_blob = codec.compress(data, "python")
+    assert zstandard.get_frame_parameters(new_blob).dict_id == 2000
+
+    assert codec.decompress(old_blob) == data
+    assert codec.decompress(new_blob) == data
+
+    with pytest.raises(MissingDictionary):
+        ZstdDictionaryCodec({}).decompress(new_blob)
+
+
+def test_default_dictionary(python_dictionary):
+    codec = ZstdDictionaryCodec({"default": [python_dictionary]})
+    data = make_samples("ruby", 1)[0]
+    compressed = codec.compress(data, "ruby")
+    assert zstandard.get_frame_parameters(compressed).dict_id == 1000
+    assert codec.decompress(compressed) == data
+
+
+def test_from_directory(tmpdir, python_dictionary):
+    filename = dictionary_filename("python", python_dictionary)
+    assert filename == "python.1000.zdict"
+    tmpdir.join(filename).write_binary(python_dictionary.as_bytes())
+    tmpdir.join("README").write("not a dictionary")
+
+    codec = ZstdDictionaryCodec.from_directory(str(tmpdir))
+    assert list(codec.dictionaries_by_id) == [1000]
+    assert codec.latest_by_platform["python"].dict_id() == 1000
@@ -0,0 +1,71 @@
+from sentry.nodestore.local_cache import LocalNodeCache
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_set():
+    cache = LocalNodeCache(max_bytes=100, ttl=60)
+    assert cache.get("a") is None
+
+    cache.set("a", b"foo")
+    cache.set("b", None)
+    assert cache.get("a") == b"foo"
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "b"]) == {"a": b"foo"}
+    assert cache.size == 3
+
+    cache.set("a", b"foobar")
+    assert cache.get("a") == b"foobar"
+    assert cache.size == 6
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_evicts_least_recently_used():
+    cache = LocalNodeCache(max_bytes=10, ttl=60)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+
+    cache.set("c", b"cccc")
+    assert cache.get_many(["a", "b", "c"]) == {"a": b"aaaa", "c": b"cccc"}
+    assert cache.size == 8
+
+    # Too large to ever fit
+    cache.set("a", b"x" * 11)
+    assert cache.get("a") is None
+    assert cache.get("c") == b"cccc"
+
+
+def test_expiry():
+    clock = MockClock()
+    cache = LocalNodeCache(max_bytes=100, ttl=10, clock=clock)
+    cache.set("a", b"foo")
+
+    clock.now = 9
+    assert cache.get("a") == b"foo"
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_delete_many_and_clear():
+    cache = LocalNodeCache(max_bytes=100, ttl=60)
+    cache.set_many({"a": b"a", "b": b"b", "c": b"c"})
+
+    cache.delete_many(["a", "b", "d"])
+    assert cache.get_many(["a", "b", "c"]) == {"c": b"c"}
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
@@ -1,9 +1,11 @@
 import pytest
 
 from sentry.ownership.grammar import (
+    CompiledRules,
     Matcher,
     Owner,
     Rule,
+    compile_schema,
     convert_codeowners_syntax,
     convert_schema_to_rules_text,
     dump_schema,
@@ -1037,3 +1039,47 @@ def test_convert_schema_to_rules_text():
         )
         == "path:*.js #frontend m@robenolt.com\nurl:http://google.com/* #backend\npath:src/sentry/* david@sentry.io\ntags.foo:bar tagperson@sentry.io\ntags.foo:bar baz tagperson@sentry.io\nmodule:foo.bar #workflow\nmodule:foo bar meow@sentry.io\n"
     )
+
+
+def test_compiled_rules_match_rule_test():
+    rules = parse_rules(fixture_data)
+    data = {
+        "request": {"url": "http://google.com/search"},
+        "tags": [("foo", "bar baz")],
+        "exception": {
+            "values": [
+                {
+                    "stacktrace": {
+                        "frames": [
+                            {"filename": "src/components/app.js", "module": "foo.bar"},
+                            {"abs_path": "/usr/src/sentry/models.py"},
+                        ]
+                    }
+                }
+            ]
+        },
+    }
+
+    compiled = CompiledRules(rules)
+    assert len(compiled) == len(rules)
+    assert compiled.test(data) == [rule for rule in rules if rule.test(data)]
+    assert compiled.test({}) == [rule for rule in rules if rule.test({})]
+
+
+def test_compiled_rules_shared_matchers():
+    rules = parse_rules("*.js #frontend\n*.js #backend\n*.py #backend\n")
+    compiled = CompiledRules(rules)
+
+    assert compiled.matchers == [Matcher("path", "*.js"), Matcher("path", "*.py")]
+    assert compiled.test({"stacktrace": {"frames": [{"filename": "foo.js"}]}}) == rules[:2]
+
+
+def test_compile_schema_cached():
+    schema = dump_schema(parse_rules(fixture_data))
+
+    assert compile_schema(schema) is compile_schema(dict(schema))
+    assert compile_schema(None).test({"request": {"url": "http://google.com/"}}) == []
+
+    updated = {**schema, "rules": schema["rules"][:1]}
+    assert compile_schema(updated) is not compile_schema(schema)
+    assert len(compile_schema(updated)) == 1
@@ -1,4 +1,5 @@
 from typing import Collection, Optional, Sequence
+from unittest import mock
 
 import pytest
 
@@ -227,3 +228,27 @@ def test_regression_mixed_order(limiter: RedisCardinalityLimiter):
     # there used to be a bug where anything after 10 (i.e. 5) was dropped as
     # well (due to a wrong `break` somewhere in a loop)
     assert helper.add_values([0, 1, 2, 3, 4, 6, 7, 8, 9, 10, 5]) == [0, 1, 2, 3, 4, 6, 7, 8, 9, 5]
+
+
+def test_admitted_hashes_cache():
+    limiter = RedisCardinalityLimiter(admitted_hashes_cache_size=100)
+    helper = LimiterHelper(limiter)
+
+    with mock.patch.object(
+        limiter.impl, "check_within_quotas", wraps=limiter.impl.check_within_quotas
+    ) as check_within_quotas:
+        for _ in range(20):
+            assert helper.add_value(1) == 1
+
+        # Only the first request had to go to Redis
+        assert check_within_quotas.call_count == 1
+
+        assert helper.add_values([1, 2]) == [1, 2]
+        assert check_within_quotas.call_args[0][0][0].unit_hashes == [2]
+
+    assert [helper.add_value(10 + i) for i in range(100)] == list(range(10, 18)) + [None] * 92
+
+    # In the next granule, the cache is empty but Redis still knows the
+    # admitted hashes.
+    helper.timestamp += 60
+    assert helper.add_values([1, 2, 10, 17, 18]) == [1, 2, 10, 17]
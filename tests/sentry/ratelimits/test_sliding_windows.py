@@ -1,7 +1,10 @@
+from unittest import mock
+
 import pytest
 
 from sentry.ratelimits.sliding_windows import (
     GrantedQuota,
+    LeasedSlidingWindowRateLimiter,
     Quota,
     RedisSlidingWindowRateLimiter,
     RequestedQuota,
@@ -71,3 +74,105 @@ def test_basic(limiter):
         )
 
         assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+
+def test_leased(limiter):
+    leased_limiter = LeasedSlidingWindowRateLimiter(limiter, lease_fraction=0.1)
+    quotas = [Quota(window_seconds=100, granularity_seconds=10, limit=100)]
+    timestamp = TIMESTAMP_OFFSET * 10
+
+    with mock.patch.object(
+        limiter, "check_within_quotas", wraps=limiter.check_within_quotas
+    ) as check_within_quotas:
+        for _ in range(10):
+            resp = leased_limiter.check_and_use_quotas(
+                [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp
+            )
+            assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+
+        # A single lease of 10 served all requests
+        assert check_within_quotas.call_count == 1
+
+    # ...and is accounted for in Redis
+    _, grants = limiter.check_within_quotas(
+        [RequestedQuota(prefix="foo", requested=100, quotas=quotas)], timestamp=timestamp
+    )
+    assert grants[0].granted == 90
+
+    granted = 10
+    for _ in range(100):
+        (grant,) = leased_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp
+        )
+        granted += grant.granted
+
+    assert granted == 100
+    assert leased_limiter.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp
+    ) == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+
+def test_leased_near_limit(limiter):
+    leased_limiter = LeasedSlidingWindowRateLimiter(limiter, lease_fraction=0.5)
+    quotas = [Quota(window_seconds=100, granularity_seconds=10, limit=15)]
+    timestamp = TIMESTAMP_OFFSET * 10
+
+    # The second lease of 8 doesn't fit, the rest of the quota is used
+    # through Redis directly and nothing is lost.
+    granted = 0
+    for _ in range(20):
+        (grant,) = leased_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp
+        )
+        granted += grant.granted
+
+    assert granted == 15
+
+
+def test_leased_granule_expiry(limiter):
+    leased_limiter = LeasedSlidingWindowRateLimiter(limiter, lease_fraction=0.1)
+    quotas = [Quota(window_seconds=100, granularity_seconds=10, limit=100)]
+    timestamp = TIMESTAMP_OFFSET * 10
+
+    leased_limiter.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp
+    )
+
+    with mock.patch.object(
+        limiter, "check_within_quotas", wraps=limiter.check_within_quotas
+    ) as check_within_quotas:
+        # Same granule, served from the lease
+        leased_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp + 9
+        )
+        assert check_within_quotas.call_count == 0
+
+        # Next granule, the lease (and its remaining 8) is gone
+        leased_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=timestamp + 10
+        )
+        assert check_within_quotas.call_count == 1
+
+    _, grants = limiter.check_within_quotas(
+        [RequestedQuota(prefix="foo", requested=100, quotas=quotas)], timestamp=timestamp + 10
+    )
+    assert grants[0].granted == 80
+
+
+def test_leased_prefix_override(limiter):
+    leased_limiter = LeasedSlidingWindowRateLimiter(limiter, lease_fraction=0.1)
+    quotas = [
+        Quota(window_seconds=100, granularity_seconds=10, limit=20, prefix_override="global"),
+        Quota(window_seconds=100, granularity_seconds=10, limit=100),
+    ]
+    timestamp = TIMESTAMP_OFFSET * 10
+
+    granted = 0
+    for i in range(30):
+        (grant,) = leased_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix=f"foo{i % 3}", requested=1, quotas=quotas)],
+            timestamp=timestamp,
+        )
+        granted += grant.granted
+
+    assert granted == 20
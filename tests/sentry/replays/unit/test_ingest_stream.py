@@ -0,0 +1,128 @@
+import zlib
+from unittest import mock
+
+import pytest
+
+from sentry.replays.usecases.ingest import replay_click_post_processor
+from sentry.replays.usecases.ingest.stream import (
+    EventArrayScanner,
+    iter_decompressed_chunks,
+    iter_recording_events,
+)
+from sentry.testutils.helpers.options import override_options
+from sentry.utils import json
+
+EVENTS = [
+    {"type": 4, "timestamp": 1, "data": {"href": "https://sentry.io/", "width": 1, "height": 2}},
+    {
+        "type": 2,
+        "timestamp": 2,
+        "data": {"node": {"type": 0, "childNodes": [{"text": "x" * 5000}], "id": 1}},
+    },
+    {
+        "type": 5,
+        "timestamp": 3,
+        "data": {
+            "tag": "breadcrumb",
+            "payload": {"category": "ui.click", "message": 'a "quoted" \\ [message] {}'},
+        },
+    },
+    {"type": 3, "timestamp": 4, "data": {"source": 2, "texts": ["]}", "\\", '"']}},
+    {"timestamp": 5, "type": 5, "data": {"tag": "options", "payload": {}}},
+]
+
+
+def test_iter_decompressed_chunks():
+    data = json.dumps(EVENTS).encode()
+    assert b"".join(iter_decompressed_chunks(data, chunk_size=7)) == data
+    assert b"".join(iter_decompressed_chunks(zlib.compress(data), chunk_size=7)) == data
+
+    chunks = list(iter_decompressed_chunks(zlib.compress(data), chunk_size=100))
+    assert max(len(chunk) for chunk in chunks) <= 100
+
+    with pytest.raises(zlib.error):
+        list(iter_decompressed_chunks(zlib.compress(data)[:-10]))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 31, 4096])
+def test_iter_recording_events(chunk_size):
+    data = zlib.compress(json.dumps(EVENTS).encode())
+
+    def decode(event_types):
+        scanner = EventArrayScanner(event_types)
+        rv = []
+        for chunk in iter_decompressed_chunks(data, chunk_size=chunk_size):
+            rv.extend(json.loads(element) for element in scanner.feed(chunk))
+        scanner.close()
+        return rv
+
+    assert decode(None) == EVENTS
+    assert decode({5}) == [EVENTS[2], EVENTS[4]]
+    assert list(iter_recording_events(data)) == [EVENTS[2], EVENTS[4]]
+    assert list(iter_recording_events(data, event_types=None)) == EVENTS
+
+
+def test_iter_recording_events_skips_unwanted_events():
+    snapshot = {"type": 2, "timestamp": 2, "data": {"text": "x" * 1_000_000}}
+    data = json.dumps([snapshot, EVENTS[2]]).encode()
+
+    scanner = EventArrayScanner({5})
+    max_buffered = 0
+    elements = []
+    for chunk in iter_decompressed_chunks(data, chunk_size=1024):
+        elements.extend(scanner.feed(chunk))
+        max_buffered = max(max_buffered, len(scanner.element or b""))
+
+    assert [json.loads(element) for element in elements] == [EVENTS[2]]
+    assert max_buffered <= 1024
+
+
+def test_iter_recording_events_is_lazy():
+    data = json.dumps(EVENTS[2:3] * 10).encode()[:-10]
+
+    events = iter_recording_events(data)
+    assert next(events) == EVENTS[2]
+
+    with pytest.raises(ValueError):
+        list(events)
+
+
+def test_iter_recording_events_on_chunk():
+    data = json.dumps(EVENTS).encode()
+    chunks = []
+    assert list(iter_recording_events(zlib.compress(data), on_chunk=chunks.append)) == [
+        EVENTS[2],
+        EVENTS[4],
+    ]
+    assert b"".join(chunks) == data
+
+
+@pytest.mark.parametrize(
+    "stream_min_size, metric",
+    [
+        (0, "replays.usecases.ingest.size_uncompressed_streamed"),
+        (1024 * 1024, "replays.usecases.ingest.size_uncompressed"),
+    ],
+)
+def test_replay_click_post_processor_size_metrics(stream_min_size, metric):
+    data = json.dumps(EVENTS).encode()
+    segment_bytes = zlib.compress(data)
+    message = mock.Mock(org_id=1, project_id=2, replay_id="a" * 32, retention_days=30)
+
+    with override_options({"replay.ingest.stream-min-size": stream_min_size}), mock.patch(
+        "sentry.replays.usecases.ingest.has_feature_access", return_value=True
+    ), mock.patch(
+        "sentry.replays.usecases.ingest.parse_and_emit_replay_actions",
+        side_effect=lambda segment_data, **kwargs: list(segment_data),
+    ), mock.patch(
+        "sentry.utils.metrics.timing"
+    ) as timing:
+        replay_click_post_processor(message, {"segment_id": 0}, segment_bytes, mock.MagicMock())
+
+    assert mock.call("replays.usecases.ingest.size_compressed", len(segment_bytes)) in (
+        timing.call_args_list
+    )
+    # Only one of the uncompressed size metrics is reported.
+    assert [c for c in timing.call_args_list if c[0][0].startswith(metric)] == [
+        mock.call(metric, len(data))
+    ]
@@ -7,13 +7,18 @@ from django.db import DEFAULT_DB_ALIAS, connections
 from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from sentry.models import GroupRuleStatus, GroupStatus, ProjectOwnership, Rule
+from sentry.models import GroupRuleStatus, GroupStatus, ProjectOwnership, Rule, RuleStatus
 from sentry.models.rulefirehistory import RuleFireHistory
 from sentry.notifications.types import ActionTargetType
-from sentry.rules import init_registry
+from sentry.rules import RuleBase, init_registry
 from sentry.rules.conditions import EventCondition
 from sentry.rules.filters.base import EventFilter
-from sentry.rules.processor import RuleProcessor
+from sentry.rules.processor import (
+    BatchRuleProcessor,
+    ProjectRuleCache,
+    RuleProcessor,
+    RuleProcessorJob,
+)
 from sentry.testutils import TestCase
 from sentry.testutils.helpers import install_slack
 from sentry.testutils.silo import region_silo_test
@@ -338,6 +343,217 @@ class RuleProcessorTest(TestCase):
         assert passes.call_count == 0
 
 
+@region_silo_test(stable=True)
+class BatchRuleProcessorTest(TestCase):
+    def setUp(self):
+        self.group_event = next(
+            self.store_event(data={}, project_id=self.project.id).build_group_events()
+        )
+        self.other_project = self.create_project()
+        self.other_group_event = next(
+            self.store_event(data={}, project_id=self.other_project.id).build_group_events()
+        )
+
+        for project in (self.project, self.other_project):
+            Rule.objects.filter(project=project).delete()
+            ProjectOwnership.objects.create(project_id=project.id, fallthrough=True)
+        self.rule = Rule.objects.create(
+            project=self.project,
+            data={"conditions": [EVERY_EVENT_COND_DATA], "actions": [EMAIL_ACTION_DATA]},
+        )
+        self.other_rule = Rule.objects.create(
+            project=self.other_project,
+            data={"conditions": [EVERY_EVENT_COND_DATA], "actions": [EMAIL_ACTION_DATA]},
+        )
+
+    def make_job(self, group_event):
+        return RuleProcessorJob(
+            group_event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+        )
+
+    def test_apply(self):
+        processor = BatchRuleProcessor(
+            [
+                self.make_job(self.group_event),
+                self.make_job(self.other_group_event),
+                # Same group again, should be throttled by the rule frequency
+                self.make_job(self.group_event),
+            ]
+        )
+        results = [list(result) for result in processor.apply()]
+
+        assert len(results) == 3
+        assert [futures[0].rule for _, futures in results[0]] == [self.rule]
+        assert [futures[0].rule for _, futures in results[1]] == [self.other_rule]
+        assert results[2] == []
+        assert RuleFireHistory.objects.filter(rule=self.rule).count() == 1
+        assert RuleFireHistory.objects.filter(rule=self.other_rule).count() == 1
+
+    def test_rule_statuses_fetched_once(self):
+        processor = BatchRuleProcessor(
+            [self.make_job(self.group_event), self.make_job(self.other_group_event)]
+        )
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            list(processor.apply())
+        status_queries = [
+            q
+            for q in queries.captured_queries
+            if "grouprulestatus" in str(q) and "UPDATE" not in str(q)
+        ]
+        # select, insert and select again for the rows that did not exist yet
+        assert len(status_queries) == 3
+
+        cache.clear()
+        GroupRuleStatus.objects.filter(rule__in=[self.rule, self.other_rule]).update(
+            last_active=timezone.now() - timedelta(minutes=Rule.DEFAULT_FREQUENCY + 1)
+        )
+        processor = BatchRuleProcessor(
+            [self.make_job(self.group_event), self.make_job(self.other_group_event)]
+        )
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            results = [list(result) for result in processor.apply()]
+        status_queries = [
+            q
+            for q in queries.captured_queries
+            if "grouprulestatus" in str(q) and "UPDATE" not in str(q)
+        ]
+        assert len(status_queries) == 1
+        assert all(len(result) == 1 for result in results)
+
+    def test_snoozed_rule(self):
+        self.snooze_rule(owner_id=self.user.id, rule=self.rule)
+        processor = BatchRuleProcessor(
+            [self.make_job(self.group_event), self.make_job(self.other_group_event)]
+        )
+        results = [list(result) for result in processor.apply()]
+        assert results[0] == []
+        assert len(results[1]) == 1
+
+    def test_group_unresolved_after_prefetch(self):
+        group = self.group_event.group
+        group.update(status=GroupStatus.IGNORED)
+        job = self.make_job(self.group_event)
+        processor = BatchRuleProcessor([job, self.make_job(self.other_group_event)])
+        processor.prefetch_unresolved()
+        assert group.id not in processor.rule_statuses
+
+        group.update(status=GroupStatus.UNRESOLVED)
+        rp = RuleProcessor(
+            job.event,
+            is_new=job.is_new,
+            is_regression=job.is_regression,
+            is_new_group_environment=job.is_new_group_environment,
+            has_reappeared=job.has_reappeared,
+            batch=processor,
+        )
+        results = list(rp.apply())
+        assert [futures[0].rule for _, futures in results] == [self.rule]
+
+    def test_project_not_prefetched(self):
+        self.group_event.group.update(status=GroupStatus.IGNORED)
+        processor = BatchRuleProcessor([self.make_job(self.group_event)])
+        processor.prefetch_unresolved()
+
+        self.group_event.group.update(status=GroupStatus.UNRESOLVED)
+        rp = RuleProcessor(
+            self.group_event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+            batch=processor,
+        )
+        assert rp.batch is None
+        results = list(rp.apply())
+        assert [futures[0].rule for _, futures in results] == [self.rule]
+
+    def test_condition_instantiated_once(self):
+        other_group_event = next(
+            self.store_event(
+                data={"fingerprint": ["other-group"]}, project_id=self.project.id
+            ).build_group_events()
+        )
+        processor = BatchRuleProcessor(
+            [self.make_job(self.group_event), self.make_job(other_group_event)]
+        )
+        with patch(
+            "sentry.rules.conditions.every_event.EveryEventCondition.__init__",
+            autospec=True,
+            side_effect=lambda inst, *args, **kwargs: RuleBase.__init__(inst, *args, **kwargs),
+        ) as init:
+            results = [list(result) for result in processor.apply()]
+        assert all(len(result) == 1 for result in results)
+        assert init.call_count == 1
+
+
+@region_silo_test(stable=True)
+class ProjectRuleCacheTest(TestCase):
+    def setUp(self):
+        self.group_event = next(
+            self.store_event(data={}, project_id=self.project.id).build_group_events()
+        )
+        self.other_group_event = next(
+            self.store_event(
+                data={"fingerprint": ["other-group"]}, project_id=self.project.id
+            ).build_group_events()
+        )
+        Rule.objects.filter(project=self.project).delete()
+        self.rule = Rule.objects.create(
+            project=self.project,
+            data={"conditions": [EVERY_EVENT_COND_DATA], "actions": [EMAIL_ACTION_DATA]},
+        )
+
+    def make_batch(self, group_event, rule_cache):
+        return BatchRuleProcessor(
+            [
+                RuleProcessorJob(
+                    group_event,
+                    is_new=True,
+                    is_regression=True,
+                    is_new_group_environment=True,
+                    has_reappeared=True,
+                )
+            ],
+            rule_cache=rule_cache,
+        )
+
+    def test_shared_between_batches(self):
+        rule_cache = ProjectRuleCache()
+        with patch(
+            "sentry.rules.conditions.every_event.EveryEventCondition.__init__",
+            autospec=True,
+            side_effect=lambda inst, *args, **kwargs: RuleBase.__init__(inst, *args, **kwargs),
+        ) as init, patch.object(
+            Rule, "get_for_projects", wraps=Rule.get_for_projects
+        ) as get_for_projects:
+            results = [
+                list(self.make_batch(group_event, rule_cache).apply()[0])
+                for group_event in (self.group_event, self.other_group_event)
+            ]
+        assert all(len(result) == 1 for result in results)
+        assert get_for_projects.call_count == 1
+        assert init.call_count == 1
+
+    def test_expiry(self):
+        rule_cache = ProjectRuleCache(ttl=0)
+        assert rule_cache.get_rules([self.project.id]) == {self.project.id: [self.rule]}
+
+        self.rule.status = RuleStatus.INACTIVE
+        self.rule.save()
+        assert rule_cache.get_rules([self.project.id]) == {self.project.id: []}
+
+    def test_max_projects(self):
+        other_project = self.create_project()
+        rule_cache = ProjectRuleCache(max_projects=1)
+        rule_cache.get_rules([self.project.id])
+        rule_cache.get_rules([other_project.id])
+        assert list(rule_cache._entries) == [other_project.id]
+
+
 class MockFilterTrue(EventFilter):
     id = "tests.sentry.rules.test_processor.MockFilterTrue"
     label = "Mock filter which always passes."
@@ -11,10 +11,11 @@ from sentry.ratelimits.cardinality import (
     RequestedQuota,
     Timestamp,
 )
-from sentry.sentry_metrics.configuration import UseCaseKey
+from sentry.sentry_metrics.configuration import IndexerStorage, UseCaseKey, get_ingest_config
 from sentry.sentry_metrics.consumers.indexer.batch import PartitionIdxOffset
 from sentry.sentry_metrics.indexer.limiters.cardinality import (
     TimeseriesCardinalityLimiter,
+    TimeseriesCardinalityLimiterFactory,
     _build_quota_key,
 )
 from sentry.testutils.helpers.options import override_options
@@ -515,3 +516,10 @@ def test_sample_rate_half(set_sentry_option):
         # We are sampling org_id=1 into cardinality limiting. Because our quota is
         # zero, only that org's metrics are dropped.
         assert result.keys_to_remove == [PartitionIdxOffset(0, 0)]
+
+
+@pytest.mark.parametrize("use_case_key", [UseCaseKey.RELEASE_HEALTH, UseCaseKey.PERFORMANCE])
+def test_factory_admitted_hashes_cache(use_case_key):
+    config = get_ingest_config(use_case_key, IndexerStorage.POSTGRES)
+    limiter = TimeseriesCardinalityLimiterFactory().get_ratelimiter(config)
+    assert limiter.backend.admitted_hashes_cache_size == 100000
@@ -10,7 +10,11 @@ import sentry_kafka_schemas
 from arroyo.backends.kafka import KafkaPayload
 from arroyo.types import BrokerValue, Message, Partition, Topic, Value
 
-from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch, PartitionIdxOffset
+from sentry.sentry_metrics.consumers.indexer.batch import (
+    IndexerBatch,
+    PartitionIdxOffset,
+    loads_with_raw_value,
+)
 from sentry.sentry_metrics.indexer.base import FetchType, FetchTypeExt, Metadata
 from sentry.snuba.metrics.naming_layer.mri import SessionMRI, TransactionMRI
 from sentry.utils import json
@@ -667,6 +671,121 @@ def test_all_resolved(caplog, settings):
     ]
 
 
+def test_loads_with_raw_value():
+    parsed = loads_with_raw_value(json.dumps(distribution_payload).encode("utf-8"))
+    assert parsed is not None
+    assert parsed["value"].value == "[4,5,6]"
+    assert {k: v for k, v in parsed.items() if k != "value"} == {
+        k: v for k, v in distribution_payload.items() if k != "value"
+    }
+
+    assert loads_with_raw_value(b'{"type":"d","value":[ 1.5 , -2e3 ]}')["value"].value == (
+        "[ 1.5 , -2e3 ]"
+    )
+    assert loads_with_raw_value(b'{"type":"s","value":[]}')["value"].value == "[]"
+
+    # Counters are decoded fully
+    assert loads_with_raw_value(json.dumps(counter_payload).encode("utf-8")) is None
+    # Not a list of numbers
+    assert loads_with_raw_value(b'{"type":"d","value":[1,,2]}') is None
+    assert loads_with_raw_value(b'{"type":"d","value":["a"]}') is None
+    # Not valid JSON numbers
+    for value in (b"1-2", b"1..2", b"1e", b"01", b"1.", b".5", b"+1", b"-"):
+        assert loads_with_raw_value(b'{"type":"d","value":[%s]}' % value) is None
+    # Nested key
+    assert loads_with_raw_value(b'{"tags":{"value":[1]},"value":[2]}') is None
+    # Invalid JSON elsewhere in the payload
+    assert loads_with_raw_value(b'{"type":"d","value":[1],') is None
+
+
+@patch("sentry.sentry_metrics.consumers.indexer.batch.UseCaseID", MockUseCaseID)
+def test_all_resolved_raw_value(caplog, settings):
+    outer_message = _construct_outer_message(
+        [
+            (counter_payload, []),
+            (distribution_payload, []),
+        ]
+    )
+
+    batch = IndexerBatch(
+        outer_message,
+        True,
+        False,
+        input_codec=_INGEST_CODEC,
+        input_validation_rate=0.0,
+    )
+    assert batch.extract_strings() == {
+        MockUseCaseID.SESSIONS: {
+            1: {
+                "c:sessions/session@none",
+                "d:sessions/duration@second",
+                "environment",
+                "healthy",
+                "init",
+                "production",
+                "session.status",
+            }
+        }
+    }
+
+    strings = [
+        "c:sessions/session@none",
+        "d:sessions/duration@second",
+        "environment",
+        "healthy",
+        "init",
+        "production",
+        "session.status",
+    ]
+    snuba_payloads = batch.reconstruct_messages(
+        {MockUseCaseID.SESSIONS: {1: {string: i for i, string in enumerate(strings, 1)}}},
+        {
+            MockUseCaseID.SESSIONS: {
+                1: {
+                    string: Metadata(id=i, fetch_type=FetchType.CACHE_HIT)
+                    for i, string in enumerate(strings, 1)
+                }
+            }
+        },
+    )
+
+    assert [
+        (payload["metric_id"], payload["tags"], payload["value"])
+        for payload, _ in _deconstruct_messages(snuba_payloads)
+    ] == [
+        (1, {"3": 6, "7": 5}, 1),
+        (2, {"3": 6, "7": 4}, [4, 5, 6]),
+    ]
+
+
+@patch("sentry.sentry_metrics.consumers.indexer.batch.UseCaseID", MockUseCaseID)
+def test_raw_value_malformed_number(caplog):
+    payload = json.dumps(distribution_payload).encode("utf-8").replace(b"[4,5,6]", b"[4,5-6]")
+    message_batch = [
+        Message(
+            BrokerValue(
+                KafkaPayload(None, payload, []),
+                Partition(Topic("topic"), 0),
+                0,
+                BROKER_TIMESTAMP,
+            )
+        )
+    ]
+    outer_message = Message(Value(message_batch, message_batch[-1].committable))
+
+    # Falls back to decoding the whole payload, which rejects it
+    batch = IndexerBatch(
+        outer_message,
+        True,
+        False,
+        input_codec=_INGEST_CODEC,
+        input_validation_rate=0.0,
+    )
+    assert batch.skipped_offsets == {PartitionIdxOffset(partition_idx=0, offset=0)}
+    assert batch.extract_strings() == {}
+    assert "process_messages.invalid_json" in caplog.text
+
+
 @patch("sentry.sentry_metrics.consumers.indexer.batch.UseCaseID", MockUseCaseID)
 def test_all_resolved_with_routing_information(caplog, settings):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
@@ -1,7 +1,15 @@
+from unittest import mock
+
 import pytest
 from django.conf import settings
 
-from sentry.sentry_metrics.indexer.cache import StringIndexerCache
+from sentry.sentry_metrics.indexer.base import FetchType
+from sentry.sentry_metrics.indexer.cache import (
+    CachingIndexer,
+    LocalStringIndexerCache,
+    StringIndexerCache,
+)
+from sentry.sentry_metrics.indexer.mock import RawSimpleIndexer
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.utils.cache import cache
 from sentry.utils.hashlib import md5_text
@@ -81,3 +89,67 @@ def test_separate_namespacing() -> None:
     indexer_cache.set("transactions:3:what", 2)
     assert indexer_cache.get("sessions:3:what") == 1
     assert indexer_cache.get("transactions:3:what") == 2
+
+
+def test_local_cache() -> None:
+    now = [0.0]
+    local_cache = LocalStringIndexerCache(
+        size=4, ttl=100, use_case_sizes={"spans": 0}, timer=lambda: now[0]
+    )
+
+    local_cache.set_many({"sessions:1:a": 1, "sessions:1:b": 2, "spans:1:a": 3})
+    assert local_cache.get_many(["sessions:1:a", "sessions:1:b", "sessions:1:c", "spans:1:a"]) == {
+        "sessions:1:a": 1,
+        "sessions:1:b": 2,
+        "sessions:1:c": None,
+        # disabled for this use case
+        "spans:1:a": None,
+    }
+    assert local_cache.get_string("sessions", 1, 2) == "b"
+    assert local_cache.get_string("sessions", 2, 2) is None
+
+    # Both directions count towards the budget of the use case, the least
+    # recently used mapping is evicted.
+    local_cache.get("sessions:1:a")
+    local_cache.set("sessions:1:c", 4)
+    assert local_cache.get("sessions:1:b") is None
+    assert local_cache.get("sessions:1:c") == 4
+    assert local_cache.get("transactions:1:c") is None
+
+    local_cache.delete("sessions:1:c")
+    assert local_cache.get("sessions:1:c") is None
+    assert local_cache.get_string("sessions", 1, 4) is None
+
+    # Expiry is jittered by up to 25% of the TTL
+    now[0] = 99
+    assert local_cache.get("sessions:1:a") == 1
+    now[0] = 126
+    assert local_cache.get("sessions:1:a") is None
+
+
+def test_caching_indexer_local_cache(use_case_id: str) -> None:
+    cache.clear()
+    use_case = UseCaseID(use_case_id)
+    local_cache = LocalStringIndexerCache(size=100, ttl=100)
+    indexer = CachingIndexer(indexer_cache, RawSimpleIndexer(), local_cache)
+
+    results = indexer.bulk_record({use_case: {1: {"a", "b"}}})
+    assert results.get_fetch_metadata()[use_case][1]["a"].fetch_type == FetchType.FIRST_SEEN
+    a = results[use_case][1]["a"]
+
+    with mock.patch.object(indexer_cache, "get_many", wraps=indexer_cache.get_many) as get_many:
+        results = indexer.bulk_record({use_case: {1: {"a", "b", "c"}}})
+        assert results.get_fetch_metadata()[use_case][1]["a"].fetch_type == FetchType.CACHE_HIT
+        assert results.get_fetch_metadata()[use_case][1]["c"].fetch_type == FetchType.FIRST_SEEN
+        assert results[use_case][1]["a"] == a
+        # Only the unknown string is looked up in the shared cache
+        get_many.assert_called_once_with([f"{use_case_id}:1:c"])
+
+    # Strings found in the shared cache are added to the local one
+    local_cache.clear()
+    assert indexer.resolve(use_case, 1, "a") == a
+    assert local_cache.get(f"{use_case_id}:1:a") == a
+
+    with mock.patch.object(indexer.indexer, "reverse_resolve") as reverse_resolve:
+        assert indexer.reverse_resolve(use_case, 1, a) == "a"
+        assert not reverse_resolve.called
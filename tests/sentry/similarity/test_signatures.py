@@ -1,5 +1,6 @@
 from collections import Counter
 
+import mmh3
 import pytest
 
 from sentry.similarity.signatures import MinHashSignatureBuilder
@@ -24,3 +25,22 @@ def test_signatures() -> None:
     estimation = results[True] / float(sum(results.values()))
 
     assert similarity == pytest.approx(estimation, 0.1)
+
+
+def test_signatures_cache() -> None:
+    uncached = MinHashSignatureBuilder(16, 0xFFFF)
+    cached = MinHashSignatureBuilder(16, 0xFFFF, cache_size=4)
+
+    features = [b"foo", b"bar", b"baz", b"qux", b"quux", b"foo"]
+    assert cached(features) == uncached(features) == uncached(features[:5])
+    assert len(cached.cache) == 4
+
+    # Signatures don't depend on what was cached before
+    assert cached(features[:2]) == uncached(features[:2])
+    assert cached(features[:1]) == uncached(features[:1])
+
+    # Column hashes are unchanged from the original implementation
+    assert uncached([b"foo"]) == [mmh3.hash(b"foo", column) % 0xFFFF for column in range(16)]
+
+    with pytest.raises(ValueError):
+        cached([])
@@ -3,13 +3,15 @@ from unittest.mock import patch
 from django.core import mail
 
 import sentry
+from sentry.digests import ScheduleEntry
 from sentry.digests.backends.redis import RedisBackend
 from sentry.digests.notifications import event_to_record
 from sentry.models import ProjectOwnership, Rule
-from sentry.tasks.digests import deliver_digest
+from sentry.tasks.digests import deliver_digest, deliver_digests, schedule_digests
 from sentry.testutils import TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.testutils.helpers.features import with_feature
+from sentry.testutils.helpers.options import override_options
 
 
 class DeliverDigestTest(TestCase):
@@ -51,3 +53,48 @@ class DeliverDigestTest(TestCase):
     def test_no_records(self):
         # This shouldn't error if no records are present
         deliver_digest(f"mail:p:{self.project.id}:IssueOwners:")
+
+
+class DeliverDigestsTest(TestCase):
+    @override_options({"digests.batch-delivery.concurrency": 1})
+    @patch.object(sentry, "digests")
+    def test_deliver_digests(self, digests):
+        backend = RedisBackend()
+        digests.digest_many = backend.digest_many
+
+        projects = [self.project, self.create_project()]
+        keys = [f"mail:p:{project.id}:IssueOwners:" for project in projects]
+        for key, project in zip(keys, projects):
+            rule = Rule.objects.create(project=project, label="Test Rule", data={})
+            ProjectOwnership.objects.create(project_id=project.id, fallthrough=True)
+            event = self.store_event(
+                data={"timestamp": iso_format(before_now(days=1)), "fingerprint": ["group-1"]},
+                project_id=project.id,
+            )
+            backend.add(key, event_to_record(event, [rule]), increment_delay=0, maximum_delay=0)
+
+        with self.tasks():
+            deliver_digests(keys + ["mail:p:0:IssueOwners:"])
+
+        assert len(mail.outbox) == 2
+        digests.delete.assert_called_once_with("mail:p:0:IssueOwners:")
+
+    @patch("sentry.tasks.digests.deliver_digests")
+    @patch("sentry.tasks.digests.deliver_digest")
+    @patch.object(sentry, "digests")
+    def test_schedule_batches(self, digests, deliver_digest, deliver_digests):
+        digests.schedule.return_value = iter(
+            [ScheduleEntry(f"mail:p:{i}:IssueOwners:", 0) for i in range(5)]
+        )
+
+        with override_options(
+            {"digests.batch-delivery.enabled": True, "digests.batch-delivery.batch-size": 2}
+        ):
+            schedule_digests()
+
+        assert not deliver_digest.delay.called
+        assert [call.args[0] for call in deliver_digests.delay.call_args_list] == [
+            ["mail:p:0:IssueOwners:", "mail:p:1:IssueOwners:"],
+            ["mail:p:2:IssueOwners:", "mail:p:3:IssueOwners:"],
+            ["mail:p:4:IssueOwners:"],
+        ]
@@ -53,7 +53,7 @@ from sentry.tasks.post_process import (
 )
 from sentry.testutils import SnubaTestCase, TestCase
 from sentry.testutils.cases import BaseTestCase, PerformanceIssueTestCase
-from sentry.testutils.helpers import with_feature
+from sentry.testutils.helpers import override_options, with_feature
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.testutils.helpers.eventprocessing import write_event_to_cache
 from sentry.testutils.performance_issues.store_transaction import PerfIssueTransactionTestMixin
@@ -379,6 +379,39 @@ class RuleProcessorTestMixin(BasePostProgressGroupMixin):
 
         mock_callback.assert_called_once_with(EventMatcher(event), mock_futures)
 
+    @patch("sentry.rules.processor.RuleProcessor")
+    def test_rule_processor_batch(self, mock_processor):
+        from sentry.rules.processor import project_rule_cache
+
+        project_rule_cache.clear()
+        event = self.create_event(data={"message": "testing"}, project_id=self.project.id)
+
+        mock_callback = Mock()
+        mock_futures = [Mock()]
+
+        mock_processor.return_value.apply.return_value = [(mock_callback, mock_futures)]
+
+        with override_options({"post_process.batch-rule-processor": True}):
+            self.call_post_process_group(
+                is_new=True,
+                is_regression=False,
+                is_new_group_environment=True,
+                event=event,
+            )
+
+        mock_processor.assert_called_once_with(
+            EventMatcher(event),
+            is_new=True,
+            is_regression=False,
+            is_new_group_environment=True,
+            has_reappeared=False,
+            batch=mock.ANY,
+        )
+        batch = mock_processor.call_args[1]["batch"]
+        assert batch.rule_cache is project_rule_cache
+        assert self.project.id in batch.rules_by_project
+        mock_callback.assert_called_once_with(EventMatcher(event), mock_futures)
+
     def test_rule_processor_buffer_values(self):
         # Test that pending buffer values for `times_seen` are applied to the group and that alerts
         # fire as expected
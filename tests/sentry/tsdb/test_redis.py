@@ -188,6 +188,27 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_get_range_many_keys(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        # More keys than vnodes, so that keys share hashes
+        keys = list(range(200)) + [f"key-{i}" for i in range(50)]
+        for i, key in enumerate(keys):
+            self.db.incr(TSDBModel.project, key, dts[i % 4], count=i + 1)
+
+        results = self.db.get_range(TSDBModel.project, keys, dts[0], dts[-1])
+        assert results == {
+            key: [(timestamp(dts[j]), i + 1 if j == i % 4 else 0) for j in range(4)]
+            for i, key in enumerate(keys)
+        }
+
+        assert self.db.get_range(TSDBModel.project, [], dts[0], dts[-1]) == {}
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
@@ -19,16 +19,23 @@ from sentry.testutils.silo import region_silo_test
 from sentry.utils.performance_issues.base import (
     DETECTOR_TYPE_TO_GROUP_TYPE,
     DetectorType,
+    SpanFeatureTable,
+    fingerprint_span,
+    get_span_duration,
+    parameterize_url,
     total_span_time,
 )
 from sentry.utils.performance_issues.detectors.n_plus_one_db_span_detector import (
     NPlusOneDBSpanDetector,
 )
 from sentry.utils.performance_issues.performance_detection import (
+    DETECTOR_CLASSES,
     EventPerformanceProblem,
     _detect_performance_problems,
     detect_performance_problems,
     get_detection_settings,
+    run_detector_on_data,
+    run_detectors_on_data,
 )
 from sentry.utils.performance_issues.performance_problem import PerformanceProblem
 
@@ -450,6 +457,30 @@ class PerformanceDetectionTest(TestCase):
             in incr_mock.mock_calls
         )
 
+    def test_fused_walk_matches_separate_walks(self):
+        settings = get_detection_settings(self.project.id)
+        for event_name in [
+            "n-plus-one-in-django-new-view",
+            "n-plus-one-api-calls/n-plus-one-api-calls-in-issue-stream",
+            "consecutive-http/consecutive-http-basic",
+            "uncompressed-assets/uncompressed-script-asset",
+            "slow-db-spans",
+        ]:
+            event = get_event(event_name)
+
+            separate = [detector_class(settings, event) for detector_class in DETECTOR_CLASSES]
+            for detector in separate:
+                run_detector_on_data(detector, event)
+
+            span_features = SpanFeatureTable(event["spans"])
+            fused = [
+                detector_class(settings, event, span_features)
+                for detector_class in DETECTOR_CLASSES
+            ]
+            run_detectors_on_data(fused, event)
+
+            assert [d.stored_problems for d in fused] == [d.stored_problems for d in separate]
+
 
 @region_silo_test
 class DetectorTypeToGroupTypeTest(unittest.TestCase):
@@ -677,3 +708,39 @@ class EventPerformanceProblemTest(TestCase):
 )
 def test_total_span_time(spans, duration):
     assert total_span_time(spans) == pytest.approx(duration, 0.01)
+
+
+def test_span_feature_table():
+    spans = [
+        {
+            "span_id": "a",
+            "op": "http.client",
+            "description": "GET /api/0/organizations/1234/",
+            "start_timestamp": 1.0,
+            "timestamp": 1.25,
+        },
+        {"span_id": "b", "op": "db", "start_timestamp": 2.0, "timestamp": 2.5},
+    ]
+    table = SpanFeatureTable(spans)
+    assert len(table) == 2
+
+    for span in spans:
+        assert table.duration(span) == get_span_duration(span)
+        assert table.duration_ms(span) == get_span_duration(span).total_seconds() * 1000
+        assert table.fingerprint(span) == fingerprint_span(span)
+
+    assert table.url(spans[0]) == "/api/0/organizations/1234/"
+    assert table.parameterized_url(spans[0]) == parameterize_url("/api/0/organizations/1234/")
+    assert table.url(spans[1]) == ""
+
+    # Values are computed once per span
+    with patch("sentry.utils.performance_issues.base.parameterize_url") as parameterize:
+        parameterize.return_value = "/api/0/organizations/*/"
+        table = SpanFeatureTable(spans)
+        assert table.parameterized_url(spans[0]) == "/api/0/organizations/*/"
+        assert table.parameterized_url(spans[0]) == "/api/0/organizations/*/"
+        assert parameterize.call_count == 1
+
+    # Spans that aren't part of the table are computed on every lookup
+    other = dict(spans[0], timestamp=3.0)
+    assert table.duration(other) == get_span_duration(other)
@@ -3,6 +3,7 @@ import uuid
 from enum import Enum
 from unittest import TestCase
 
+import pytest
 from django.utils.translation import ugettext_lazy as _
 
 from sentry.utils import json
@@ -48,3 +49,67 @@ class JSONTest(TestCase):
 
     def test_translation(self):
         self.assertEqual(json.dumps(_("word")), '"word"')
+
+
+DOCUMENT = {
+    "a": 'a "quoted" \\ [string] {}',
+    "b": [["]}", "\\", '"', '\\\\"'], {"c": []}],
+    "d": {"e": [1, {"f": "x" * 1000}]},
+}
+
+
+def find_brackets(document, chunk_size):
+    scanner = json.BracketScanner()
+    brackets = []
+    for start in range(0, len(document), chunk_size):
+        brackets.extend(
+            (start + pos, opening, scanner.depth)
+            for pos, opening in scanner.scan(document[start : start + chunk_size])
+        )
+    scanner.close()
+    return brackets
+
+
+def test_bracket_scanner():
+    document = json.dumps(DOCUMENT).encode()
+    expected = []
+    depth = 0
+    # Brackets outside of strings, found by decoding the document one character at a time.
+    in_string = escaped = False
+    for pos, char in enumerate(document.decode()):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+            expected.append((pos, True, depth))
+        elif char in "]}":
+            depth -= 1
+            expected.append((pos, False, depth))
+
+    assert len(expected) == 16
+    for chunk_size in (1, 2, 3, 7, 31, len(document)):
+        assert find_brackets(document, chunk_size) == expected
+
+
+def test_bracket_scanner_incomplete():
+    document = json.dumps(DOCUMENT).encode()
+    scanner = json.BracketScanner()
+    list(scanner.scan(document[:-1]))
+    with pytest.raises(ValueError):
+        scanner.close()
+
+    scanner = json.BracketScanner()
+    list(scanner.scan(b'["abc'))
+    assert scanner.in_string
+    with pytest.raises(ValueError):
+        scanner.close()
+
+    with pytest.raises(ValueError):
+        list(json.BracketScanner().scan(b"[]]"))
@@ -1,9 +1,14 @@
+import pytest
+
 from sentry.db.models.query import in_iexact
 from sentry.models import Organization, User
 from sentry.models.userreport import UserReport
-from sentry.testutils import TestCase
+from sentry.testutils import TestCase, TransactionTestCase
 from sentry.testutils.silo import control_silo_test
 from sentry.utils.query import (
+    InvalidQuerySetError,
+    ParallelRangeQuerySetWrapper,
+    ParallelRangeQuerySetWrapperWithProgressBar,
     RangeQuerySetWrapper,
     RangeQuerySetWrapperWithProgressBar,
     RangeQuerySetWrapperWithProgressBarApprox,
@@ -64,6 +69,68 @@ class RangeQuerySetWrapperWithProgressBarApproxTest(RangeQuerySetWrapperTest):
     range_wrapper = RangeQuerySetWrapperWithProgressBarApprox
 
 
+@control_silo_test(stable=True)
+class ParallelRangeQuerySetWrapperTest(TransactionTestCase):
+    range_wrapper = ParallelRangeQuerySetWrapper
+
+    def test_basic(self):
+        user_ids = sorted(self.create_user().id for _ in range(10))
+        qs = User.objects.all()
+
+        for shards in (1, 3, 20):
+            results = self.range_wrapper(qs, step=2, shards=shards)
+            assert sorted(user.id for user in results) == user_ids
+
+    def test_values_list(self):
+        users = [self.create_user() for _ in range(5)]
+        qs = User.objects.all()
+
+        results = self.range_wrapper(qs, step=2, values_list=["email"])
+        assert sorted(results) == sorted((user.id, user.email) for user in users)
+
+    def test_min_max_id(self):
+        user_ids = sorted(self.create_user().id for _ in range(10))
+        qs = User.objects.all()
+
+        results = self.range_wrapper(qs, step=2, min_id=user_ids[2], max_id=user_ids[6])
+        assert sorted(user.id for user in results) == user_ids[2:7]
+
+    def test_loop_and_delete(self):
+        for _ in range(10):
+            self.create_user()
+
+        qs = User.objects.all()
+
+        for user in self.range_wrapper(qs, step=2):
+            user.delete()
+
+        assert User.objects.all().count() == 0
+
+    def test_stop_early(self):
+        for _ in range(10):
+            self.create_user()
+
+        qs = User.objects.all()
+
+        for _ in self.range_wrapper(qs, step=1, shards=2):
+            break
+
+    def test_empty(self):
+        qs = User.objects.all()
+        assert len(list(self.range_wrapper(qs, step=2))) == 0
+
+    def test_invalid_queryset(self):
+        with pytest.raises(InvalidQuerySetError):
+            self.range_wrapper(User.objects.all()[:5])
+        with pytest.raises(InvalidQuerySetError):
+            self.range_wrapper(User.objects.order_by("email"))
+
+
+@control_silo_test(stable=True)
+class ParallelRangeQuerySetWrapperWithProgressBarTest(ParallelRangeQuerySetWrapperTest):
+    range_wrapper = ParallelRangeQuerySetWrapperWithProgressBar
+
+
 class BulkDeleteObjectsTest(TestCase):
     def setUp(self):
         super().setUp()
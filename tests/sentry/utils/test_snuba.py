@@ -1,18 +1,30 @@
+import io
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
 import pytz
 from django.utils import timezone
+from snuba_sdk import Column, Entity, Query, Request
+from urllib3.response import HTTPResponse
 
 from sentry.models import GroupRelease, Project, Release
 from sentry.snuba.dataset import Dataset
 from sentry.testutils import TestCase
+from sentry.testutils.helpers import override_options
+from sentry.utils import json, snuba
 from sentry.utils.snuba import (
+    RateLimitExceeded,
     SnubaQueryParams,
+    UnexpectedResponseError,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
     _prepare_query_params,
+    get_cache_key,
     get_json_type,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
@@ -374,3 +386,134 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+class QueryCoalescingTest(unittest.TestCase):
+    query = ({"dataset": "events", "selected_columns": ["count()"]}, lambda x: x, lambda x: x)
+
+    def run_concurrently(self, bulk_snuba_query):
+        started = threading.Event()
+        done = threading.Event()
+
+        def inner(snuba_param_list, headers):
+            started.set()
+            done.wait(5)
+            return bulk_snuba_query(snuba_param_list, headers)
+
+        key = get_cache_key(self.query[0])
+        with mock.patch(
+            "sentry.utils.snuba._bulk_snuba_query", side_effect=inner
+        ) as mock_bulk_snuba_query, ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(_apply_cache_and_build_results, [self.query])
+            assert started.wait(5)
+            follower = pool.submit(_apply_cache_and_build_results, [self.query])
+            # Wait for the second query to join the first one
+            for _ in range(500):
+                if snuba._query_single_flight._calls[key][1]:
+                    break
+                time.sleep(0.01)
+            done.set()
+
+        assert mock_bulk_snuba_query.call_count == 1
+        return leader, follower
+
+    def test_identical_queries_are_coalesced(self):
+        leader, follower = self.run_concurrently(
+            lambda snuba_param_list, headers: [{"data": [{"count": 1}]}]
+        )
+
+        assert leader.result() == follower.result() == [{"data": [{"count": 1}]}]
+        assert leader.result()[0] is not follower.result()[0]
+        assert len(snuba._query_single_flight) == 0
+
+    def test_errors_are_shared(self):
+        def fail(snuba_param_list, headers):
+            raise RateLimitExceeded("rate limited")
+
+        leader, follower = self.run_concurrently(fail)
+
+        with pytest.raises(RateLimitExceeded):
+            leader.result()
+        with pytest.raises(RateLimitExceeded):
+            follower.result()
+        assert len(snuba._query_single_flight) == 0
+
+
+class LocalResultCacheTest(unittest.TestCase):
+    query = ({"dataset": "events", "selected_columns": ["count()"]}, lambda x: x, lambda x: x)
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_cached_by_referrer(self, mock_bulk_snuba_query):
+        mock_bulk_snuba_query.side_effect = lambda snuba_param_list, headers: [
+            {"data": [{"count": 1}]}
+        ]
+
+        with mock.patch(
+            "sentry.utils.snuba._local_result_cache", snuba.LocalResultCache(1000)
+        ), override_options(
+            {"snuba.local-cache.referrer-ttls": {"api.dashboards.widget.bar-chart": 10}}
+        ):
+            for referrer in (
+                "api.dashboards.widget.bar-chart",
+                "api.discover.query-table",
+                "api.dashboards.widget.bar-chart",
+            ):
+                result = _apply_cache_and_build_results([self.query], referrer=referrer)
+                assert result == [{"data": [{"count": 1}]}]
+
+            # Hits get their own copy of the result
+            result[0]["data"].clear()
+            result = _apply_cache_and_build_results(
+                [self.query], referrer="api.dashboards.widget.bar-chart"
+            )
+            assert result == [{"data": [{"count": 1}]}]
+
+        assert mock_bulk_snuba_query.call_count == 2
+
+
+class StreamSnqlQueryTest(unittest.TestCase):
+    referrer = "data_export.tasks.discover"
+    rows = [
+        {"event_id": "a" * 32, "message": 'a "quoted" \\ {"data": [1]}'},
+        {"event_id": "b" * 32, "message": "]}"},
+    ]
+
+    def make_request(self):
+        return Request(
+            dataset="events",
+            app_id="default",
+            query=Query(match=Entity("events"), select=[Column("event_id"), Column("message")]),
+        )
+
+    def make_response(self, body, status=200):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        return HTTPResponse(body=io.BytesIO(body), status=status, preload_content=False)
+
+    @mock.patch("sentry.utils.snuba.STREAM_CHUNK_SIZE", 7)
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream_rows(self, mock_raw_snql_query):
+        mock_raw_snql_query.return_value = self.make_response(
+            {"meta": [{"name": "event_id", "type": "String"}], "data": self.rows, "timing": {}}
+        )
+
+        rows = snuba.stream_snql_query(self.make_request(), referrer=self.referrer)
+        # Nothing is sent before iteration starts
+        assert not mock_raw_snql_query.called
+        assert list(rows) == self.rows
+        assert mock_raw_snql_query.call_args[1] == {"preload_content": False}
+
+    @mock.patch("sentry.utils.snuba._raw_snql_query")
+    def test_stream_errors(self, mock_raw_snql_query):
+        mock_raw_snql_query.return_value = self.make_response(
+            {"error": {"type": "rate-limited", "message": "rate limited"}}, status=429
+        )
+        with pytest.raises(RateLimitExceeded):
+            list(snuba.stream_snql_query(self.make_request(), referrer=self.referrer))
+
+        body = json.dumps({"data": self.rows}).encode()
+        mock_raw_snql_query.return_value = self.make_response(body[:-20])
+        rows = snuba.stream_snql_query(self.make_request(), referrer=self.referrer)
+        assert next(rows) == self.rows[0]
+        with pytest.raises(UnexpectedResponseError):
+            list(rows)
@@ -0,0 +1,70 @@
+import pytest
+
+from sentry.utils.snuba_query_cache import LocalResultCache, SingleFlight
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_single_flight():
+    single_flight = SingleFlight()
+
+    future, is_leader = single_flight.claim("a")
+    assert is_leader
+    other_future, is_leader = single_flight.claim("a")
+    assert not is_leader
+    assert other_future is future
+    assert len(single_flight) == 1
+
+    result = {"data": []}
+    single_flight.resolve("a", result, copy=dict)
+    assert len(single_flight) == 0
+    assert future.result() == result
+    assert future.result() is not result
+
+    # Once resolved, the next call starts over
+    future, is_leader = single_flight.claim("a")
+    assert is_leader
+    single_flight.resolve("a", result, copy=dict)
+    assert future.result() is result
+
+
+def test_single_flight_error():
+    single_flight = SingleFlight()
+    future, _ = single_flight.claim("a")
+    single_flight.claim("a")
+
+    single_flight.resolve("a", error=ValueError("failed"))
+    with pytest.raises(ValueError):
+        future.result()
+
+
+def test_local_result_cache():
+    clock = MockClock()
+    cache = LocalResultCache(max_size=10, clock=clock)
+    assert cache.get("a") is None
+
+    cache.set("a", "aaaa", ttl=10)
+    cache.set("b", "bbbb", ttl=20)
+    assert cache.get("a") == "aaaa"
+    assert cache.size == 8
+
+    # Least recently used entries are evicted first
+    cache.set("c", "cccc", ttl=20)
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.size == 8
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("c") == "cccc"
+    assert cache.size == 4
+
+    cache.set("d", "d" * 11, ttl=20)
+    assert cache.get("d") is None
+    assert cache.get("c") == "cccc"
@@ -0,0 +1,51 @@
+import pytest
+
+from sentry.utils import json
+from sentry.utils.snuba_stream import ResponseScanner
+
+ROWS = [
+    {"event_id": "a" * 32, "title": 'a "quoted" \\ [title] {}'},
+    {"event_id": "b" * 32, "title": "]}", "tags": [["data", "["]]},
+    {"event_id": "c" * 32, "title": "x" * 5000},
+]
+
+BODY = {
+    "meta": [{"name": "event_id", "type": "String"}, {"name": "title", "type": "String"}],
+    "sql": 'SELECT "data" FROM errors',
+    "data": ROWS,
+    "timing": {"timestamp": 1, "duration_ms": 2},
+}
+
+
+def scan(body, chunk_size):
+    scanner = ResponseScanner()
+    rows = []
+    for start in range(0, len(body), chunk_size):
+        rows.extend(json.loads(row) for row in scanner.feed(body[start : start + chunk_size]))
+    return rows, scanner.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 31, 4096])
+def test_response_scanner(chunk_size):
+    rows, rest = scan(json.dumps(BODY).encode(), chunk_size)
+    assert rows == ROWS
+    assert rest == dict(BODY, data=[])
+
+
+def test_response_scanner_only_splits_top_level_data():
+    body = {"meta": {"data": [{"a": 1}]}, "xdata": [{"b": 2}], "data": [], "totals": {}}
+    rows, rest = scan(json.dumps(body).encode(), 3)
+    assert rows == []
+    assert rest == body
+
+    body = '{"data" : [ {"a": 1} , {"a": 2} ] , "meta": []}'.encode()
+    assert scan(body, 5) == ([{"a": 1}, {"a": 2}], {"data": [], "meta": []})
+
+
+def test_response_scanner_incomplete():
+    body = json.dumps(BODY).encode()
+    scanner = ResponseScanner()
+    rows = list(scanner.feed(body[:-100]))
+    assert len(rows) == 2
+    with pytest.raises(ValueError):
+        scanner.close()
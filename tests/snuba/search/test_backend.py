@@ -1,4 +1,5 @@
 import uuid
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from unittest import mock
 
@@ -31,6 +32,7 @@ from sentry.models import (
     record_group_history,
 )
 from sentry.models.groupowner import GroupOwner
+from sentry.search.snuba import executors
 from sentry.search.snuba.backend import (
     CdcEventsDatasetSnubaSearchBackend,
     EventsDatasetSnubaSearchBackend,
@@ -790,6 +792,32 @@ class EventsSnubaSearchTest(SharedSnubaTest):
         assert list(results) == []
         assert results.hits == 2
 
+    def test_hits_sample_queried_concurrently(self):
+        results = self.make_query(limit=1, count_hits=True)
+        assert results.hits == 2
+
+        with mock.patch.object(
+            executors._search_thread_pool, "submit", wraps=executors._search_thread_pool.submit
+        ) as submit:
+            results = self.make_query(limit=1, cursor=results.next, count_hits=True)
+        assert results.hits == 2
+        # The hits sample ran on the search thread pool, the chunk didn't
+        assert submit.call_count == 1
+
+    def test_hits_sample_timeout(self):
+        results = self.make_query(limit=1, count_hits=True)
+        hits_sample: Future = Future()
+
+        with mock.patch.object(
+            executors._search_thread_pool, "submit", return_value=hits_sample
+        ), self.options({"snuba.search.max-total-chunk-time-seconds": 0.1}):
+            results = self.make_query(limit=1, cursor=results.next, count_hits=True)
+
+        # The hits are left unknown rather than waiting for the sample
+        assert len(results) == 1
+        assert results.hits is None
+        assert hits_sample.cancelled()
+
     def test_age_filter(self):
         results = self.make_query(
             search_filter_query="firstSeen:>=%s" % date_to_query_format(self.group2.first_seen)